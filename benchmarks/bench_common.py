@@ -0,0 +1,113 @@
+"""
+Helpers shared by the benchmark scripts.
+
+Every script compares its run against a baseline JSON and fails when a
+case got slower or hungrier than the tolerance allows. By default the
+baseline is the one committed under benchmarks/baselines. Timings only
+compare well on the machine that recorded them, so on another machine,
+record a baseline with --output and pass it with --baseline.
+"""
+
+import json
+import os
+import time
+import tracemalloc
+
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines")
+TIME_BUDGET = 1.0  # Seconds of repeats per measurement (at least one run)
+
+
+def time_best(func, *args):
+    """Run func repeatedly within TIME_BUDGET and return the fastest run in seconds."""
+    timings = []
+    deadline = time.perf_counter() + TIME_BUDGET
+    while not timings or time.perf_counter() < deadline:
+        start = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def measure_peak(func, *args):
+    """Run func once and return its peak traced allocation in bytes."""
+    tracemalloc.start()
+    try:
+        func(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def add_baseline_arguments(parser, name):
+    """Add the --output, --baseline, --no-baseline and --tolerance options."""
+    default = os.path.join(BASELINE_DIR, f"{name}.json")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--baseline", default=default,
+                        help=f"Fail if results regress against this JSON file (default {os.path.relpath(default)})")
+    parser.add_argument("--no-baseline", action="store_true", help="Skip the regression check")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed relative regression against the baseline (default 0.25)")
+
+
+def compare_cases(results, baseline, key, metrics, tolerance):
+    """
+    Compare the cases of a run against those of a baseline run with the same key.
+
+    Args:
+        key: Fields identifying a case, such as ("algorithm", "size")
+        metrics: Metric -> (True if higher is better, absolute slack on top of the tolerance)
+
+    Returns:
+        List of human-readable regressions (empty if none)
+    """
+    regressions = []
+    previous = {tuple(case[field] for field in key): case for case in baseline.get("cases", [])}
+    for case in results["cases"]:
+        old = previous.get(tuple(case[field] for field in key))
+        if old is None:
+            continue
+        name = " ".join(str(case[field]) for field in key)
+        for metric, (higher_is_better, slack) in metrics.items():
+            if metric not in old:
+                continue
+            if higher_is_better:
+                worse = case[metric] < old[metric] * (1 - tolerance) - slack
+            else:
+                worse = case[metric] > old[metric] * (1 + tolerance) + slack
+            if worse:
+                regressions.append(f"{name} {metric}: {old[metric]:.4g} -> {case[metric]:.4g}")
+    return regressions
+
+
+def finish(results, args, compare):
+    """
+    Write the results if asked, then check them against the baseline.
+
+    Args:
+        compare: Function of (results, baseline, tolerance) returning the regressions
+
+    Returns:
+        Exit code: 1 if anything regressed, else 0
+    """
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.no_baseline:
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; skipping the regression check")
+        return 0
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("host") != results["host"]:
+        print("WARNING: baseline was recorded on a different host; record one here with --output")
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"FAIL: {len(regressions)} regression(s) beyond {args.tolerance:.0%}")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+    print("No regressions against baseline")
+    return 0
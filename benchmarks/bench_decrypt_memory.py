@@ -0,0 +1,84 @@
+"""
+Peak memory benchmark for opening encrypted files.
+
+Encrypts an N-byte document with every algorithm (compression off, so the
+ciphertext is also about N bytes) and reports the peak Python heap used by
+EncryptionService.decrypt_file (memory-mapped) against the older
+read-everything-then-decrypt_data path, as multiples of N. The run fails
+when the memory-mapped path peaks above --max-ratio, or above the
+committed benchmarks/baselines/decrypt_memory.json (see bench_common).
+
+Usage:
+    python benchmarks/bench_decrypt_memory.py [size_in_mb] [--max-ratio R] [--output results.json]
+    python benchmarks/bench_decrypt_memory.py --baseline results.json [--tolerance 0.25]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_common import add_baseline_arguments, compare_cases, finish, measure_peak
+from utils.security.encryption import EncryptionService
+
+PEAK_SLACK = 0.05  # Multiples of N tolerated on top of the relative tolerance
+
+
+def read_then_decrypt(service, file_path, password):
+    """Baseline path: read the whole file, then decrypt the bytes."""
+    with open(file_path, 'rb') as file:
+        encrypted_data = file.read()
+    return service.decrypt_data(encrypted_data, password)
+
+
+def compare(results, baseline, tolerance):
+    """List the cases in results whose peak regressed against the baseline."""
+    return compare_cases(results, baseline, ("algorithm", "size"), {"mmap_peak": (False, PEAK_SLACK)}, tolerance)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("size_mb", nargs="?", type=int, default=32, help="Document size in MB (default 32)")
+    parser.add_argument("--max-ratio", type=float, default=2.5,
+                        help="Fail if the mmap path peaks above this multiple of N (default 2.5)")
+    add_baseline_arguments(parser, "decrypt_memory")
+    args = parser.parse_args()
+
+    service = EncryptionService()
+    password = "BenchmarkPassword123!"
+    size = args.size_mb * 1024 * 1024
+    document = ("The quick brown fox jumps over the lazy dog. " * (size // 45 + 1))[:size]
+
+    print(f"Document size N = {args.size_mb} MB")
+    print(f"{'Algorithm':<14}{'mmap peak':>12}{'read peak':>12}")
+
+    results = {"host": service._host_fingerprint(), "cases": []}
+    failed = False
+    for algorithm in service.ALGORITHMS:
+        encrypted = service.encrypt_data(document, password, algorithm, compression='none')
+        with tempfile.NamedTemporaryFile(suffix='.enc', delete=False) as temp_file:
+            temp_file.write(encrypted)
+            temp_path = temp_file.name
+        del encrypted
+
+        try:
+            mmap_ratio = measure_peak(service.decrypt_file, temp_path, password) / size
+            read_ratio = measure_peak(read_then_decrypt, service, temp_path, password) / size
+        finally:
+            os.unlink(temp_path)
+
+        print(f"{algorithm:<14}{mmap_ratio:>11.2f}N{read_ratio:>11.2f}N")
+        results["cases"].append({"algorithm": algorithm, "size": size, "mmap_peak": round(mmap_ratio, 3),
+                                 "read_peak": round(read_ratio, 3)})
+        if mmap_ratio > args.max_ratio:
+            failed = True
+
+    if failed:
+        print(f"FAIL: decrypt_file peak above {args.max_ratio}N")
+    return finish(results, args, compare) or int(failed)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,138 @@
+"""
+Encryption benchmark suite.
+
+Measures derive_key latency, and encrypt_data / decrypt_data throughput and
+peak Python heap for every algorithm in EncryptionService.ALGORITHMS at
+payload sizes from 1 KB up to 1 GB. Results are printed as a table and
+checked against benchmarks/baselines/encryption.json (see bench_common),
+which covers the sizes up to 16 MB.
+
+Throughput includes the per-call key derivation, so small payloads are
+dominated by PBKDF2; the derive_key figures show how much.
+
+Usage:
+    python benchmarks/bench_encryption.py [--max-size 16M] [--output results.json]
+    python benchmarks/bench_encryption.py --baseline results.json [--tolerance 0.25]
+    python benchmarks/bench_encryption.py --max-size 16M --output benchmarks/baselines/encryption.json
+"""
+
+import argparse
+import os
+import platform
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cryptography
+from bench_common import add_baseline_arguments, compare_cases, finish, measure_peak, time_best
+from utils.security.encryption import EncryptionService
+
+PASSWORD = "BenchmarkPassword123!"
+SIZES = ["1K", "64K", "1M", "16M", "256M", "1G"]
+UNITS = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+PEAK_SLACK = 0.05  # Peak ratios may grow by this much (in N) on top of the tolerance
+
+
+def parse_size(text):
+    """Parse '64K', '16M' or '1G' into bytes."""
+    text = text.strip().upper()
+    if text[-1] in UNITS:
+        return int(float(text[:-1]) * UNITS[text[-1]])
+    return int(text)
+
+
+def bench_derive_key(service):
+    """Median derive_key latency in milliseconds for each key size in use."""
+    salt = os.urandom(service.SALT_SIZE)
+    results = {}
+    for key_size in sorted({service._get_key_size(algorithm) for algorithm in service.ALGORITHMS}):
+        timings = []
+        for _ in range(5):
+            start = time.perf_counter()
+            service.derive_key(PASSWORD, salt, key_size)
+            timings.append(time.perf_counter() - start)
+        results[str(key_size)] = round(statistics.median(timings) * 1000, 3)
+    return results
+
+
+def bench_algorithm(service, algorithm, size, compression):
+    """Throughput (MB/s) and peak heap (multiples of the payload size) for one case."""
+    document = ("The quick brown fox jumps over the lazy dog. " * (size // 45 + 1))[:size]
+    encrypted = service.encrypt_data(document, PASSWORD, algorithm, compression)
+    megabytes = size / (1024 * 1024)
+
+    result = {
+        "algorithm": algorithm,
+        "size": size,
+        "encrypt_mb_s": round(megabytes / time_best(service.encrypt_data, document, PASSWORD, algorithm,
+                                                     compression), 3),
+        "decrypt_mb_s": round(megabytes / time_best(service.decrypt_data, encrypted, PASSWORD), 3),
+        "encrypt_peak": round(measure_peak(service.encrypt_data, document, PASSWORD, algorithm,
+                                           compression) / size, 3),
+        "decrypt_peak": round(measure_peak(service.decrypt_data, encrypted, PASSWORD) / size, 3),
+    }
+    return result
+
+
+def compare(results, baseline, tolerance):
+    """
+    Compare a run against a baseline run.
+
+    Returns:
+        List of human-readable regressions (empty if none)
+    """
+    regressions = []
+    for key_size, latency in baseline.get("derive_key", {}).items():
+        current = results["derive_key"].get(key_size)
+        if current is not None and current > latency * (1 + tolerance):
+            regressions.append(f"derive_key({key_size}): {latency:.1f} ms -> {current:.1f} ms")
+
+    return regressions + compare_cases(results, baseline, ("algorithm", "size"), {
+        "encrypt_mb_s": (True, 0.0),
+        "decrypt_mb_s": (True, 0.0),
+        "encrypt_peak": (False, PEAK_SLACK),
+        "decrypt_peak": (False, PEAK_SLACK),
+    }, tolerance)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default=",".join(SIZES), help="Comma-separated payload sizes (default 1K..1G)")
+    parser.add_argument("--max-size", help="Skip sizes above this, e.g. 16M for a quick run")
+    parser.add_argument("--algorithms", help="Comma-separated subset of algorithms (default all)")
+    parser.add_argument("--compression", default="none", help="Compression mode passed to encrypt_data")
+    add_baseline_arguments(parser, "encryption")
+    args = parser.parse_args()
+
+    service = EncryptionService()
+    sizes = [parse_size(size) for size in args.sizes.split(",")]
+    if args.max_size:
+        sizes = [size for size in sizes if size <= parse_size(args.max_size)]
+    algorithms = args.algorithms.split(",") if args.algorithms else list(service.ALGORITHMS)
+
+    results = {
+        "host": service._host_fingerprint(),
+        "python": platform.python_version(),
+        "cryptography": cryptography.__version__,
+        "iterations": service.ITERATIONS,
+        "compression": args.compression,
+        "derive_key": bench_derive_key(service),
+        "cases": [],
+    }
+    print("derive_key: " + ", ".join(f"{int(k) * 8}-bit {v:.1f} ms" for k, v in results["derive_key"].items()))
+    print(f"{'Algorithm':<14}{'Size':>11}{'Enc MB/s':>11}{'Dec MB/s':>11}{'Enc peak':>10}{'Dec peak':>10}")
+
+    for size in sizes:
+        for algorithm in algorithms:
+            case = bench_algorithm(service, algorithm, size, args.compression)
+            results["cases"].append(case)
+            print(f"{algorithm:<14}{size:>11}{case['encrypt_mb_s']:>11.3g}{case['decrypt_mb_s']:>11.3g}"
+                  f"{case['encrypt_peak']:>9.2f}N{case['decrypt_peak']:>9.2f}N")
+
+    return finish(results, args, compare)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
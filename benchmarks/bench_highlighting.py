@@ -0,0 +1,225 @@
+"""
+Syntax highlighting benchmark suite.
+
+For every language with a grammar, builds synthetic corpora (short lines,
+long lines, deeply nested strings and comments, and identical repeated
+lines) plus real-world ones from files in the repository, then measures:
+
+- full-document highlighting throughput in blocks/s, with a cold line cache;
+- single-keystroke rehighlight latency in microseconds;
+- peak Python heap during the full pass, and the line cache's size after it.
+
+Results are printed as a table and checked against
+benchmarks/baselines/highlighting.json (see bench_common). Qt's own
+allocations are not visible to tracemalloc, so the memory figure covers the
+tokenizer side.
+
+Usage:
+    python benchmarks/bench_highlighting.py [--blocks 20000] [--output results.json]
+    python benchmarks/bench_highlighting.py --baseline results.json [--tolerance 0.25]
+    python benchmarks/bench_highlighting.py --output benchmarks/baselines/highlighting.json
+"""
+
+import argparse
+import os
+import platform
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtCore import QT_VERSION_STR
+from PyQt5.QtGui import QTextCursor, QTextDocument
+from PyQt5.QtWidgets import QApplication, QPlainTextDocumentLayout
+
+from bench_common import add_baseline_arguments, compare_cases, finish, measure_peak, time_best
+from core.grammar import available_grammars
+from core.lexer import get_token_cache
+from core.syntax_highlighter import SyntaxHighlighter
+
+REPOSITORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CORPORA = ["short", "long", "nested", "repetitive", "real"]
+KEYSTROKES = 200
+LONG_LINE = 2000  # Characters per line in the "long" corpus
+PEAK_SLACK = 64 * 1024  # Peak bytes may grow by this much on top of the tolerance
+
+# A few typical lines per language; {n} is replaced by the line number so lines differ
+SNIPPETS = {
+    "python": ["def handler_{n}(request, *args):", "    value = compute({n}, 'text')  # note",
+               "    if value is None and not flag:", "        return {{'id': {n}, \"ok\": True}}"],
+    "javascript": ["function handler{n}(req) {{", "  const value = compute({n}, 'text'); // note",
+                   "  if (value === null) return {{ id: {n} }};", "}}"],
+    "cpp": ["#include <vector>", "int handler_{n}(const char* name) {{",
+            "    return compute({n}, \"text\"); // note", "}}"],
+    "json": ["{{\"id\": {n}, \"name\": \"item {n}\", \"ok\": true, \"tags\": [\"a\", null]}},"],
+    "yaml": ["item_{n}:", "  name: \"item {n}\"  # note", "  enabled: yes", "  size: {n}"],
+    "markdown": ["## Section {n}", "Some **bold** text with `code` and a [link](http://x/{n}).",
+                 "- list item {n}", "> quoted {n}"],
+    "shell": ["if [ -n \"$VAR_{n}\" ]; then", "  echo \"line {n}\" $HOME  # note", "fi"],
+    "sql": ["SELECT id, name FROM items_{n} WHERE name = 'x{n}' -- note",
+            "INSERT INTO log VALUES ({n}, 'text');"],
+    "go": ["func handler{n}(w http.ResponseWriter) error {{", "\tvalue := compute({n}, \"text\") // note",
+           "\treturn nil", "}}"],
+    "rust": ["fn handler_{n}(name: &str) -> Option<u32> {{", "    let value = compute({n}, \"text\"); // note",
+             "    Some(value)", "}}"],
+}
+
+# Multi-line constructs that hold quotes and comment markers, per language
+NESTED = {
+    "python": ['s = """open {n} \'quoted\' # not a comment', '  "still" inside \\""" escaped', 'closed"""  # done'],
+    "javascript": ["/* open {n} 'quoted' // not a comment", '   "still" inside', "*/ const x = 'a /* b */';"],
+    "cpp": ["/* open {n} 'quoted' // not a comment", '   "still" inside', "*/ auto x = \"a /* b */\";"],
+    "sql": ["/* open {n} 'quoted' -- not a comment", "   still inside", "*/ SELECT '/* x */' FROM t;"],
+    "go": ["s := `open {n} \"quoted\" // not a comment", "  still inside", "` /* c {n} */"],
+    "rust": ["let s = \"open {n} 'quoted' // not a comment", "  still inside \\\" escaped", "\"; /* c */"],
+    "markdown": ["```python", "# not a heading {n} **not bold**", "```", "<!-- open {n}", "still -->"],
+}
+
+# Real-world files in this repository, per language
+REAL_FILES = {
+    "python": ("core", ".py"),
+    "json": ("core/grammars", ".json"),
+    "markdown": (".", ".md"),
+}
+
+
+def make_corpus(language, corpus, blocks):
+    """Build a list of lines for one corpus, or None if the language has none of that kind."""
+    snippets = SNIPPETS.get(language, ["{n}"])
+    if corpus == "short":
+        return [snippets[n % len(snippets)].format(n=n) for n in range(blocks)]
+    if corpus == "long":
+        lines = []
+        for n in range(blocks):
+            line = ""
+            while len(line) < LONG_LINE:
+                line += snippets[(n + len(line)) % len(snippets)].format(n=n) + " "
+            lines.append(line)
+        return lines
+    if corpus == "nested":
+        if language not in NESTED:
+            return None
+        group = NESTED[language]
+        return [group[n % len(group)].format(n=n // len(group)) for n in range(blocks)]
+    if corpus == "repetitive":
+        return [snippets[0].format(n=0)] * blocks
+    if corpus == "real":
+        if language not in REAL_FILES:
+            return None
+        directory, suffix = REAL_FILES[language]
+        lines = []
+        for root, _, files in os.walk(os.path.join(REPOSITORY, directory)):
+            for name in sorted(files):
+                if name.endswith(suffix):
+                    with open(os.path.join(root, name), "r", encoding="utf-8") as f:
+                        lines.extend(f.read().splitlines())
+        if not lines:
+            return None
+        # Repeat the files up to the corpus size
+        return [lines[n % len(lines)] for n in range(max(blocks, len(lines)))]
+    raise ValueError(f"Unknown corpus {corpus}")
+
+
+def make_document(lines):
+    """Create a document laid out as in the editor."""
+    document = QTextDocument()
+    document.setDocumentLayout(QPlainTextDocumentLayout(document))
+    document.setPlainText("\n".join(lines))
+    return document
+
+
+def full_pass(highlighter):
+    """Highlight the whole document from a cold line cache."""
+    get_token_cache().clear()
+    highlighter.rehighlight()
+
+
+def keystrokes(document):
+    """Type and delete a character in KEYSTROKES blocks spread over the document; returns seconds per keystroke."""
+    count = document.blockCount()
+    timings = []
+    for index in range(KEYSTROKES):
+        block = document.findBlockByNumber((index * 7919) % count)
+        cursor = QTextCursor(block)
+        cursor.movePosition(QTextCursor.EndOfBlock)
+        start = time.perf_counter()
+        cursor.insertText("x")
+        timings.append(time.perf_counter() - start)
+        cursor.deletePreviousChar()
+    timings.sort()
+    return timings[len(timings) // 2]
+
+
+def bench_case(language, corpus, lines):
+    """Blocks/s, microseconds per keystroke and peak heap for one language and corpus."""
+    document = make_document(lines)
+    highlighter = SyntaxHighlighter(document, language)
+    highlighter.rehighlight()  # Warm up: grammar loading and format creation
+
+    blocks_s = document.blockCount() / time_best(full_pass, highlighter)
+
+    peak = measure_peak(full_pass, highlighter)
+    cache_bytes = get_token_cache().stats()["bytes"]
+
+    keystroke_us = keystrokes(document) * 1e6
+    highlighter.setDocument(None)
+    return {
+        "language": language,
+        "corpus": corpus,
+        "blocks": document.blockCount(),
+        "blocks_s": round(blocks_s, 1),
+        "keystroke_us": round(keystroke_us, 1),
+        "peak_bytes": peak,
+        "cache_bytes": cache_bytes,
+    }
+
+
+def compare(results, baseline, tolerance):
+    """
+    Compare a run against a baseline run.
+
+    Returns:
+        List of human-readable regressions (empty if none)
+    """
+    return compare_cases(results, baseline, ("language", "corpus", "blocks"), {
+        "blocks_s": (True, 0.0),
+        "keystroke_us": (False, 0.0),
+        "peak_bytes": (False, PEAK_SLACK),
+    }, tolerance)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--blocks", type=int, default=20000, help="Lines per corpus (default 20000)")
+    parser.add_argument("--languages", help="Comma-separated subset of languages (default all)")
+    parser.add_argument("--corpora", default=",".join(CORPORA), help="Comma-separated corpora (default all)")
+    add_baseline_arguments(parser, "highlighting")
+    args = parser.parse_args()
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    languages = args.languages.split(",") if args.languages else sorted(available_grammars())
+
+    results = {
+        "host": f"{platform.node()}/{platform.machine()}",
+        "python": platform.python_version(),
+        "qt": QT_VERSION_STR,
+        "cases": [],
+    }
+    print(f"{'Language':<12}{'Corpus':<12}{'Blocks':>8}{'Blocks/s':>11}{'us/key':>9}{'Peak KB':>9}{'Cache KB':>10}")
+
+    for language in languages:
+        for corpus in args.corpora.split(","):
+            lines = make_corpus(language, corpus, args.blocks)
+            if lines is None:
+                continue
+            case = bench_case(language, corpus, lines)
+            results["cases"].append(case)
+            print(f"{language:<12}{corpus:<12}{case['blocks']:>8}{case['blocks_s']:>11.0f}"
+                  f"{case['keystroke_us']:>9.0f}{case['peak_bytes'] // 1024:>9}{case['cache_bytes'] // 1024:>10}")
+
+    return finish(results, args, compare)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
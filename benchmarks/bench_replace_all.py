@@ -0,0 +1,144 @@
+"""
+Replace All benchmark.
+
+Replaces a word that occurs three times on each of N lines (about a million
+matches for the default N) the way the Find and Replace dialog does, in a
+bare QPlainTextEdit, in the TextEditor and in the TextEditor with Python
+highlighting, then measures:
+
+- the time Replace All blocks the GUI thread, restoring the cursor included;
+- how long the editor's indexes and highlighter then take to catch up in
+  the background, and the longest event loop turn while they do.
+
+Results are printed as a table and checked against
+benchmarks/baselines/replace_all.json (see bench_common).
+
+Usage:
+    python benchmarks/bench_replace_all.py [--lines 333334] [--output results.json]
+    python benchmarks/bench_replace_all.py --baseline results.json [--tolerance 0.25]
+    python benchmarks/bench_replace_all.py --output benchmarks/baselines/replace_all.json
+"""
+
+import argparse
+import os
+import platform
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtCore import QT_VERSION_STR
+from PyQt5.QtWidgets import QApplication, QPlainTextEdit
+
+from bench_common import add_baseline_arguments, compare_cases, finish
+from core.search_engine import replace_all
+from core.text_editor import TextEditor
+
+EDITORS = ["plain", "editor", "highlighted"]
+LINE = "foo bar foo baz foo"
+TURN_SLACK = 20.0  # Milliseconds the longest turn may grow by on top of the tolerance
+
+
+def make_editor(kind, lines):
+    """Create and show an editor of a kind holding the benchmark text."""
+    editor = QPlainTextEdit() if kind == "plain" else TextEditor()
+    editor.resize(800, 600)
+    editor.show()
+    if kind == "highlighted":
+        editor.enable_syntax_highlighting("python")
+    editor.setPlainText((LINE + "\n") * lines)
+    return editor
+
+
+def is_idle(editor):
+    """Check if an editor's background indexing and highlighting are done."""
+    if not isinstance(editor, TextEditor):
+        return True
+    highlighter = editor.syntax_highlighter
+    return not editor.bracket_index._build_timer.isActive() \
+        and editor.word_index.count("foo") is not None \
+        and (highlighter is None or highlighter.is_fully_highlighted())
+
+
+def settle(app, editor):
+    """Run the event loop until the editor is idle; returns (seconds, longest turn in seconds)."""
+    start = time.perf_counter()
+    longest = 0.0
+    while True:
+        turn = time.perf_counter()
+        app.processEvents()
+        longest = max(longest, time.perf_counter() - turn)
+        if is_idle(editor):
+            return time.perf_counter() - start, longest
+
+
+def bench_case(app, kind, lines):
+    """Replace All timings for one kind of editor."""
+    editor = make_editor(kind, lines)
+    settle(app, editor)
+    cursor = editor.textCursor()
+    cursor.setPosition(editor.document().characterCount() // 2)
+    editor.setTextCursor(cursor)
+    settle(app, editor)
+
+    # As NotepadWindow.replace_all_text does
+    start = time.perf_counter()
+    position = editor.textCursor().position()
+    if isinstance(editor, TextEditor):
+        editor.clear_highlights()
+    matches = replace_all(editor.document(), "foo", "quux")
+    cursor = editor.textCursor()
+    cursor.setPosition(min(position, editor.document().characterCount() - 1))
+    editor.setTextCursor(cursor)
+    replace_s = time.perf_counter() - start
+
+    settle_s, longest = settle(app, editor)
+    editor.close()
+    editor.deleteLater()
+    app.processEvents()
+    return {
+        "editor": kind,
+        "lines": lines,
+        "matches": matches,
+        "replace_s": round(replace_s, 3),
+        "settle_s": round(settle_s, 3),
+        "longest_turn_ms": round(longest * 1000, 1),
+    }
+
+
+def compare(results, baseline, tolerance):
+    """List the cases in results that regressed against the baseline."""
+    return compare_cases(results, baseline, ("editor", "lines"), {
+        "replace_s": (False, 0.0),
+        "longest_turn_ms": (False, TURN_SLACK),
+    }, tolerance)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=333334, help="Lines of text, three matches each (default 333334)")
+    parser.add_argument("--editors", default=",".join(EDITORS), help="Comma-separated editors (default all)")
+    add_baseline_arguments(parser, "replace_all")
+    args = parser.parse_args()
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    results = {
+        "host": f"{platform.node()}/{platform.machine()}",
+        "python": platform.python_version(),
+        "qt": QT_VERSION_STR,
+        "cases": [],
+    }
+    print(f"{'Editor':<13}{'Lines':>8}{'Matches':>10}{'Replace s':>11}{'Settle s':>10}{'Turn ms':>9}")
+
+    for kind in args.editors.split(","):
+        case = bench_case(app, kind, args.lines)
+        results["cases"].append(case)
+        print(f"{kind:<13}{case['lines']:>8}{case['matches']:>10}{case['replace_s']:>11.2f}"
+              f"{case['settle_s']:>10.2f}{case['longest_turn_ms']:>9.1f}")
+
+    return finish(results, args, compare)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
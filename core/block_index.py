@@ -0,0 +1,78 @@
+"""
+Per-block caches kept in step with a document.
+The editor's indexes each hold one entry per block, computed from the
+block's text, and must follow the document as blocks are inserted, removed
+and edited without recomputing the rest.
+"""
+
+from PyQt5.QtCore import QObject
+
+REVISION = 0  # Every entry is a tuple starting with the revision of the block it was computed from
+UNKNOWN_REVISION = -1  # Never matches, so any change to the block drops the entry
+
+
+class BlockIndex(QObject):
+    """
+    A list with one entry per block of a document, or None where the entry
+    is not computed yet.
+
+    On contentsChange, the entries of blocks whose text changed are dropped
+    and the list is kept aligned with the block numbers as blocks come and
+    go. Changes that leave the text alone, such as the highlighter applying
+    formats, show up as edits that remove and add as many characters as
+    they touch; entries whose block revision is unchanged survive those.
+    Other edits always drop the entries they touch, as clearing the
+    document (setPlainText does) starts the revisions over. Subclasses
+    compute the entries and may react to changes in blocks_changed.
+    """
+
+    def __init__(self, document, parent=None):
+        super().__init__(parent)
+        self.document = document
+        self._blocks = [None] * document.blockCount()
+        document.contentsChange.connect(self._on_contents_change)
+
+    def reset(self):
+        """Drop every entry."""
+        dropped = [entry for entry in self._blocks if entry is not None]
+        self._blocks = [None] * self.document.blockCount()
+        self.blocks_changed(0, len(self._blocks) - 1, dropped)
+
+    def blocks_changed(self, first, last, dropped):
+        """
+        Called after an edit dropped entries.
+
+        Args:
+            first: First block number the edit touched
+            last: Last block number the edit touched, in the new numbering
+            dropped: The entries that were dropped
+        """
+        pass
+
+    def _on_contents_change(self, position, chars_removed, chars_added):
+        """Drop the entries of the blocks an edit touched, keeping the others in place."""
+        document = self.document
+        first_block = document.findBlock(position)
+        first = max(first_block.blockNumber(), 0)
+        last_block = document.findBlock(position + chars_added)
+        last = last_block.blockNumber() if last_block.isValid() else document.blockCount() - 1
+        added_blocks = document.blockCount() - len(self._blocks)
+
+        if added_blocks or chars_removed != chars_added:
+            # The text changed, so every touched entry goes, without visiting the blocks
+            old_last = last - added_blocks
+            dropped = [entry for entry in self._blocks[first:old_last + 1] if entry is not None]
+            self._blocks[first:old_last + 1] = [None] * (last + 1 - first)
+            if len(self._blocks) != document.blockCount():  # Inconsistent change; start over
+                self.reset()
+                return
+        else:
+            dropped = []
+            block = first_block
+            for number in range(first, last + 1):
+                entry = self._blocks[number]
+                if entry is not None and entry[REVISION] != block.revision():
+                    dropped.append(entry)
+                    self._blocks[number] = None
+                block = block.next()
+        self.blocks_changed(first, last, dropped)
@@ -0,0 +1,255 @@
+"""
+Bracket index for bracket matching.
+Keeps a summary of each block's brackets (where they are, how many closing
+brackets it leaves unmatched at its start and opening ones at its end), kept
+current from the document's contentsChange signal. A match is found by
+walking these summaries block by block instead of scanning characters.
+Brackets inside strings and comments, as the highlighter's grammar tokenizes
+them, are left out.
+"""
+
+import bisect
+import re
+import time
+
+from PyQt5.QtCore import QTimer, pyqtSignal
+
+from core.block_index import BlockIndex
+from core.lexer import TOKEN_INDEX, Tokenizer, get_tokenizer, tokenize_cached, utf16_offsets
+
+OPENING = '([{'
+PAIRS = {'(': ')', '[': ']', '{': '}', ')': '(', ']': '[', '}': '{'}
+BRACKET_PATTERN = re.compile(r'[()\[\]{}]')
+IGNORED_TOKENS = frozenset(TOKEN_INDEX[token_type] for token_type in ('string', 'comment'))
+
+# Summary fields: (block revision, start state, end state, bracket chars,
+# bracket columns, unmatched closing brackets, unmatched opening brackets)
+START_STATE, END_STATE, CHARS, COLUMNS, CLOSES, OPENS = range(1, 7)
+
+
+def summarize_brackets(text, spans=()):
+    """
+    Summarize the brackets of a line.
+
+    Args:
+        text: The line
+        spans: Its compact (start, length, token type index) spans, as tokenize_cached returns them
+
+    Returns:
+        Tuple of (bracket chars, their UTF-16 columns, unmatched closing
+        brackets at the start, unmatched opening brackets at the end)
+    """
+    ignored = [(spans[index], spans[index] + spans[index + 1])
+               for index in range(0, len(spans), 3) if spans[index + 2] in IGNORED_TOKENS]
+    offsets = utf16_offsets(text) if ignored or not text.isascii() else None
+
+    chars = []
+    columns = []
+    span = 0
+    for match in BRACKET_PATTERN.finditer(text):
+        column = match.start() if offsets is None else offsets[match.start()]
+        # Spans are in order, so skip those that end before this bracket
+        while span < len(ignored) and ignored[span][1] <= column:
+            span += 1
+        if span < len(ignored) and ignored[span][0] <= column:
+            continue
+        chars.append(match.group())
+        columns.append(column)
+
+    depth = closes = 0
+    for char in chars:
+        if char in OPENING:
+            depth += 1
+        elif depth:
+            depth -= 1
+        else:
+            closes += 1
+    return ''.join(chars), tuple(columns), closes, depth
+
+
+class _Deferred(Exception):
+    """Raised inside find_match when it would summarize more than FIND_BLOCKS blocks."""
+    pass
+
+
+class BracketIndex(BlockIndex):
+    """
+    Per-block bracket summaries of a document.
+
+    Summaries are dropped when their block's text changes (see BlockIndex), and computed
+    again on demand or, top to bottom, in short slices while the event loop
+    is idle. Each one also records the tokenizer state its block started
+    and ended in, so a block is re-summarized when an edit above it opens
+    or closes a multi-line string or comment.
+    """
+
+    SLICE_BUDGET = 0.008  # Seconds of background summarizing per event loop turn
+    SLICE_BLOCKS = 256  # Blocks summarized between deadline checks
+    FIND_BLOCKS = 1000  # Blocks a deferring find_match may summarize itself
+
+    caught_up = pyqtSignal()  # The background has summarized what a deferred find_match needed
+
+    def __init__(self, document, language=None, parent=None):
+        self.language = language
+        self.tokenizer = get_tokenizer(language) if language else None
+        self._checked = 0  # Leading summaries known to chain up state-wise
+        self._limit = None  # First block a deferring find_match may not summarize
+        self._waiting = None  # Block number a deferred find_match needs summarized
+        super().__init__(document, parent)
+
+        self._build_timer = QTimer(self)
+        self._build_timer.setInterval(0)
+        self._build_timer.timeout.connect(self._build_slice)
+
+    def set_language(self, language):
+        """Change the grammar that decides which brackets are in strings or comments."""
+        self.language = language
+        self.tokenizer = get_tokenizer(language) if language else None
+        self.reset()
+
+    def block_brackets(self, number):
+        """
+        Get the brackets of a block outside strings and comments.
+
+        Returns:
+            Tuple of (bracket chars, their columns, unmatched closing brackets
+            at the start, unmatched opening brackets at the end)
+        """
+        return self._summary(number)[CHARS:]
+
+    def find_match(self, position, defer=False):
+        """
+        Find the bracket at a position, or else just before it, and its match.
+
+        Args:
+            position: Document position
+            defer: Give up rather than summarize more than FIND_BLOCKS blocks
+                on the spot; caught_up is emitted once the background has
+                summarized them, so the caller can ask again
+
+        Returns:
+            Tuple of (bracket position, matching bracket position or None if
+            unbalanced, True if the two are of the same kind), or None if
+            there is no bracket there or the search was deferred
+        """
+        if not defer:
+            return self._find_match(position)
+        self._limit = self._checked + self.FIND_BLOCKS
+        try:
+            return self._find_match(position)
+        except _Deferred as deferred:
+            self._waiting = deferred.args[0]
+            self._build_timer.start()
+            return None
+        finally:
+            self._limit = None
+
+    def _find_match(self, position):
+        """Find the bracket at or just before a position and its match (see find_match)."""
+        block = self.document.findBlock(position)
+        if not block.isValid():
+            return None
+        number = block.blockNumber()
+        summary = self._summary(number)
+        columns = summary[COLUMNS]
+        column = position - block.position()
+        index = bisect.bisect_left(columns, column)
+        if index == len(columns) or columns[index] != column:
+            index -= 1
+            if index < 0 or columns[index] != column - 1:
+                return None
+
+        char = summary[CHARS][index]
+        if char in OPENING:
+            found = self._match_forward(number, index)
+        else:
+            found = self._match_backward(number, index)
+        bracket = block.position() + columns[index]
+        if found is None:
+            return bracket, None, False
+        match_number, match_index = found
+        match_summary = self._blocks[match_number]
+        match = self.document.findBlockByNumber(match_number).position() + match_summary[COLUMNS][match_index]
+        return bracket, match, PAIRS[char] == match_summary[CHARS][match_index]
+
+    def _match_forward(self, number, index):
+        """Find the closing bracket for the opening one at summary index; returns (block number, index)."""
+        depth = 0
+        while number < len(self._blocks):
+            summary = self._summary(number)
+            if index or summary[CLOSES] >= depth:
+                # The match is in this block
+                chars = summary[CHARS]
+                for position in range(index, len(chars)):
+                    depth += 1 if chars[position] in OPENING else -1
+                    if depth == 0:
+                        return number, position
+            else:
+                depth += summary[OPENS] - summary[CLOSES]
+            number += 1
+            index = 0
+        return None
+
+    def _match_backward(self, number, index):
+        """Find the opening bracket for the closing one at summary index; returns (block number, index)."""
+        depth = 0
+        summary = self._summary(number)
+        chars = summary[CHARS]
+        for position in range(index, -1, -1):
+            depth += -1 if chars[position] in OPENING else 1
+            if depth == 0:
+                return number, position
+        for number in range(number - 1, -1, -1):
+            summary = self._summary(number)
+            if summary[OPENS] >= depth:
+                chars = summary[CHARS]
+                for position in range(len(chars) - 1, -1, -1):
+                    depth += -1 if chars[position] in OPENING else 1
+                    if depth == 0:
+                        return number, position
+            depth += summary[CLOSES] - summary[OPENS]
+        return None
+
+    def _summary(self, number):
+        """Get the summary of a block, (re)computing it and any stale ones above it first."""
+        blocks = self._blocks
+        if number < self._checked:
+            return blocks[number]
+        if self._limit is not None and number >= self._limit:
+            raise _Deferred(number)
+
+        state = blocks[self._checked - 1][END_STATE] if self._checked else Tokenizer.NORMAL_STATE
+        block = None
+        for current in range(self._checked, number + 1):
+            summary = blocks[current]
+            if summary is None or summary[START_STATE] != state:
+                if block is None or block.blockNumber() != current:
+                    block = self.document.findBlockByNumber(current)
+                text = block.text()
+                if self.tokenizer is not None:
+                    spans, end_state = tokenize_cached(self.language, text, state)
+                else:
+                    spans, end_state = (), state
+                summary = (block.revision(), state, end_state, *summarize_brackets(text, spans))
+                blocks[current] = summary
+                block = block.next()
+            state = summary[END_STATE]
+        self._checked = number + 1
+        return blocks[number]
+
+    def _build_slice(self):
+        """Summarize blocks below the checked ones for up to SLICE_BUDGET seconds."""
+        deadline = time.perf_counter() + self.SLICE_BUDGET
+        while self._checked < len(self._blocks) and time.perf_counter() < deadline:
+            self._summary(min(self._checked + self.SLICE_BLOCKS, len(self._blocks)) - 1)
+        if self._checked >= len(self._blocks):
+            self._build_timer.stop()
+        if self._waiting is not None and (self._checked > self._waiting or self._checked >= len(self._blocks)):
+            self._waiting = None
+            self.caught_up.emit()
+
+    def blocks_changed(self, first, last, dropped):
+        """Recheck the summaries from the first edited block on, in the background."""
+        self._checked = min(self._checked, first)
+        if self._checked < len(self._blocks):
+            self._build_timer.start()
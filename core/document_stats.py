@@ -0,0 +1,262 @@
+"""
+Document statistics for the Statistics panel.
+While the panel is open, the text of every block is kept from the document's
+edits, so taking a snapshot of the document costs a list copy. A worker cuts
+the snapshot into chunks of lines at points picked by the content itself and
+caches each chunk's word frequencies, sentences and line lengths by its
+lines. The totals are kept by adding the chunks that appeared since the last
+run and subtracting those that went away, so after an edit only the chunks
+around it are summarized again.
+"""
+
+import re
+import sys
+import time
+import zlib
+from array import array
+from collections import Counter
+
+from PyQt5.QtCore import QThread, QTimer, pyqtSignal
+
+from core.block_index import BlockIndex
+from core.word_index import WORD_PATTERN
+
+TOP_WORDS = 10
+LINE_LENGTH_BUCKETS = (20, 40, 80, 120)  # Upper bounds; longer lines fall in a last bucket
+SENTENCE_END = re.compile(r'[.!?]+(?=\s|$)')
+
+MIN_CHUNK_CHARS = 8192
+MAX_CHUNK_CHARS = 65536
+CUT_CHARS = 8192  # A line may end a chunk with odds of its length in this many characters
+CUT_THRESHOLD = 2 ** 32 // CUT_CHARS  # Per character, against a CRC-32 of the line
+
+# Block entry fields: (block revision, block text)
+TEXT = 1
+
+# Chunk summary fields: (distinct words, their counts, words, sentences, line length histogram)
+WORD_LIST, WORD_COUNTS, WORDS, SENTENCES, LINE_LENGTHS = range(5)
+
+
+class BlockTexts(BlockIndex):
+    """
+    The text of every block of a document, for taking snapshots of it.
+
+    Blocks touched by small edits are read again at once; after large ones,
+    such as opening a file, the missing blocks are read in short slices
+    while the event loop is idle, and there is no snapshot until then.
+    """
+
+    SLICE_BUDGET = 0.008  # Seconds of background reading per event loop turn
+    EAGER_BLOCKS = 64  # Edits touching up to this many blocks are read at once
+
+    filled = pyqtSignal()  # Every block was read again and a snapshot can be taken
+
+    def __init__(self, document, parent=None):
+        self._build_from = 0  # No block above this one is missing
+        self._complete = False
+        super().__init__(document, parent)
+
+        self._build_timer = QTimer(self)
+        self._build_timer.setInterval(0)
+        self._build_timer.timeout.connect(self._build_slice)
+        self._build_timer.start()
+
+    def snapshot(self):
+        """
+        Get the (revision, text) entries of all blocks; they never change, so any thread may read them.
+
+        Returns:
+            List of entries, or None while blocks are still being read
+        """
+        if not self._complete:
+            return None
+        return list(self._blocks)
+
+    def blocks_changed(self, first, last, dropped):
+        """Read the touched blocks now or in the background."""
+        if last - first < self.EAGER_BLOCKS:
+            block = self.document.findBlockByNumber(first)
+            for number in range(first, last + 1):
+                if self._blocks[number] is None:
+                    self._blocks[number] = (block.revision(), block.text())
+                block = block.next()
+        elif None in self._blocks[first:last + 1]:
+            self._build_from = min(self._build_from, first)
+            self._complete = False
+            self._build_timer.start()
+
+    def _build_slice(self):
+        """Read missing blocks for up to SLICE_BUDGET seconds."""
+        deadline = time.perf_counter() + self.SLICE_BUDGET
+        blocks = self._blocks
+        block = None
+        previous = -2
+        while time.perf_counter() < deadline:
+            try:
+                number = blocks.index(None, self._build_from)
+            except ValueError:
+                self._build_timer.stop()
+                self._complete = True
+                self.filled.emit()
+                return
+            block = block.next() if number == previous + 1 else self.document.findBlockByNumber(number)
+            blocks[number] = (block.revision(), block.text())
+            previous = number
+            self._build_from = number + 1
+
+
+def is_cut_line(line):
+    """Check if a line may end a chunk, going by its content alone (the same in every process)."""
+    data = line.encode('utf-8', 'surrogatepass') + b'\n'
+    return zlib.crc32(data) < len(data) * CUT_THRESHOLD
+
+
+def split_chunks(lines):
+    """
+    Cut lines into chunks that stay the same when the lines around them are edited.
+
+    Lines picked by their own content cut the text into pieces, so the
+    pieces move along with the lines instead of staying at fixed line
+    numbers. A piece shorter than MIN_CHUNK_CHARS joins the one after it,
+    which depends on the piece alone, so past an edit the chunks line up
+    again at the next long piece. Text without cuts is split every
+    MAX_CHUNK_CHARS.
+
+    Returns:
+        List of (first line, line after the last) pairs
+    """
+    bounds = []
+    start = size = piece = 0
+    for index, line in enumerate(lines):
+        size += len(line) + 1
+        piece += len(line) + 1
+        if is_cut_line(line):
+            if piece >= MIN_CHUNK_CHARS and size >= MIN_CHUNK_CHARS:
+                bounds.append((start, index + 1))
+                start, size = index + 1, 0
+            piece = 0
+        elif size >= MAX_CHUNK_CHARS:
+            bounds.append((start, index + 1))
+            start, size = index + 1, 0
+    if start < len(lines) or not bounds:
+        bounds.append((start, len(lines)))
+    return bounds
+
+
+def line_length_bucket(length):
+    """Get the histogram bucket of a line length."""
+    for bucket, bound in enumerate(LINE_LENGTH_BUCKETS):
+        if length < bound:
+            return bucket
+    return len(LINE_LENGTH_BUCKETS)
+
+
+def summarize_chunk(lines):
+    """
+    Summarize one chunk of lines.
+
+    Returns:
+        Tuple of (distinct lowercased words, their counts, number of words,
+        number of sentences, line length histogram)
+    """
+    text = '\n'.join(lines)
+    word_counts = Counter(WORD_PATTERN.findall(text.lower()))
+    words = sum(word_counts.values())
+
+    sentences = len(SENTENCE_END.findall(text))
+    for paragraph in text.split('\n\n'):
+        last_end = max(paragraph.rfind('.'), paragraph.rfind('!'), paragraph.rfind('?')) + 1
+        if WORD_PATTERN.search(paragraph, last_end):
+            sentences += 1  # Paragraph ending without a full stop, such as a heading
+
+    histogram = [0] * (len(LINE_LENGTH_BUCKETS) + 1)
+    for length, count in Counter(map(len, lines)).items():
+        histogram[line_length_bucket(length)] += count
+    # Interned, so chunks share the strings of the words they have in common
+    return tuple(map(sys.intern, word_counts)), array('L', word_counts.values()), words, sentences, histogram
+
+
+class DocumentStats:
+    """
+    Statistics of a text, kept up to date from one snapshot of it to the next.
+
+    Only one thread may update it at a time.
+    """
+
+    def __init__(self):
+        self._summaries = {}  # Chunk lines -> summary, for the chunks of the last text
+        self._chunks = Counter()  # Chunk lines -> occurrences in the last text
+        self._word_counts = Counter()
+        self._words = 0
+        self._sentences = 0
+        self._line_lengths = [0] * (len(LINE_LENGTH_BUCKETS) + 1)
+
+    def update(self, lines):
+        """
+        Bring the statistics up to date with a new snapshot of the lines of the text.
+
+        Returns:
+            Dict with the top words as (word, count) pairs, the number of
+            unique words, the average sentence length in words and the line
+            length histogram
+        """
+        chunks = Counter()
+        for start, end in split_chunks(lines):
+            chunk = lines[start:end]
+            key = tuple(chunk)  # Hashed from the lines' own cached hashes; shares their strings
+            chunks[key] += 1
+            if key not in self._summaries:
+                self._summaries[key] = summarize_chunk(chunk)
+
+        for key in chunks.keys() | self._chunks.keys():
+            change = chunks[key] - self._chunks[key]
+            if change:
+                self._apply(self._summaries[key], change)
+        for key in self._chunks.keys() - chunks.keys():
+            del self._summaries[key]
+        self._chunks = chunks
+        return self.results()
+
+    def results(self):
+        """Get the statistics of the last text, as update returns them."""
+        return {
+            "top_words": self._word_counts.most_common(TOP_WORDS),
+            "unique_words": len(self._word_counts),
+            "sentence_length": self._words / self._sentences if self._sentences else 0.0,
+            "line_lengths": list(self._line_lengths),
+        }
+
+    def _apply(self, summary, times):
+        """Add a chunk summary to the totals, or subtract it for negative times."""
+        word_counts = self._word_counts
+        for word, count in zip(summary[WORD_LIST], summary[WORD_COUNTS]):
+            total = word_counts[word] + count * times
+            if total > 0:
+                word_counts[word] = total
+            else:
+                del word_counts[word]
+        self._words += summary[WORDS] * times
+        self._sentences += summary[SENTENCES] * times
+        for bucket, lines in enumerate(summary[LINE_LENGTHS]):
+            self._line_lengths[bucket] += lines * times
+
+
+class StatisticsWorker(QThread):
+    """
+    Updates a DocumentStats from a BlockTexts snapshot in a worker thread.
+
+    The results are delivered through the ``computed`` signal, queued back
+    to the thread that owns the worker.
+    """
+
+    computed = pyqtSignal(object)
+
+    def __init__(self, stats, snapshot, parent=None):
+        super().__init__(parent)
+        self.stats = stats
+        self.snapshot = snapshot
+
+    def run(self):
+        """Update the statistics and emit the results."""
+        lines = [entry[TEXT] for entry in self.snapshot]
+        self.computed.emit(self.stats.update(lines))
@@ -0,0 +1,178 @@
+"""
+Fold regions for code folding.
+A block starts a region when the lines after it are indented deeper, or
+else when it leaves a bracket open that closes on a later line. Indentation
+is cached per block and bracket structure comes from the BracketIndex, so
+an edit only costs recomputing the blocks it touched.
+"""
+
+from core.block_index import BlockIndex, UNKNOWN_REVISION
+
+TAB_WIDTH = 4
+
+# Entry fields: (block revision, indentation or None if blank)
+INDENT = 1
+
+
+def indentation(text):
+    """Get the width of a line's leading whitespace, or None for a blank line."""
+    stripped = text.lstrip()
+    if not stripped:
+        return None
+    width = len(text) - len(stripped)
+    if '\t' in text[:width]:
+        return len(text[:width].expandtabs(TAB_WIDTH))
+    return width
+
+
+class FoldIndex(BlockIndex):
+    """
+    Per-block indentation of a document, and the fold regions derived from it.
+
+    A region is given by its first block, which stays visible, and the last
+    block that folding it hides. For brackets, the line with the closing
+    bracket stays visible.
+    """
+
+    def __init__(self, document, bracket_index, parent=None):
+        super().__init__(document, parent)
+        self.bracket_index = bracket_index
+
+    def region_end(self, number):
+        """
+        Get the last block hidden by folding the region that starts at a block.
+
+        Returns:
+            The block number, or None if no region starts there
+        """
+        if self._entry(number)[INDENT] is None:
+            return None  # Blank
+        end = self._indent_region_end(number)
+        if end is None and self._leaves_bracket_open(number):
+            end = self._bracket_region_end(number)
+        return end
+
+    def enclosing_region(self, number):
+        """
+        Find the innermost region that starts at or contains a block.
+
+        Returns:
+            Tuple of (first block, last hidden block), or None
+        """
+        limit = None  # Indentation of the nearest non-blank block at or above number
+        for start in range(number, -1, -1):
+            indent = self._entry(start)[INDENT]
+            # Only a block indented less than those below it, or one leaving a bracket open, can start a region
+            if start == number or (indent is not None and (limit is None or indent < limit)) \
+                    or self._leaves_bracket_open(start):
+                end = self.region_end(start)
+                if end is not None and end >= number:
+                    return start, end
+            if indent is not None and (limit is None or indent < limit):
+                limit = indent
+        return None
+
+    def top_level_regions(self):
+        """List the (first block, last hidden block) of every region that is not inside another."""
+        self._fill()
+        # One pass over the indentation; a block ends the scan for deeper blocks of
+        # the region before it and is the next candidate itself (as region_end would find)
+        indents = [entry[INDENT] for entry in self._blocks]
+        count = len(indents)
+        regions = []
+        number = 0
+        while number < count:
+            base = indents[number]
+            if base is None:
+                number += 1
+                continue
+            end = None
+            current = number + 1
+            while current < count:
+                indent = indents[current]
+                if indent is not None:
+                    if indent <= base:
+                        break
+                    end = current
+                current += 1
+            if end is None and self._leaves_bracket_open(number):
+                end = self._bracket_region_end(number)
+            if end is None:
+                number = current  # Blocks up to it are blank
+            else:
+                regions.append((number, end))
+                number = end + 1
+        return regions
+
+    def _indent_region_end(self, number):
+        """Get the last deeper-indented block after a block, ignoring trailing blank lines."""
+        base = self._entry(number)[INDENT]
+        if base is None:
+            return None
+        end = None
+        block = previous = None
+        for current in range(number + 1, len(self._blocks)):
+            entry = self._blocks[current]
+            if entry is None:
+                # Walk the blocks along only while entries are missing
+                block = block.next() if previous == current - 1 else self.document.findBlockByNumber(current)
+                previous = current
+                entry = self._entry(current, block)
+            indent = entry[INDENT]
+            if indent is None:
+                continue
+            if indent <= base:
+                break
+            end = current
+        return end
+
+    def _bracket_region_end(self, number):
+        """Get the block before the one closing the outermost bracket a block leaves open."""
+        chars, columns, _, opens = self.bracket_index.block_brackets(number)
+        if not opens:
+            return None  # All in strings or comments
+        stack = []
+        for index, char in enumerate(chars):
+            if char in '([{':
+                stack.append(index)
+            elif stack:
+                stack.pop()
+        block = self.document.findBlockByNumber(number)
+        found = self.bracket_index.find_match(block.position() + columns[stack[0]])
+        if found is None or found[1] is None:
+            return None
+        end = self.document.findBlock(found[1]).blockNumber() - 1
+        return end if end > number else None
+
+    def _leaves_bracket_open(self, number):
+        """Quickly check if a line has more opening than closing brackets, strings and comments included."""
+        text = self.document.findBlockByNumber(number).text()
+        return text.count('(') + text.count('[') + text.count('{') \
+            > text.count(')') + text.count(']') + text.count('}')
+
+    def _entry(self, number, block=None):
+        """Get the entry of a block, computing it if needed; pass the block if at hand."""
+        entry = self._blocks[number]
+        if entry is None:
+            if block is None:
+                block = self.document.findBlockByNumber(number)
+            entry = (block.revision(), indentation(block.text()))
+            self._blocks[number] = entry
+        return entry
+
+    def _fill(self):
+        """Compute all missing entries at once."""
+        if None not in self._blocks:
+            return
+        # Splitting the whole text is far quicker than visiting every block, but
+        # leaves the revisions unknown
+        lines = self.document.toPlainText().split('\n')
+        if len(lines) == len(self._blocks):
+            self._blocks = [(UNKNOWN_REVISION, indentation(line)) if entry is None else entry
+                            for entry, line in zip(self._blocks, lines)]
+            return
+        # Line separators within blocks
+        for number, entry in enumerate(self._blocks):
+            if entry is None:
+                block = self.document.findBlockByNumber(number)
+                self._blocks[number] = (block.revision(), indentation(block.text()))
@@ -0,0 +1,158 @@
+"""
+Grammar definitions for the lexer.
+Languages are declared in data files under core/grammars (JSON, or TOML where
+tomllib is available) and are only read and compiled when a document needs
+them. The manifest core/grammars/index.json maps each language to its
+label, file extensions and shebang interpreters, so listing languages reads
+no grammar.
+"""
+
+import json
+import os
+import re
+from typing import Dict, List, Optional
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    tomllib = None
+
+
+GRAMMAR_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'grammars')
+GRAMMAR_SUFFIXES = ('.json', '.toml') if tomllib else ('.json',)
+MANIFEST_NAME = 'index.json'
+
+_index = None  # name -> {'path', 'label', 'extensions', 'shebangs'}
+_rules = {}
+
+
+class GrammarError(Exception):
+    """Raised when a grammar file is missing or invalid."""
+    pass
+
+
+def keyword_pattern(keywords):
+    """Combine a keyword list into one word-bounded alternation."""
+    # Longest first, so "char16_t" is not cut short by "char"
+    return r'\b(?:' + '|'.join(sorted(map(re.escape, keywords), key=len, reverse=True)) + r')\b'
+
+
+def available_grammars() -> Dict[str, dict]:
+    """
+    List the grammars on disk without reading them.
+
+    Names come from the file names; labels, extensions and shebangs come from
+    the manifest, core/grammars/index.json. A grammar missing from the
+    manifest is still listed, but is not picked for any file.
+
+    Returns:
+        Dict of language name -> {'path', 'label', 'extensions', 'shebangs'}
+    """
+    global _index
+    if _index is None:
+        manifest_path = os.path.join(GRAMMAR_DIR, MANIFEST_NAME)
+        manifest = _parse(manifest_path, _read(manifest_path)) if os.path.exists(manifest_path) else {}
+        index = {}
+        for file_name in sorted(os.listdir(GRAMMAR_DIR)):
+            name, suffix = os.path.splitext(file_name)
+            if suffix not in GRAMMAR_SUFFIXES or file_name == MANIFEST_NAME:
+                continue
+            info = manifest.get(name, {})
+            index[name] = {
+                'path': os.path.join(GRAMMAR_DIR, file_name),
+                'label': info.get('label', name.title()),
+                'extensions': [extension.lower() for extension in info.get('extensions', [])],
+                'shebangs': list(info.get('shebangs', [])),
+            }
+        _index = index
+    return _index
+
+
+def load_rules(language: str) -> Optional[list]:
+    """
+    Get the compiled rules of a language, as core.lexer.Tokenizer takes them.
+
+    Rules are compiled from the grammar file on first use and kept in memory;
+    a grammar compiles in a few milliseconds, so only languages in use pay.
+
+    Returns:
+        List of (token type, pattern) and (token type, start pattern, end
+        pattern) tuples, or None if there is no grammar for the language
+    """
+    language = language.lower()
+    if language in _rules:
+        return _rules[language]
+    info = available_grammars().get(language)
+    if info is None:
+        return None
+
+    rules = compile_grammar(_parse(info['path'], _read(info['path'])))
+    _rules[language] = rules
+    return rules
+
+
+def compile_grammar(data: dict) -> List[tuple]:
+    """
+    Validate a parsed grammar and expand it into lexer rules.
+
+    Each rule in data['rules'] names a token type and one of:
+    ``match`` (a pattern), ``begin`` and ``end`` (a construct that may span
+    lines) or ``words`` (a keyword list). ``ignore_case`` makes the rule
+    case-insensitive.
+
+    Raises:
+        GrammarError: If a rule is malformed, names an unknown token type or
+            has an invalid pattern
+    """
+    from core.lexer import TOKEN_INDEX
+
+    name = data.get('name', '?')
+    rules = []
+    for position, rule in enumerate(data.get('rules', [])):
+        token_type = rule.get('token')
+        if token_type not in TOKEN_INDEX:
+            raise GrammarError(f"{name} rule {position}: unknown token type {token_type!r}")
+
+        if 'words' in rule:
+            patterns = [keyword_pattern(rule['words'])]
+        elif 'begin' in rule and 'end' in rule:
+            patterns = [rule['begin'], rule['end']]
+        elif 'match' in rule:
+            patterns = [rule['match']]
+        else:
+            raise GrammarError(f"{name} rule {position}: needs 'match', 'words' or 'begin' and 'end'")
+
+        if rule.get('ignore_case'):
+            patterns = [f'(?i:{pattern})' for pattern in patterns]
+        for pattern in patterns:
+            try:
+                compiled = re.compile(pattern)
+            except re.error as e:
+                raise GrammarError(f"{name} rule {position}: {e}")
+            if compiled.groups:
+                # The lexer finds the rule that matched by its named group
+                raise GrammarError(f"{name} rule {position}: use (?:...) instead of capturing groups")
+        rules.append((token_type, *patterns))
+
+    if not rules:
+        raise GrammarError(f"{name}: no rules")
+    return rules
+
+
+def _read(path: str) -> bytes:
+    """Read a grammar file."""
+    try:
+        with open(path, 'rb') as f:
+            return f.read()
+    except OSError as e:
+        raise GrammarError(f"Cannot read grammar {path}: {e}")
+
+
+def _parse(path: str, source: bytes) -> dict:
+    """Parse a grammar file's bytes as JSON or TOML, by its suffix."""
+    try:
+        if path.endswith('.toml'):
+            return tomllib.loads(source.decode('utf-8'))
+        return json.loads(source.decode('utf-8'))
+    except ValueError as e:  # JSONDecodeError, TOMLDecodeError and UnicodeDecodeError
+        raise GrammarError(f"Invalid grammar {path}: {e}")
@@ -0,0 +1,132 @@
+"""
+Language detection for syntax highlighting.
+Picks a document's language from its file extension, then its shebang line
+(both as declared by the grammars in core/grammars), then a quick look at the
+first few KB of its content. Results are cached per path until the file
+changes on disk.
+"""
+
+import os
+import re
+from typing import Optional
+
+from core.grammar import available_grammars
+
+SNIFF_CHARACTERS = 4096  # Only this much of the content is classified
+ENCRYPTED_SUFFIX = '.enc'
+MIN_CONTENT_SCORE = 3
+
+# Per language, (pattern, weight) pairs; each pattern that occurs adds its weight once
+CONTENT_HINTS = {
+    'python': [
+        (r'^\s*def \w+\(.*\)\s*(?:->.*)?:\s*$', 3),
+        (r'^\s*from [\w.]+ import ', 3),
+        (r'^\s*import [\w.]+(?:\s+as\s+\w+)?\s*$', 2),
+        (r'^\s*class \w+(?:\(.*\))?:\s*$', 3),
+        (r'^\s*(?:elif|except)\b.*:\s*$', 2),
+        (r'^\s*if __name__ == ', 3),
+        (r'\bself\.\w+', 1),
+    ],
+    'javascript': [
+        (r'\bfunction\s*\w*\s*\(', 2),
+        (r'^\s*(?:const|let|var)\s+\w+\s*=', 2),
+        (r'=>', 1),
+        (r'\bconsole\.\w+\(', 3),
+        (r'\brequire\(\s*[\'"]', 3),
+        (r'^\s*import\s.*\sfrom\s+[\'"]', 3),
+        (r'^\s*export\s+(?:default|const|function|class)\b', 3),
+    ],
+    'cpp': [
+        (r'^\s*#include\s*[<"]', 3),
+        (r'\bstd::', 3),
+        (r'^\s*(?:int|void)\s+main\s*\(', 3),
+        (r'^\s*(?:template\s*<|namespace\s+\w+|using namespace\b)', 3),
+        (r'\b(?:cout|cin|endl|nullptr)\b', 2),
+    ],
+}
+
+_compiled_hints = {
+    language: [(re.compile(pattern, re.MULTILINE), weight) for pattern, weight in hints]
+    for language, hints in CONTENT_HINTS.items()
+}
+_detected = {}  # path -> ((size, mtime), language)
+
+
+def language_from_extension(file_path: str) -> Optional[str]:
+    """Map a file name to a language, looking through the suffix of encrypted files."""
+    name = os.path.basename(file_path).lower()
+    if name.endswith(ENCRYPTED_SUFFIX):
+        name = name[:-len(ENCRYPTED_SUFFIX)]
+    extension = os.path.splitext(name)[1]
+    if not extension:
+        return None
+    for language, info in available_grammars().items():
+        if extension in info['extensions']:
+            return language
+    return None
+
+
+def language_from_shebang(head: str) -> Optional[str]:
+    """Map a '#!' first line such as '#!/usr/bin/env python3' to a language."""
+    if not head.startswith('#!'):
+        return None
+    words = head[2:].split('\n', 1)[0].split()
+    if not words:
+        return None
+    interpreter = os.path.basename(words[0])
+    if interpreter == 'env':
+        arguments = [word for word in words[1:] if not word.startswith('-') and '=' not in word]
+        if not arguments:
+            return None
+        interpreter = os.path.basename(arguments[0])
+    match = re.match(r'[a-z]+', interpreter)
+    if not match:
+        return None
+    for language, info in available_grammars().items():
+        if match.group(0) in info['shebangs']:
+            return language
+    return None
+
+
+def classify_content(head: str) -> Optional[str]:
+    """Guess the language of a text from telltale constructs; None if nothing stands out."""
+    head = head[:SNIFF_CHARACTERS]
+    best_language, best_score = None, 0
+    for language, hints in _compiled_hints.items():
+        score = sum(weight for pattern, weight in hints if pattern.search(head))
+        if score > best_score:
+            best_language, best_score = language, score
+    return best_language if best_score >= MIN_CONTENT_SCORE else None
+
+
+def detect_language(file_path: str = "", head: str = "") -> Optional[str]:
+    """
+    Detect the highlighting language of a document.
+
+    Args:
+        file_path: Path of the document ("" if it was never saved)
+        head: The start of its content; only the first SNIFF_CHARACTERS are used
+
+    Returns:
+        A language name known to core.lexer, or None for plain text
+    """
+    key = os.path.normcase(os.path.abspath(file_path)) if file_path else None
+    stamp = _file_stamp(file_path) if key else None
+    if stamp is not None:
+        cached = _detected.get(key)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+
+    language = language_from_extension(file_path) or language_from_shebang(head) or classify_content(head)
+    if stamp is not None:
+        _detected[key] = (stamp, language)
+    return language
+
+
+def _file_stamp(file_path: str) -> Optional[tuple]:
+    """Size and modification time of a file, or None if it cannot be read."""
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
@@ -0,0 +1,250 @@
+"""
+Lexer for syntax highlighting.
+A line tokenizer that carries state across lines, built from the rules of a
+grammar in core/grammars. Does not import PyQt5, so it can run on plain text
+snapshots in a worker thread.
+"""
+
+import re
+import sys
+import threading
+from array import array
+from collections import OrderedDict
+
+from core.grammar import load_rules
+
+
+TOKEN_TYPES = (
+    "keyword", "string", "comment", "function", "class", "preprocessor",
+    "number", "type", "property", "heading", "emphasis", "link",
+)
+TOKEN_INDEX = {token_type: index for index, token_type in enumerate(TOKEN_TYPES)}
+
+
+class Tokenizer:
+    """
+    Single-pass tokenizer for one language.
+
+    All rules are combined into one regular expression with a named group
+    per rule, so a line is scanned once no matter how many keywords the
+    language has. Each multi-line rule gets a state number; a line that
+    ends inside such a construct returns its state, and the next line is
+    tokenized starting from it.
+    """
+
+    NORMAL_STATE = 0
+
+    def __init__(self, rules):
+        self.rules = rules
+        self.token_types = {}
+        self.end_patterns = {}  # state -> (token type, compiled end pattern)
+        self.group_states = {}
+
+        groups = []
+        for index, rule in enumerate(rules):
+            group = f'rule{index}'
+            self.token_types[group] = rule[0]
+            if len(rule) == 3:
+                state = len(self.end_patterns) + 1
+                self.end_patterns[state] = (rule[0], re.compile(rule[2]))
+                self.group_states[group] = state
+            groups.append(f'(?P<{group}>{rule[1]})')
+        self.pattern = re.compile('|'.join(groups))
+
+    def tokenize(self, text, state=NORMAL_STATE):
+        """
+        Tokenize a line.
+
+        Args:
+            text: The line
+            state: State the previous line ended in
+
+        Returns:
+            Tuple of ((start, length, token type) spans, state at the end of the line)
+        """
+        spans = []
+        position = 0
+        if state in self.end_patterns:
+            position, state = self._continue(text, 0, 0, state, spans)
+
+        length = len(text)
+        while state == self.NORMAL_STATE and position < length:
+            match = self.pattern.search(text, position)
+            if match is None:
+                break
+            group = match.lastgroup
+            if group in self.group_states:
+                position, state = self._continue(text, match.start(), match.end(), self.group_states[group], spans)
+            else:
+                spans.append((match.start(), match.end() - match.start(), self.token_types[group]))
+                position = max(match.end(), position + 1)
+        return spans, state
+
+    def tokenize_compact(self, text, state=NORMAL_STATE):
+        """
+        Tokenize a line into a flat array of (start, length, token type index)
+        triples, with positions in the UTF-16 units Qt uses.
+
+        Returns:
+            Tuple of (span array, state at the end of the line)
+        """
+        spans, state = self.tokenize(text, state)
+        compact = array('i')
+        offsets = utf16_offsets(text) if spans else None
+        for start, length, token_type in spans:
+            if offsets is not None:
+                start, length = offsets[start], offsets[start + length] - offsets[start]
+            compact.extend((start, length, TOKEN_INDEX[token_type]))
+        return compact, state
+
+    def _continue(self, text, start, position, state, spans):
+        """Extend a multi-line construct from position; returns (new position, state)."""
+        token_type, end_pattern = self.end_patterns[state]
+        end = end_pattern.match(text, position)
+        if end is None:
+            spans.append((start, len(text) - start, token_type))
+            return len(text), state
+        spans.append((start, end.end() - start, token_type))
+        return end.end(), self.NORMAL_STATE
+
+
+class TokenCache:
+    """
+    Bounded LRU cache of tokenized lines.
+
+    Logs, CSVs and generated code repeat the same lines many times; a line
+    tokenizes the same way whenever it starts in the same state, so its
+    spans are looked up by (language, start state, text) instead. The text
+    itself is part of the key (Python caches a string's hash), so two
+    different lines can never share an entry. Entries are evicted least
+    recently used first once their estimated size exceeds max_bytes.
+    Shared between the GUI and the tokenizer thread, hence the lock.
+    """
+
+    ENTRY_OVERHEAD = 120  # Rough bytes per entry for the key tuple, result tuple and dict slot
+    DEFAULT_MAX_BYTES = 8 * 1024 * 1024
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.size = 0  # Estimated bytes held
+        self._entries = OrderedDict()  # key -> (spans, end state, size)
+        self._lock = threading.Lock()
+
+    def get(self, language, state, text):
+        """Get the (spans, end state) of a line, or None."""
+        key = (language, state, text)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return entry[0], entry[1]
+
+    def put(self, language, state, text, spans, end_state):
+        """Store a tokenized line, evicting the least recently used ones beyond the budget."""
+        size = sys.getsizeof(text) + sys.getsizeof(spans) + self.ENTRY_OVERHEAD
+        if size > self.max_bytes // 16:
+            return  # One huge line would flush everything else
+        key = (language, state, text)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= old[2]
+            self._entries[key] = (spans, end_state, size)
+            self.size += size
+            while self.size > self.max_bytes:
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self.size -= evicted_size
+
+    def set_budget(self, max_bytes):
+        """Change the memory budget, evicting at once if it shrank."""
+        with self._lock:
+            self.max_bytes = max_bytes
+            while self.size > self.max_bytes:
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self.size -= evicted_size
+
+    def clear(self):
+        """Drop all entries and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.size = self.hits = self.misses = 0
+
+    def stats(self):
+        """Get hits, misses, hit rate, entries and estimated bytes, for tuning the budget."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': len(self._entries),
+                'bytes': self.size,
+                'max_bytes': self.max_bytes,
+            }
+
+
+_tokenizers = {}
+_token_cache = TokenCache()
+
+
+def get_token_cache():
+    """Get the line token cache shared by all highlighters."""
+    return _token_cache
+
+
+def get_tokenizer(language):
+    """Get the shared tokenizer for a language, or None for plain text."""
+    language = language.lower()
+    if language not in _tokenizers:
+        # Loads and compiles the grammar on first use only
+        rules = load_rules(language)
+        _tokenizers[language] = Tokenizer(rules) if rules is not None else None
+    return _tokenizers[language]
+
+
+def tokenize_cached(language, text, state=Tokenizer.NORMAL_STATE):
+    """
+    Tokenize a line like Tokenizer.tokenize_compact, through the shared TokenCache.
+
+    The returned span array may be shared with other callers and must not be changed.
+    """
+    language = language.lower()
+    cached = _token_cache.get(language, state, text)
+    if cached is not None:
+        return cached
+    spans, end_state = get_tokenizer(language).tokenize_compact(text, state)
+    _token_cache.put(language, state, text, spans, end_state)
+    return spans, end_state
+
+
+def tokenize_lines(language, lines, state=Tokenizer.NORMAL_STATE):
+    """
+    Tokenize consecutive lines, each starting from the state the previous one ended in.
+
+    Returns:
+        One (start state, compact span array, end state) tuple per line
+    """
+    results = []
+    for line in lines:
+        spans, end_state = tokenize_cached(language, line, state)
+        results.append((state, spans, end_state))
+        state = end_state
+    return results
+
+
+def utf16_offsets(text):
+    """
+    Map string indices to the UTF-16 positions Qt uses, or return None when
+    they are the same (no characters outside the Basic Multilingual Plane).
+    """
+    if len(text.encode('utf-16-le')) == 2 * len(text):
+        return None
+    offsets = [0]
+    for char in text:
+        offsets.append(offsets[-1] + (2 if ord(char) > 0xFFFF else 1))
+    return offsets
@@ -2,11 +2,15 @@ import os
 from PyQt5.QtWidgets import QMainWindow, QWidget, QVBoxLayout, QStatusBar, QLabel, QTabWidget, QTextEdit
 from PyQt5.QtCore import QSettings
 
+from core.document_stats import StatisticsWorker
+from core.language_detector import SNIFF_CHARACTERS, detect_language
+from core.search_engine import find_next, is_match, replace_all
 from core.text_editor import TextEditor
 from ui.menu_bar import MenuBar
 from ui.tool_bar import ToolBar
 from ui.status_bar import StatusBar
 from utils.settings_manager import SettingsManager
+from utils.security.crypto_worker import CryptoWorker
 
 
 class DocumentTab(QWidget):
@@ -18,12 +22,23 @@ class DocumentTab(QWidget):
         super().__init__(parent)
         self.file_path = ""
         self.is_modified = False
+        self.language_chosen = False  # Picked by hand, so detection leaves it alone
         self.text_editor = TextEditor()
 
         layout = QVBoxLayout(self)
         layout.setContentsMargins(0, 0, 0, 0)
         layout.addWidget(self.text_editor)
 
+    def update_language(self):
+        """Highlight this tab in the language detected for its file and content."""
+        if self.language_chosen:
+            return
+        language = detect_language(self.file_path, self.text_editor.get_head_text(SNIFF_CHARACTERS))
+        if language is None:
+            self.text_editor.disable_syntax_highlighting()
+        elif language != self.text_editor.get_current_language():
+            self.text_editor.enable_syntax_highlighting(language)
+
 
 class NotepadWindow(QMainWindow):
     """
@@ -145,23 +160,26 @@ class NotepadWindow(QMainWindow):
     def connect_text_editor_signals(self):
         """Connect signals for the current text editor."""
         if self.text_editor:
-            # Disconnect any existing connections first
-            try:
-                self.text_editor.textChanged.disconnect()
-            except:
-                pass
-            try:
-                self.text_editor.cursorPositionChanged.disconnect()
-            except:
-                pass
-            
+            connections = [
+                (self.text_editor.textChanged, self.on_text_changed),
+                (self.text_editor.textChanged, self.status_bar.schedule_counters),
+                (self.text_editor.cursorPositionChanged, self.status_bar.update_cursor_position),
+                (self.text_editor.occurrences_changed, self.update_occurrences),
+            ]
+            # Disconnect our existing connections first, leaving the editor's own
+            for signal, slot in connections:
+                try:
+                    signal.disconnect(slot)
+                except TypeError:
+                    pass
+
             # Connect new signals
-            self.text_editor.textChanged.connect(self.on_text_changed)
-            self.text_editor.textChanged.connect(self.update_counters)
-            self.text_editor.cursorPositionChanged.connect(self.status_bar.update_cursor_position)
+            for signal, slot in connections:
+                signal.connect(slot)
             
             # Update counters immediately
             self.update_counters()
+            self.text_editor.highlight_occurrences()
 
     @property
     def text_editor(self):
@@ -173,9 +191,12 @@ class NotepadWindow(QMainWindow):
 
     def update_counters(self):
         """Update all counter displays in the status bar."""
-        self.status_bar.update_word_count()
-        self.status_bar.update_char_count()
-        self.status_bar.update_line_count()
+        self.status_bar.update_counters()
+
+    def update_occurrences(self, word, count):
+        """Show the occurrence count of the word under the cursor, if it comes from the current tab."""
+        if self.sender() is self.text_editor:
+            self.status_bar.update_occurrences(word, count)
 
     def new_document(self):
         """Create a new document tab."""
@@ -201,6 +222,8 @@ class NotepadWindow(QMainWindow):
                 tab_widget.text_editor.clear_content()
                 tab_widget.is_modified = False
                 tab_widget.file_path = ""
+                tab_widget.language_chosen = False
+                tab_widget.text_editor.disable_syntax_highlighting()
                 self.update_tab_title(index)
 
     def on_tab_changed(self, index):
@@ -261,8 +284,11 @@ class NotepadWindow(QMainWindow):
         """Set the current file path for the current tab."""
         current_tab = self.get_current_tab()
         if current_tab:
+            if file_path != current_tab.file_path:
+                current_tab.language_chosen = False
             current_tab.file_path = file_path
             current_tab.is_modified = False
+            current_tab.update_language()
             self.update_current_tab_title()
             self.update_title()
 
@@ -289,6 +315,61 @@ class NotepadWindow(QMainWindow):
         current_tab = self.get_current_tab()
         return current_tab.is_modified if current_tab else False
 
+    def find_text_advanced(self, text, match_case=False, wrap_around=True):
+        """
+        Select the next occurrence of text after the cursor or selection.
+
+        Returns:
+            True if one was found
+        """
+        editor = self.text_editor
+        if editor is None or not text:
+            return False
+        cursor = find_next(editor.document(), text, editor.textCursor().selectionEnd(), match_case, wrap_around)
+        if cursor is None:
+            self.status_bar.show_message(f'Cannot find "{text}"', 3000)
+            return False
+        editor.setTextCursor(cursor)
+        return True
+
+    def replace_current_selection(self, text, replacement, match_case=False):
+        """
+        Replace the selection if it is an occurrence of text, then select the next one.
+
+        Returns:
+            True if the selection was replaced
+        """
+        editor = self.text_editor
+        if editor is None or not text:
+            return False
+        cursor = editor.textCursor()
+        replaced = cursor.hasSelection() and is_match(cursor.selectedText(), text, match_case)
+        if replaced:
+            cursor.insertText(replacement)
+            editor.setTextCursor(cursor)
+        self.find_text_advanced(text, match_case)
+        return replaced
+
+    def replace_all_text(self, text, replacement, match_case=False):
+        """
+        Replace every occurrence of text as a single edit.
+
+        Returns:
+            The number of replacements
+        """
+        editor = self.text_editor
+        if editor is None or not text:
+            return 0
+        position = editor.textCursor().position()
+        editor.clear_highlights()
+        count = replace_all(editor.document(), text, replacement, match_case)
+        if count:
+            # Keep the cursor where it was rather than at the end of the replaced span
+            cursor = editor.textCursor()
+            cursor.setPosition(min(position, editor.document().characterCount() - 1))
+            editor.setTextCursor(cursor)
+        return count
+
     def open_recent_file(self, file_path):
         """Open a file from the recent files list."""
         try:
@@ -318,5 +399,10 @@ class NotepadWindow(QMainWindow):
 
     def closeEvent(self, event):
         """Handle application close event."""
+        # Let in-flight encrypted saves finish writing before tearing down
+        for worker in self.findChildren(CryptoWorker):
+            worker.wait()
+        for worker in self.findChildren(StatisticsWorker):
+            worker.wait()
         self.save_settings()
         event.accept()
\ No newline at end of file
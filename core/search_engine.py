@@ -0,0 +1,278 @@
+"""
+Search engine behind Find and Replace.
+Finding goes through QTextDocument.find. Replace All scans the text once,
+builds the replaced text in one buffer and applies it as a single edit
+spanning the first to the last match, so it is one undo step and one change
+for the highlighter, the block indexes and the status bar to handle.
+While typing a query, only the matches in view are looked up at once; the
+total is counted in short slices of the event loop, a chunk of the text at
+a time, and counting starts over whenever the query or the text changes.
+"""
+
+import bisect
+import re
+import time
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+from PyQt5.QtGui import QTextCursor, QTextDocument
+
+from core.lexer import utf16_offsets
+
+LONG_LINE = 10000  # Characters beyond which only the part of a line in a range is searched
+
+
+def find_flags(match_case=False, backward=False):
+    """Get the QTextDocument find flags for the search options."""
+    flags = QTextDocument.FindFlags()
+    if match_case:
+        flags |= QTextDocument.FindCaseSensitively
+    if backward:
+        flags |= QTextDocument.FindBackward
+    return flags
+
+
+def compile_query(query, match_case=False):
+    """Compile a literal query into a regular expression."""
+    return re.compile(re.escape(query), 0 if match_case else re.IGNORECASE)
+
+
+def find_next(document, query, position, match_case=False, wrap_around=True, backward=False):
+    """
+    Find the next occurrence of a query from a position.
+
+    Returns:
+        QTextCursor selecting the match, or None
+    """
+    if not query:
+        return None
+    flags = find_flags(match_case, backward)
+    cursor = document.find(query, position, flags)
+    if cursor.isNull() and wrap_around:
+        cursor = document.find(query, document.characterCount() - 1 if backward else 0, flags)
+    return None if cursor.isNull() else cursor
+
+
+def is_match(text, query, match_case=False):
+    """Check if a text, such as the selection, is exactly one occurrence of a query."""
+    return compile_query(query, match_case).fullmatch(text) is not None
+
+
+def utf16_length(text):
+    """Get the length of a text in UTF-16 code units, as document positions count."""
+    return len(text) if text.isascii() else len(text.encode('utf-16-le')) // 2
+
+
+def find_in_range(document, query, start, end, match_case=False):
+    """
+    Find the occurrences of a query that overlap a range of the document, such as the visible part.
+
+    Returns:
+        List of (start, end) positions of the occurrences
+    """
+    if not query:
+        return []
+    pattern = compile_query(query, match_case)
+    spans = []
+    block = document.findBlock(start)
+    while block.isValid() and block.position() <= end:
+        text = block.text()
+        offsets = utf16_offsets(text) if not text.isascii() else None
+        position = block.position()
+        first_index, last_index = 0, len(text)
+        if len(text) > LONG_LINE:
+            # Only the part in range; occurrences that overlap each other may be picked differently
+            first_index = max(to_index(offsets, start - position) - len(query) + 1, 0)
+            last_index = to_index(offsets, end - position) + len(query)
+        for match in pattern.finditer(text, first_index, last_index):
+            first, last = match.span()
+            if offsets is not None:
+                first, last = offsets[first], offsets[last]
+            if position + last > start and position + first < end:
+                spans.append((position + first, position + last))
+        block = block.next()
+    return spans
+
+
+def to_index(offsets, column):
+    """Get the string index of the character at a UTF-16 column, given the line's utf16_offsets."""
+    if offsets is None or column <= 0:
+        return max(column, 0)
+    return bisect.bisect_right(offsets, column) - 1
+
+
+def replace_all(document, query, replacement, match_case=False):
+    """
+    Replace every occurrence of a query in one pass and one undo step.
+
+    Returns:
+        The number of replacements
+    """
+    if not query:
+        return 0
+    cursor = QTextCursor(document)
+    cursor.select(QTextCursor.Document)
+    text = cursor.selectedText()  # Unlike toPlainText, keeps non-breaking spaces as they are
+
+    pattern = compile_query(query, match_case)
+    first = pattern.search(text)
+    if first is None:
+        return 0
+    last = first
+    for last in pattern.finditer(text, first.end()):
+        pass
+    start, end = first.start(), last.end()
+    replaced, count = pattern.subn(replacement.replace('\\', '\\\\'), text[start:end])
+
+    # Only the span from the first to the last match is edited
+    start_position = utf16_length(text[:start])
+    cursor.setPosition(start_position)
+    cursor.setPosition(start_position + utf16_length(text[start:end]), QTextCursor.KeepAnchor)
+    cursor.beginEditBlock()
+    cursor.insertText(replaced)
+    cursor.endEditBlock()
+    return count
+
+
+class MatchCounter(QObject):
+    """
+    Counts the occurrences of a query in a document while the event loop is idle.
+
+    The text is read a chunk of whole lines at a time, so no occurrence is
+    split; a line longer than a chunk is read once and counted piece by
+    piece. Starting a new count cancels the running one, and an edit to the
+    document restarts it.
+    """
+
+    SLICE_BUDGET = 0.008  # Seconds of counting per event loop turn
+    CHUNK_SIZE = 1 << 16  # Characters of text counted at a time
+
+    counted = pyqtSignal(int)  # Total occurrences, once all the text is counted
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.document = None
+        self._query = ""
+        self._match_case = False
+        self._pattern = None
+        self._overlapping = False  # Occurrences of the query may overlap
+        self._revision = None  # Document revision being counted
+        self._position = 0  # Start of the next line to count
+        self._line = None  # Text of the long line being counted piece by piece
+        self._line_offset = 0  # Where in it to go on from
+        self._count = 0
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(0)
+        self._timer.timeout.connect(self._count_slice)
+
+    def is_counting(self):
+        """Check if a count is in progress."""
+        return self._timer.isActive()
+
+    def start(self, document, query, match_case=False):
+        """Count the occurrences of a query in a document, cancelling any count in progress."""
+        self.cancel()
+        if not query:
+            return
+        self.document = document
+        self._query = query
+        self._match_case = match_case
+        self._pattern = compile_query(query, match_case)
+        folded = query if match_case else query.lower()
+        self._overlapping = not (match_case or query.isascii()) \
+            or any(folded[:size] == folded[-size:] for size in range(1, len(folded)))
+        document.contentsChange.connect(self._on_contents_change)
+        document.destroyed.connect(self._on_document_destroyed)
+        self._restart()
+
+    def cancel(self):
+        """Stop counting and let go of the document."""
+        self._timer.stop()
+        self._line = None
+        if self.document is not None:
+            self.document.contentsChange.disconnect(self._on_contents_change)
+            self.document.destroyed.disconnect(self._on_document_destroyed)
+            self.document = None
+
+    def _restart(self):
+        """Count again from the top of the document."""
+        self._revision = self.document.revision()
+        self._position = 0
+        self._line = None
+        self._count = 0
+        self._timer.start()
+
+    def _on_document_destroyed(self):
+        """Stop counting a document that went away, such as with its tab."""
+        self._timer.stop()
+        self._line = None
+        self.document = None
+
+    def _on_contents_change(self, position, chars_removed, chars_added):
+        """Count again after an edit; the highlighter applying formats leaves the revision alone."""
+        if self.document.revision() != self._revision:
+            self._restart()
+
+    def _count_slice(self):
+        """Count chunks of the text for up to SLICE_BUDGET seconds."""
+        deadline = time.perf_counter() + self.SLICE_BUDGET
+        document = self.document
+        end = document.characterCount() - 1
+        chunk_size = max(self.CHUNK_SIZE, 2 * len(self._query))
+        cursor = QTextCursor(document)
+        while time.perf_counter() < deadline:
+            if self._position >= end:
+                self._timer.stop()
+                self.counted.emit(self._count)
+                return
+            block = document.findBlock(self._position)
+            if block.length() > chunk_size:
+                # Moving a cursor within a long line lays it out, so it is read as a string
+                if self._line is None:
+                    self._line = block.text()
+                    self._line_offset = 0
+                if self._count_line_piece(chunk_size):
+                    self._line = None
+                    self._position = block.position() + block.length()
+                continue
+            cut = min(self._position + chunk_size, end)
+            if cut < end:
+                cut = document.findBlock(cut).position()
+            cursor.setPosition(self._position)
+            cursor.setPosition(cut, QTextCursor.KeepAnchor)
+            self._count += self._count_text(cursor.selectedText())
+            self._position = cut
+
+    def _count_line_piece(self, size):
+        """
+        Count the next piece of the long line.
+
+        Returns:
+            True if the line is done
+        """
+        start = self._line_offset
+        piece = self._line[start:start + size]
+        if start + size >= len(self._line):
+            self._count += self._count_text(piece)
+            return True
+        if self._overlapping:
+            # Go on from the last occurrence, or early enough to catch one the cut splits
+            last_end = 0
+            for match in self._pattern.finditer(piece):
+                self._count += 1
+                last_end = match.end()
+            self._line_offset = start + max(last_end, size - len(self._query) + 1)
+        else:
+            # Occurrences that cannot overlap are all counted, so going on just early enough
+            # catches one the cut splits
+            self._count += self._count_text(piece)
+            self._line_offset = start + size - len(self._query) + 1
+        return False
+
+    def _count_text(self, text):
+        """Count the occurrences in a chunk of text, using str.count where it gives the same result."""
+        if self._match_case:
+            return text.count(self._query)
+        if text.isascii() and self._query.isascii():
+            return text.lower().count(self._query.lower())
+        return sum(1 for _ in self._pattern.finditer(text))
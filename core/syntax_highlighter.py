@@ -1,169 +1,348 @@
-from PyQt5.QtGui import QSyntaxHighlighter, QTextCharFormat, QFont, QColor
-from PyQt5.QtCore import QRegExp
+import time
+
+from PyQt5.QtCore import QThread, QTimer, pyqtSignal
+from PyQt5.QtGui import QSyntaxHighlighter, QTextBlockUserData, QTextCharFormat, QFont, QColor, QTextCursor
+
+from core.lexer import TOKEN_TYPES, Tokenizer, get_tokenizer, tokenize_cached, tokenize_lines
+
+
+_formats = {}
+
+
+def get_format(token_type):
+    """Get the shared character format for a token type."""
+    if not _formats:
+        styles = {
+            "keyword": ("#0000FF", True, False),  # Blue
+            "string": ("#008000", False, False),  # Green
+            "comment": ("#808080", False, True),  # Gray
+            "function": ("#800080", True, False),  # Purple
+            "class": ("#FF8000", True, False),  # Orange
+            "preprocessor": ("#FF0000", False, False),  # Red
+            "number": ("#098658", False, False),  # Teal
+            "type": ("#267F99", False, False),  # Steel blue
+            "property": ("#A31515", False, False),  # Dark red
+            "heading": ("#0000FF", True, False),  # Blue
+            "emphasis": ("#000000", True, False),  # Black
+            "link": ("#0066CC", False, True),  # Light blue
+        }
+        for name, (color, bold, italic) in styles.items():
+            text_format = QTextCharFormat()
+            text_format.setForeground(QColor(color))
+            if bold:
+                text_format.setFontWeight(QFont.Bold)
+            text_format.setFontItalic(italic)
+            _formats[name] = text_format
+    return _formats[token_type]
+
+
+class BlockSpans(QTextBlockUserData):
+    """Spans tokenized off the GUI thread, valid while the block's revision and start state match."""
+
+    def __init__(self, revision, start_state, spans, end_state):
+        super().__init__()
+        self.revision = revision
+        self.start_state = start_state
+        self.spans = spans
+        self.end_state = end_state
+
+
+class TokenizerThread(QThread):
+    """
+    Tokenizes a snapshot of consecutive block texts in a worker thread.
+
+    The result, (first block number, texts, tokenize_lines() output), is
+    delivered through the ``tokenized`` signal, queued back to the thread
+    that owns the worker.
+    """
+
+    tokenized = pyqtSignal(object)
+
+    def __init__(self, language, first_number, texts, state, parent=None):
+        super().__init__(parent)
+        self.language = language
+        self.first_number = first_number
+        self.texts = texts
+        self.state = state
+
+    def run(self):
+        """Tokenize the snapshot and emit the spans."""
+        results = tokenize_lines(self.language, self.texts, self.state)
+        self.tokenized.emit((self.first_number, self.texts, results))
 
 
 class SyntaxHighlighter(QSyntaxHighlighter):
     """
     Syntax highlighter for various programming languages.
+
+    Given the editor showing the document, large documents are highlighted
+    lazily: the visible blocks first, then the rest from top to bottom in
+    short slices while the event loop is idle. Blocks above the frontier of
+    that background pass, and the visible ones, are highlighted as usual on
+    every edit; the others are left for the background pass to reach.
+
+    Ahead of the frontier, a worker thread tokenizes snapshots of the block
+    texts and attaches the spans to the blocks as BlockSpans, so the
+    background pass mostly just applies formats. Spans whose block was
+    edited, or whose start state no longer matches, are ignored and the
+    block is tokenized on the spot.
     """
 
-    def __init__(self, parent=None, language="python"):
+    LAZY_MIN_CHARACTERS = 100000  # Smaller documents are highlighted in one go
+    SLICE_BUDGET = 0.008  # Seconds of background highlighting per event loop turn
+    RESUME_STATE = -2  # Marks the next block for the background pass
+    CHUNK_BLOCKS = 2000  # Blocks per worker snapshot
+    READ_AHEAD_CHUNKS = 2  # Snapshots the worker may be ahead of the frontier
+
+    def __init__(self, parent=None, language="python", editor=None):
         super().__init__(parent)
         self.language = language
+        self.tokenizer = None
         self.highlighting_rules = []
+        self.editor = editor
+        self._frontier = None  # Cursor at the first block the background pass has not reached
+        self._visible = (-1, -1)  # First and last visible block numbers
+        self._deadline = None  # End of the current background slice
+        self._slice_timer = None
+        self._updating_viewport = False
+        self._requested = None  # Cursor at the first block not yet sent to the worker
+        self._requested_state = Tokenizer.NORMAL_STATE  # State the last snapshot ended in
+        self._worker = None
+        self._generation = 0  # Bumped when the pass restarts, to drop stale snapshots
+        self._worker_generation = 0
+        self._skip_blocks = 0  # Blocks of a large change that Qt is about to reformat, all left for the background pass
 
         self.setup_highlighting_rules()
 
-    def setup_highlighting_rules(self):
-        """Setup highlighting rules based on language."""
-        if self.language.lower() == "python":
-            self.setup_python_highlighting()
-        elif self.language.lower() == "javascript":
-            self.setup_javascript_highlighting()
-        elif self.language.lower() == "cpp":
-            self.setup_cpp_highlighting()
-        else:
-            # Plain text - no highlighting
-            self.highlighting_rules = []
+        if editor is not None:
+            document = self.document()
+            # Reconnect so _on_contents_change sees edits before QSyntaxHighlighter does
+            self.setDocument(None)
+            document.contentsChange.connect(self._on_contents_change)
+            self.setDocument(document)
+            document.contentsChanged.connect(self._on_contents_changed)
 
-    def setup_python_highlighting(self):
-        """Setup Python syntax highlighting rules."""
-        self.highlighting_rules = []
+            self._slice_timer = QTimer(self)
+            self._slice_timer.setInterval(0)
+            self._slice_timer.timeout.connect(self._highlight_slice)
+            editor.updateRequest.connect(self._update_viewport)
+            if document.characterCount() >= self.LAZY_MIN_CHARACTERS:
+                self._start_lazy_pass(0)
 
-        # Keywords
-        keyword_format = QTextCharFormat()
-        keyword_format.setForeground(QColor("#0000FF"))  # Blue
-        keyword_format.setFontWeight(QFont.Bold)
-        keywords = [
-            "and", "as", "assert", "break", "class", "continue", "def",
-            "del", "elif", "else", "except", "False", "finally", "for",
-            "from", "global", "if", "import", "in", "is", "lambda", "None",
-            "nonlocal", "not", "or", "pass", "raise", "return", "True",
-            "try", "while", "with", "yield"
-        ]
-        for keyword in keywords:
-            pattern = QRegExp(r'\b' + keyword + r'\b')
-            self.highlighting_rules.append((pattern, keyword_format))
-
-        # Strings
-        string_format = QTextCharFormat()
-        string_format.setForeground(QColor("#008000"))  # Green
-        self.highlighting_rules.append((QRegExp(r'".*"'), string_format))
-        self.highlighting_rules.append((QRegExp(r"'.*'"), string_format))
-
-        # Comments
-        comment_format = QTextCharFormat()
-        comment_format.setForeground(QColor("#808080"))  # Gray
-        comment_format.setFontItalic(True)
-        self.highlighting_rules.append((QRegExp(r'#.*'), comment_format))
-
-        # Functions
-        function_format = QTextCharFormat()
-        function_format.setForeground(QColor("#800080"))  # Purple
-        function_format.setFontWeight(QFont.Bold)
-        self.highlighting_rules.append((QRegExp(r'\bdef\s+(\w+)'), function_format))
-
-        # Classes
-        class_format = QTextCharFormat()
-        class_format.setForeground(QColor("#FF8000"))  # Orange
-        class_format.setFontWeight(QFont.Bold)
-        self.highlighting_rules.append((QRegExp(r'\bclass\s+(\w+)'), class_format))
-
-    def setup_javascript_highlighting(self):
-        """Setup JavaScript syntax highlighting rules."""
-        self.highlighting_rules = []
+    def setup_highlighting_rules(self):
+        """Setup highlighting rules based on language."""
+        self.tokenizer = get_tokenizer(self.language)
+        # Plain text has no tokenizer and no rules
+        self.highlighting_rules = self.tokenizer.rules if self.tokenizer else []
 
-        # Keywords
-        keyword_format = QTextCharFormat()
-        keyword_format.setForeground(QColor("#0000FF"))  # Blue
-        keyword_format.setFontWeight(QFont.Bold)
-        keywords = [
-            "break", "case", "catch", "class", "const", "continue", "debugger",
-            "default", "delete", "do", "else", "export", "extends", "false",
-            "finally", "for", "function", "if", "import", "in", "instanceof",
-            "let", "new", "null", "return", "super", "switch", "this", "throw",
-            "true", "try", "typeof", "var", "void", "while", "with", "yield"
-        ]
-        for keyword in keywords:
-            pattern = QRegExp(r'\b' + keyword + r'\b')
-            self.highlighting_rules.append((pattern, keyword_format))
-
-        # Strings
-        string_format = QTextCharFormat()
-        string_format.setForeground(QColor("#008000"))  # Green
-        self.highlighting_rules.append((QRegExp(r'".*"'), string_format))
-        self.highlighting_rules.append((QRegExp(r"'.*'"), string_format))
-
-        # Comments
-        comment_format = QTextCharFormat()
-        comment_format.setForeground(QColor("#808080"))  # Gray
-        comment_format.setFontItalic(True)
-        self.highlighting_rules.append((QRegExp(r'//.*'), comment_format))
-        self.highlighting_rules.append((QRegExp(r'/\*.*\*/'), comment_format))
-
-        # Functions
-        function_format = QTextCharFormat()
-        function_format.setForeground(QColor("#800080"))  # Purple
-        function_format.setFontWeight(QFont.Bold)
-        self.highlighting_rules.append((QRegExp(r'\bfunction\s+(\w+)'), function_format))
-
-    def setup_cpp_highlighting(self):
-        """Setup C++ syntax highlighting rules."""
-        self.highlighting_rules = []
+    def highlightBlock(self, text):
+        """Apply highlighting to a block of text, continuing from the previous block's state."""
+        if self.tokenizer is None:
+            return
+        if self._skip_blocks:
+            self._skip_blocks -= 1
+            return  # Left for the background pass, without asking _is_due block by block
+        if self._frontier is not None and not self._is_due(self.currentBlock()):
+            return  # Left for the background pass
 
-        # Keywords
-        keyword_format = QTextCharFormat()
-        keyword_format.setForeground(QColor("#0000FF"))  # Blue
-        keyword_format.setFontWeight(QFont.Bold)
-        keywords = [
-            "alignas", "alignof", "and", "and_eq", "asm", "auto", "bitand",
-            "bitor", "bool", "break", "case", "catch", "char", "char16_t",
-            "char32_t", "class", "compl", "const", "constexpr", "const_cast",
-            "continue", "decltype", "default", "delete", "do", "double",
-            "dynamic_cast", "else", "enum", "explicit", "export", "extern",
-            "false", "float", "for", "friend", "goto", "if", "inline", "int",
-            "long", "mutable", "namespace", "new", "noexcept", "not", "not_eq",
-            "nullptr", "operator", "or", "or_eq", "private", "protected",
-            "public", "register", "reinterpret_cast", "return", "short",
-            "signed", "sizeof", "static", "static_assert", "static_cast",
-            "struct", "switch", "template", "this", "thread_local", "throw",
-            "true", "try", "typedef", "typeid", "typename", "union", "unsigned",
-            "using", "virtual", "void", "volatile", "wchar_t", "while", "xor", "xor_eq"
-        ]
-        for keyword in keywords:
-            pattern = QRegExp(r'\b' + keyword + r'\b')
-            self.highlighting_rules.append((pattern, keyword_format))
-
-        # Strings
-        string_format = QTextCharFormat()
-        string_format.setForeground(QColor("#008000"))  # Green
-        self.highlighting_rules.append((QRegExp(r'".*"'), string_format))
-        self.highlighting_rules.append((QRegExp(r"'.*'"), string_format))
-
-        # Comments
-        comment_format = QTextCharFormat()
-        comment_format.setForeground(QColor("#808080"))  # Gray
-        comment_format.setFontItalic(True)
-        self.highlighting_rules.append((QRegExp(r'//.*'), comment_format))
-        self.highlighting_rules.append((QRegExp(r'/\*.*\*/'), comment_format))
-
-        # Preprocessor
-        preprocessor_format = QTextCharFormat()
-        preprocessor_format.setForeground(QColor("#FF0000"))  # Red
-        self.highlighting_rules.append((QRegExp(r'#.*'), preprocessor_format))
+        # Qt starts every block at -1 (unknown); treat that as the normal state
+        state = max(self.previousBlockState(), Tokenizer.NORMAL_STATE)
+        cached = self._take_block_spans(state) if self._frontier is not None else None
+        if cached is not None:
+            spans, state = cached
+        else:
+            spans, state = tokenize_cached(self.language, text, state)
+        # Qt moves on to the next block only if this state changed
+        self.setCurrentBlockState(state)
 
-    def highlightBlock(self, text):
-        """Apply highlighting to a block of text."""
-        for pattern, format in self.highlighting_rules:
-            expression = QRegExp(pattern)
-            index = expression.indexIn(text)
-            while index >= 0:
-                length = expression.matchedLength()
-                self.setFormat(index, length, format)
-                index = expression.indexIn(text, index + length)
+        for index in range(0, len(spans), 3):
+            self.setFormat(spans[index], spans[index + 1], get_format(TOKEN_TYPES[spans[index + 2]]))
 
     def set_language(self, language):
         """Change the highlighting language."""
         self.language = language
         self.setup_highlighting_rules()
-        self.rehighlight()
\ No newline at end of file
+        if self.editor is not None and self.document().characterCount() >= self.LAZY_MIN_CHARACTERS:
+            self._start_lazy_pass(0)
+        else:
+            self.rehighlight()
+
+    def is_fully_highlighted(self):
+        """Check if the background pass has reached the end of the document."""
+        return self._frontier is None
+
+    def _take_block_spans(self, state):
+        """Detach the current block's worker spans; returns (spans, end state) if still valid."""
+        data = self.currentBlockUserData()
+        if not isinstance(data, BlockSpans):
+            return None
+        valid = data.revision == self.currentBlock().revision() and data.start_state == state
+        spans, end_state = data.spans, data.end_state
+        self.setCurrentBlockUserData(None)  # Deletes data
+        return (spans, end_state) if valid else None
+
+    def _is_due(self, block):
+        """Check if a block is highlighted now rather than left for the background pass."""
+        position = block.position()
+        if position < self._frontier.position():
+            return True
+        if self._deadline is not None and block.userState() == self.RESUME_STATE \
+                and position == self._frontier.position():
+            self._advance_frontier(block)
+            return True
+        first, last = self._visible
+        return first <= block.blockNumber() <= last
+
+    def _advance_frontier(self, block):
+        """Move the background pass past block, and keep Qt going while there is time left."""
+        next_block = block.next()
+        if not next_block.isValid():
+            self._frontier = None
+            return
+        self._frontier.setPosition(next_block.position())
+        if time.perf_counter() < self._deadline:
+            # Qt carries on to the next block only if this one's state changed; a
+            # state no block ends in guarantees that it does
+            next_block.setUserState(self.RESUME_STATE)
+
+    def _start_lazy_pass(self, position):
+        """(Re)start the background pass at the block containing position."""
+        document = self.document()
+        start = document.findBlock(position).position()
+        if self._frontier is None:
+            self._frontier = QTextCursor(document)
+            self._frontier.setPosition(start)
+        elif start < self._frontier.position():
+            self._frontier.setPosition(start)
+        self._visible = (-1, -1)
+        # Once Qt has handled the current change, start with what is on screen
+        QTimer.singleShot(0, self._update_viewport)
+        self._slice_timer.start()
+
+        self._generation += 1
+        self._requested = QTextCursor(self._frontier)
+        self._requested_state = max(self._frontier.block().previous().userState(), Tokenizer.NORMAL_STATE)
+        self._request_chunk()
+
+    def _request_chunk(self):
+        """Send the next snapshot of block texts to the worker, unless it is busy or far enough ahead."""
+        if self._worker is not None or self._requested is None or self._frontier is None:
+            return
+        if self._requested.position() < self._frontier.position():
+            # The background pass overtook the worker; carry on from the frontier
+            self._requested.setPosition(self._frontier.position())
+            self._requested_state = max(self._frontier.block().previous().userState(), Tokenizer.NORMAL_STATE)
+
+        block = self._requested.block()
+        first_number = block.blockNumber()
+        if first_number - self._frontier.blockNumber() >= self.READ_AHEAD_CHUNKS * self.CHUNK_BLOCKS:
+            return
+
+        texts = []
+        while block.isValid() and len(texts) < self.CHUNK_BLOCKS:
+            texts.append(block.text())
+            block = block.next()
+        if block.isValid():
+            self._requested.setPosition(block.position())
+        else:
+            self._requested = None
+
+        # Parented, so the thread outlives our reference until it has finished
+        self._worker = TokenizerThread(self.language, first_number, texts, self._requested_state, parent=self)
+        self._worker.tokenized.connect(self._apply_chunk)
+        self._worker.finished.connect(self._worker.deleteLater)
+        self._worker_generation = self._generation
+        self._worker.start()
+
+    def _apply_chunk(self, result):
+        """Attach a finished snapshot's spans to blocks whose text is unchanged since."""
+        self._worker = None
+        document = self.document()
+        if document is None or self._worker_generation != self._generation:
+            self._request_chunk()
+            return
+
+        first_number, texts, results = result
+        block = document.findBlockByNumber(first_number)
+        for text, (start_state, spans, end_state) in zip(texts, results):
+            if not block.isValid():
+                break
+            if block.text() == text:
+                block.setUserData(BlockSpans(block.revision(), start_state, spans, end_state))
+            block = block.next()
+        if results:
+            self._requested_state = results[-1][2]
+        self._request_chunk()
+
+    def _on_contents_change(self, position, chars_removed, chars_added):
+        """Hand large insertions (opening or pasting a big file) to the background pass."""
+        document = self.document()
+        if document is None or chars_added < self.LAZY_MIN_CHARACTERS:
+            return
+        self._start_lazy_pass(position)
+
+        # None of the blocks Qt now reformats is due, so skip them outright; as in
+        # QSyntaxHighlighter, the range ends with the block after the inserted text
+        # if text was removed
+        first = document.findBlock(position)
+        last = document.findBlock(position + chars_added + (1 if chars_removed else 0))
+        last_number = last.blockNumber() if last.isValid() else document.blockCount() - 1
+        self._skip_blocks = last_number - first.blockNumber() + 1
+
+    def _on_contents_changed(self):
+        """Stop skipping once Qt has reformatted the blocks of a change."""
+        self._skip_blocks = 0
+
+    def _update_viewport(self, *args):
+        """Highlight the visible blocks that the background pass has not reached yet."""
+        if self._frontier is None or self.document() is None or self._updating_viewport:
+            return
+
+        editor = self.editor
+        block = editor.firstVisibleBlock()
+        first = last = block.blockNumber()
+        top = editor.blockBoundingGeometry(block).translated(editor.contentOffset()).top()
+        bottom = editor.viewport().height()
+        while block.isValid() and top <= bottom:
+            last = block.blockNumber()
+            top += editor.blockBoundingRect(block).height()
+            block = block.next()
+        if (first, last) == self._visible:
+            return
+
+        self._visible = (first, last)
+        # Highlighting relays blocks out, which a hidden editor reports through updateRequest at once
+        self._updating_viewport = True
+        try:
+            block = editor.document().findBlockByNumber(first)
+            while block.isValid() and block.blockNumber() <= last:
+                if block.position() >= self._frontier.position():
+                    self.rehighlightBlock(block)
+                block = block.next()
+        finally:
+            self._updating_viewport = False
+
+    def _highlight_slice(self):
+        """Advance the background pass for up to SLICE_BUDGET seconds."""
+        if self._frontier is None or self.document() is None:
+            self._slice_timer.stop()
+            return
+
+        # An edit may have left the frontier inside a block
+        block = self._frontier.block()
+        self._frontier.setPosition(block.position())
+        block.setUserState(self.RESUME_STATE)
+
+        # One rehighlightBlock call covers the whole slice (see _advance_frontier),
+        # so Qt lays the changed blocks out once rather than block by block
+        self._deadline = time.perf_counter() + self.SLICE_BUDGET
+        try:
+            self.rehighlightBlock(block)
+        finally:
+            self._deadline = None
+
+        if self._frontier is None:
+            self._visible = (-1, -1)
+            self._slice_timer.stop()
+        else:
+            self._request_chunk()
@@ -0,0 +1,88 @@
+"""
+Word and character counts for the status bar.
+Keeps the word and character count of each block and the document's
+totals, adjusted from the blocks an edit touched, so the counters no longer
+copy and split the whole text on every keystroke.
+"""
+
+from core.block_index import BlockIndex, UNKNOWN_REVISION
+
+# Entry fields: (block revision, words, characters)
+WORDS, CHARS = 1, 2
+
+
+class TextCounts(BlockIndex):
+    """
+    Per-block word and character counts of a document, and their totals.
+
+    Words are separated by whitespace, as str.split() finds them, and the
+    characters include the line breaks between blocks, so the totals match
+    counting the plain text. Blocks touched by small edits are counted again
+    at once; after large ones, such as opening a file, the missing blocks are
+    counted from a single copy of the text the next time a total is asked for.
+    """
+
+    EAGER_BLOCKS = 64  # Edits touching up to this many blocks are counted at once
+
+    def __init__(self, document, parent=None):
+        self._words = 0
+        self._chars = 0
+        self._missing = True  # Some entries may not be computed
+        super().__init__(document, parent)
+
+    def words(self):
+        """Get the number of words in the document."""
+        self._fill()
+        return self._words
+
+    def chars(self):
+        """Get the number of characters in the document, line breaks included."""
+        self._fill()
+        return self._chars + len(self._blocks) - 1
+
+    def blocks_changed(self, first, last, dropped):
+        """Take the dropped blocks out of the totals, and count the touched blocks now or later."""
+        for entry in dropped:
+            self._words -= entry[WORDS]
+            self._chars -= entry[CHARS]
+
+        if last - first < self.EAGER_BLOCKS:
+            block = self.document.findBlockByNumber(first)
+            for number in range(first, last + 1):
+                if self._blocks[number] is None:
+                    self._count(number, block.revision(), block.text())
+                block = block.next()
+        else:
+            self._missing = True
+
+    def _count(self, number, revision, text):
+        """Count a missing block into the totals."""
+        words = len(text.split())
+        self._blocks[number] = (revision, words, len(text))
+        self._words += words
+        self._chars += len(text)
+
+    def _fill(self):
+        """Count all missing blocks at once."""
+        if not self._missing:
+            return
+        # Splitting the whole text is far quicker than visiting every block, but
+        # leaves the revisions unknown
+        lines = self.document.toPlainText().split('\n')
+        if len(lines) != len(self._blocks):  # Line separators within blocks
+            lines = None
+        blocks = self._blocks
+        words = chars = 0
+        for number, entry in enumerate(blocks):
+            if entry is None:
+                if lines is None:
+                    block = self.document.findBlockByNumber(number)
+                    entry = (block.revision(), len(block.text().split()), len(block.text()))
+                else:
+                    entry = (UNKNOWN_REVISION, len(lines[number].split()), len(lines[number]))
+                blocks[number] = entry
+                words += entry[WORDS]
+                chars += entry[CHARS]
+        self._words += words
+        self._chars += chars
+        self._missing = False
@@ -1,7 +1,12 @@
-from PyQt5.QtWidgets import QPlainTextEdit
-from PyQt5.QtGui import QFont, QContextMenuEvent
-from PyQt5.QtCore import QPoint
+from PyQt5.QtWidgets import QPlainTextEdit, QTextEdit
+from PyQt5.QtGui import QFont, QContextMenuEvent, QColor, QTextCharFormat, QTextCursor, QPainter, QPalette
+from PyQt5.QtCore import QPoint, QRectF, Qt, QTimer, pyqtSignal
+from core.bracket_index import BracketIndex
+from core.fold_index import FoldIndex
+from core.search_engine import find_in_range
 from core.syntax_highlighter import SyntaxHighlighter
+from core.text_counts import TextCounts
+from core.word_index import WordIndex, word_at, word_columns
 
 
 class TextEditor(QPlainTextEdit):
@@ -9,12 +14,42 @@ class TextEditor(QPlainTextEdit):
     Custom text editor widget with enhanced functionality.
     """
 
+    BRACKET_COLOR = QColor(0, 120, 215, 70)  # Translucent, so it works in light and dark mode
+    UNMATCHED_BRACKET_COLOR = QColor(220, 50, 47, 90)
+    OCCURRENCE_COLOR = QColor(255, 190, 0, 70)
+    SEARCH_COLOR = QColor(255, 235, 0, 140)
+
+    # Word under the cursor ("" if none) and its occurrences in the document (None until counted)
+    occurrences_changed = pyqtSignal(str, object)
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setLineWrapMode(QPlainTextEdit.WidgetWidth)
         self.setFont(QFont("Segoe UI", 11))
         self.syntax_highlighter = None
         self.current_language = None
+        self.bracket_index = BracketIndex(self.document(), parent=self)
+        self.fold_index = FoldIndex(self.document(), self.bracket_index, parent=self)
+        self.word_index = WordIndex(self.document(), parent=self)
+        self.text_counts = TextCounts(self.document(), parent=self)
+        self._extra_selections = {}  # Feature name -> its extra selections
+        self._has_folds = False
+        self._search = None  # (query, match case) of the search to highlight
+
+        # Coalesces the cursor moves, scrolls and edits of one event loop turn
+        self._highlight_timer = QTimer(self)
+        self._highlight_timer.setSingleShot(True)
+        self._highlight_timer.setInterval(0)
+        self._highlight_timer.timeout.connect(self.highlight_occurrences)
+        self._highlight_timer.timeout.connect(self.highlight_search)
+
+        self.cursorPositionChanged.connect(self.highlight_matching_bracket)
+        self.bracket_index.caught_up.connect(self.highlight_matching_bracket)
+        self.cursorPositionChanged.connect(self._reveal_cursor)
+        self.cursorPositionChanged.connect(self._highlight_timer.start)
+        self.textChanged.connect(self._highlight_timer.start)
+        self.updateRequest.connect(self._on_update_request)
+        self.word_index.counted.connect(self.highlight_occurrences)
 
     def set_editor_font(self, font):
         """Set the font for the text editor."""
@@ -61,6 +96,14 @@ class TextEditor(QPlainTextEdit):
         """Get the total number of lines."""
         return self.document().blockCount()
 
+    def get_word_count(self):
+        """Get the total number of words."""
+        return self.text_counts.words()
+
+    def get_char_count(self):
+        """Get the total number of characters."""
+        return self.text_counts.chars()
+
     def insert_text_at_cursor(self, text):
         """Insert text at the current cursor position."""
         cursor = self.textCursor()
@@ -100,6 +143,18 @@ class TextEditor(QPlainTextEdit):
         cursor = self.textCursor()
         cursor.insertText(replacement_text)
 
+    def get_head_text(self, limit):
+        """Get about the first limit characters of the content, without copying the rest."""
+        lines = []
+        size = 0
+        block = self.document().firstBlock()
+        while block.isValid() and size < limit:
+            text = block.text()
+            lines.append(text)
+            size += len(text) + 1
+            block = block.next()
+        return "\n".join(lines)[:limit]
+
     def get_document(self):
         """Get the underlying document."""
         return self.document()
@@ -113,8 +168,10 @@ class TextEditor(QPlainTextEdit):
         if self.syntax_highlighter:
             self.syntax_highlighter.set_language(language)
         else:
-            self.syntax_highlighter = SyntaxHighlighter(self.document(), language)
+            self.syntax_highlighter = SyntaxHighlighter(self.document(), language, editor=self)
         self.current_language = language
+        self.bracket_index.set_language(language)
+        self.highlight_matching_bracket()
 
     def disable_syntax_highlighting(self):
         """Disable syntax highlighting."""
@@ -122,6 +179,8 @@ class TextEditor(QPlainTextEdit):
             self.syntax_highlighter.setDocument(None)
             self.syntax_highlighter = None
             self.current_language = None
+            self.bracket_index.set_language(None)
+            self.highlight_matching_bracket()
 
     def is_syntax_highlighting_enabled(self):
         """Check if syntax highlighting is enabled."""
@@ -131,6 +190,228 @@ class TextEditor(QPlainTextEdit):
         """Get the current syntax highlighting language."""
         return self.current_language
 
+    def set_extra_selections(self, name, selections):
+        """Replace the extra selections one feature shows, keeping those of the others."""
+        self._extra_selections[name] = selections
+        self.setExtraSelections([selection for group in self._extra_selections.values() for selection in group])
+
+    def clear_highlights(self):
+        """
+        Drop the bracket, occurrence and search highlights until they are next updated.
+
+        Qt moves the cursor of every extra selection along with each block an
+        edit inserts, which adds up over a bulk edit such as Replace All. The
+        highlights come back on the next cursor move, edit or finished index.
+        """
+        self._extra_selections = {}
+        self.setExtraSelections([])
+
+    def _selection(self, color, start, end):
+        """Create an extra selection with a background color from start to end."""
+        # Assigning a whole format, as reading selection.format ties the
+        # selection and its cursor into a reference cycle that outlives it
+        text_format = QTextCharFormat()
+        text_format.setBackground(color)
+        selection = QTextEdit.ExtraSelection()
+        selection.format = text_format
+        cursor = QTextCursor(self.document())
+        cursor.setPosition(start)
+        cursor.setPosition(end, QTextCursor.KeepAnchor)
+        selection.cursor = cursor
+        return selection
+
+    def highlight_matching_bracket(self):
+        """Highlight the bracket at the cursor and its match, or the bracket alone if it has none."""
+        selections = []
+        found = self.bracket_index.find_match(self.textCursor().position(), defer=True)
+        if found is not None:
+            bracket, match, paired = found
+            color = self.BRACKET_COLOR if paired else self.UNMATCHED_BRACKET_COLOR
+            for position in (bracket, match):
+                if position is None:
+                    continue
+                selections.append(self._selection(color, position, position + 1))
+        self.set_extra_selections("brackets", selections)
+
+    def highlight_occurrences(self):
+        """Highlight the visible occurrences of the word under the cursor and report their total."""
+        cursor = self.textCursor()
+        word = None
+        if not cursor.hasSelection():
+            word = word_at(cursor.block().text(), cursor.positionInBlock())
+        count = self.word_index.count(word) if word else 0
+
+        selections = []
+        if word and count != 1:
+            offset = self.contentOffset()
+            bottom = self.viewport().height()
+            block = self.firstVisibleBlock()
+            while block.isValid() and self.blockBoundingGeometry(block).translated(offset).top() <= bottom:
+                if block.isVisible():
+                    for column in word_columns(block.text(), word):
+                        start = block.position() + column
+                        selections.append(self._selection(self.OCCURRENCE_COLOR, start, start + len(word)))
+                block = block.next()
+            if len(selections) < 2:
+                selections = []
+        self.set_extra_selections("occurrences", selections)
+        self.occurrences_changed.emit(word or "", count)
+
+    def set_search(self, query, match_case=False):
+        """Highlight the visible occurrences of a search query, or stop with an empty query."""
+        self._search = (query, match_case) if query else None
+        self.highlight_search()
+
+    def highlight_search(self):
+        """Highlight the occurrences of the search query in view."""
+        selections = []
+        if self._search is not None:
+            query, match_case = self._search
+            viewport = self.viewport().rect()
+            start = self.cursorForPosition(viewport.topLeft()).position()
+            end = self.cursorForPosition(viewport.bottomRight()).position()
+            for first, last in find_in_range(self.document(), query, start, end, match_case):
+                selections.append(self._selection(self.SEARCH_COLOR, first, last))
+        self.set_extra_selections("search", selections)
+
+    def _on_update_request(self, rect, dy):
+        """Highlight the occurrences that scrolled into view."""
+        if dy:
+            self._highlight_timer.start()
+
+    def goto_matching_bracket(self):
+        """
+        Move the cursor to the bracket matching the one at (or just before) it.
+
+        Returns:
+            bool: True if the cursor moved
+        """
+        cursor = self.textCursor()
+        found = self.bracket_index.find_match(cursor.position())
+        if found is None or found[1] is None:
+            return False
+        bracket, match, _ = found
+        # Stay on the same side of the bracket
+        cursor.setPosition(match + (cursor.position() - bracket))
+        self.setTextCursor(cursor)
+        return True
+
+    def is_folded(self, block):
+        """Check if a block heads a folded region."""
+        return block.isVisible() and block.next().isValid() and not block.next().isVisible()
+
+    def toggle_fold(self):
+        """
+        Fold the innermost region at the cursor, or unfold it if the cursor line is folded.
+
+        Returns:
+            bool: False if there is no region at the cursor
+        """
+        block = self.textCursor().block()
+        if self.is_folded(block):
+            self._set_visible(block.blockNumber() + 1, self._hidden_end(block), True)
+            return True
+        region = self.fold_index.enclosing_region(block.blockNumber())
+        if region is None:
+            return False
+        start, end = region
+        if start != block.blockNumber():
+            # Keep the cursor visible, on the line that stays
+            cursor = self.textCursor()
+            cursor.setPosition(self.document().findBlockByNumber(start).position())
+            self.setTextCursor(cursor)
+        self._set_visible(start + 1, end, False)
+        return True
+
+    def fold_all(self):
+        """Fold every top-level region."""
+        regions = self.fold_index.top_level_regions()
+        cursor = self.textCursor()
+        number = cursor.blockNumber()
+        for start, end in regions:
+            if start < number <= end:
+                cursor.setPosition(self.document().findBlockByNumber(start).position())
+                self.setTextCursor(cursor)
+                break
+        self._set_visible_ranges(regions, False)
+
+    def unfold_all(self):
+        """Show every folded block."""
+        if self._has_folds:
+            self._set_visible_ranges([(-1, self.document().blockCount() - 1)], True)
+            self._has_folds = False
+
+    def _hidden_end(self, block):
+        """Get the number of the last block in the hidden run after block."""
+        block = block.next()
+        while block.next().isValid() and not block.next().isVisible():
+            block = block.next()
+        return block.blockNumber()
+
+    def _set_visible(self, first, last, visible):
+        """Show or hide blocks first to last."""
+        self._set_visible_ranges([(first - 1, last)], visible)
+
+    def _set_visible_ranges(self, regions, visible):
+        """Show or hide the blocks after the first of each (first, last) region, up to last."""
+        document = self.document()
+        start_position = end_position = None
+        for start, end in regions:
+            block = document.findBlockByNumber(start + 1)
+            if start_position is None:
+                start_position = block.position()
+            for _ in range(end - start):
+                block.setVisible(visible)
+                block = block.next()
+            end_position = block.position() if block.isValid() else document.characterCount()
+        if start_position is None:
+            return
+        if not visible:
+            self._has_folds = True
+
+        # Relayout the changed blocks; their size change is not signalled by Qt itself
+        document.markContentsDirty(start_position, end_position - start_position)
+        layout = document.documentLayout()
+        layout.documentSizeChanged.emit(layout.documentSize())
+        self.ensureCursorVisible()
+        self.viewport().update()
+
+    def _reveal_cursor(self):
+        """Unfold the region hiding the cursor, when find or go to line moves it there."""
+        block = self.textCursor().block()
+        if block.isVisible():
+            return
+        header = block.previous()
+        while header.isValid() and not header.isVisible():
+            header = header.previous()
+        self._set_visible(header.blockNumber() + 1, self._hidden_end(header), True)
+
+    def paintEvent(self, event):
+        """Paint the text, then a marker after each folded line."""
+        super().paintEvent(event)
+        if not self._has_folds:
+            return
+
+        painter = QPainter(self.viewport())
+        painter.setPen(self.palette().color(QPalette.Mid))
+        metrics = self.fontMetrics()
+        marker_width = metrics.horizontalAdvance(" ... ")
+        offset = self.contentOffset()
+        block = self.firstVisibleBlock()
+        while block.isValid():
+            geometry = self.blockBoundingGeometry(block).translated(offset)
+            if geometry.top() > event.rect().bottom():
+                break
+            if self.is_folded(block):
+                layout = block.layout()
+                line = layout.lineAt(layout.lineCount() - 1)
+                left = geometry.left() + layout.position().x() + line.naturalTextWidth() + metrics.averageCharWidth()
+                rect = QRectF(left, geometry.top() + line.y(), marker_width, line.height())
+                painter.drawRoundedRect(rect.adjusted(0, 2, 0, -2), 3, 3)
+                painter.drawText(rect, Qt.AlignCenter, "...")
+            block = block.next()
+        painter.end()
+
     def contextMenuEvent(self, event):
         """Handle context menu events to ensure proper theming."""
         # Create the standard context menu
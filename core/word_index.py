@@ -0,0 +1,140 @@
+"""
+Word index for highlighting occurrences of the word under the cursor.
+Keeps the words of each block and how often every word occurs in the whole
+document, updated from the blocks an edit touched, so counting the
+occurrences of a word is a dictionary lookup rather than a document scan.
+"""
+
+import re
+import sys
+import time
+
+from PyQt5.QtCore import QTimer, pyqtSignal
+
+from core.block_index import BlockIndex
+from core.lexer import utf16_offsets
+
+WORD_PATTERN = re.compile(r'\w+')
+
+# Entry fields: (block revision, the block's words in order)
+WORDS = 1
+
+
+class WordIndex(BlockIndex):
+    """
+    Per-block word lists of a document, and the document-wide count of every word.
+
+    Block numbers shift with every inserted or removed line, so the
+    inverted side maps each word to its total count, and the blocks it is
+    in are found through their own word lists. Blocks touched by small
+    edits are indexed again at once; after large ones, such as opening a
+    file, the missing blocks are indexed in short slices while the event
+    loop is idle and counts are unknown until then.
+    """
+
+    SLICE_BUDGET = 0.008  # Seconds of background indexing per event loop turn
+    EAGER_BLOCKS = 64  # Edits touching up to this many blocks are indexed at once
+
+    counted = pyqtSignal()  # Counts became known again
+
+    def __init__(self, document, parent=None):
+        self._counts = {}  # Word -> occurrences in the indexed blocks
+        self._build_from = 0  # No block above this one is missing
+        self._complete = False
+        super().__init__(document, parent)
+
+        self._build_timer = QTimer(self)
+        self._build_timer.setInterval(0)
+        self._build_timer.timeout.connect(self._build_slice)
+        self._build_timer.start()
+
+    def count(self, word):
+        """Get the number of occurrences of a word, or None while the index is incomplete."""
+        if not self._complete:
+            return None
+        return self._counts.get(word, 0)
+
+    def _index(self, number, block):
+        """Index a missing block and count its words."""
+        words = tuple(map(sys.intern, WORD_PATTERN.findall(block.text())))
+        entry = (block.revision(), words)
+        self._blocks[number] = entry
+        counts = self._counts
+        for word in words:
+            counts[word] = counts.get(word, 0) + 1
+        return entry
+
+    def blocks_changed(self, first, last, dropped):
+        """Uncount the dropped blocks' words, and index the touched blocks now or in the background."""
+        if len(dropped) > max(self.EAGER_BLOCKS, len(self._blocks) // 2):
+            # Indexing the rest again in the background beats uncounting most of the document now
+            self._blocks = [None] * len(self._blocks)
+            self._counts = {}
+            self._build_from = 0
+            self._complete = False
+            self._build_timer.start()
+            return
+        counts = self._counts
+        for entry in dropped:
+            for word in entry[WORDS]:
+                remaining = counts[word] - 1
+                if remaining:
+                    counts[word] = remaining
+                else:
+                    del counts[word]
+
+        if last - first < self.EAGER_BLOCKS:
+            block = self.document.findBlockByNumber(first)
+            for number in range(first, last + 1):
+                if self._blocks[number] is None:
+                    self._index(number, block)
+                block = block.next()
+        elif None in self._blocks[first:last + 1]:
+            self._build_from = min(self._build_from, first)
+            self._complete = False
+            self._build_timer.start()
+
+    def _build_slice(self):
+        """Index missing blocks for up to SLICE_BUDGET seconds."""
+        deadline = time.perf_counter() + self.SLICE_BUDGET
+        blocks = self._blocks
+        block = None
+        previous = -2
+        while time.perf_counter() < deadline:
+            try:
+                number = blocks.index(None, self._build_from)
+            except ValueError:
+                self._build_timer.stop()
+                self._complete = True
+                self.counted.emit()
+                return
+            block = block.next() if number == previous + 1 else self.document.findBlockByNumber(number)
+            self._index(number, block)
+            previous = number
+            self._build_from = number + 1
+
+
+def word_columns(text, word):
+    """Get the UTF-16 columns where a whole word occurs in a line."""
+    offsets = utf16_offsets(text) if not text.isascii() else None
+    return [match.start() if offsets is None else offsets[match.start()]
+            for match in WORD_PATTERN.finditer(text) if match.group() == word]
+
+
+def word_at(text, column):
+    """
+    Get the word touching a UTF-16 column of a line.
+
+    Returns:
+        The word, or None
+    """
+    offsets = utf16_offsets(text) if not text.isascii() else None
+    for match in WORD_PATTERN.finditer(text):
+        start, end = match.span()
+        if offsets is not None:
+            start, end = offsets[start], offsets[end]
+        if start <= column <= end:
+            return match.group()
+        if start > column:
+            break
+    return None
@@ -0,0 +1,24 @@
+from PyQt5.QtGui import QKeySequence
+
+from core.base_action import BaseAction
+
+
+class GotoBracketAction(BaseAction):
+    """
+    Action for jumping to the bracket matching the one at the cursor.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(
+            parent=parent,
+            text="Go To &Matching Bracket",
+            shortcut=QKeySequence("Ctrl+B"),
+            tooltip="Jump to the matching bracket (Ctrl+B)",
+            status_tip="Jump to the bracket matching the one at the cursor"
+        )
+
+    def execute(self):
+        """Execute the goto bracket action."""
+        text_editor = self.get_text_editor()
+        if not text_editor.goto_matching_bracket():
+            self.get_parent_window().status_bar.show_message("No matching bracket", 2000)
@@ -0,0 +1,67 @@
+from PyQt5.QtWidgets import QMessageBox
+
+from core.base_action import BaseAction
+from ui.password_dialog import PasswordDialog
+from utils.security.crypto_worker import CryptoWorker
+from utils.security.encryption import EncryptionService, InvalidPasswordError
+
+
+class ChangePasswordAction(BaseAction):
+    """
+    Action for changing the password of the current encrypted file.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(
+            parent=parent,
+            text="Change &Password...",
+            tooltip="Change the password of the current encrypted file",
+            status_tip="Change the password of the current encrypted file"
+        )
+        self.encryption_service = EncryptionService()
+        self.worker = None
+
+    def execute(self):
+        """Execute the change password action."""
+        window = self.get_parent_window()
+        file_path = window.get_current_file_path()
+
+        if not file_path or not self.encryption_service.is_encrypted_file(file_path):
+            QMessageBox.information(window, "Change Password",
+                                    "Save the document with Save Encrypted before changing its password.")
+            return False
+
+        if self.worker is not None and self.worker.isRunning():
+            return False
+
+        password_dialog = PasswordDialog(window, mode="change")
+        if password_dialog.exec_() != PasswordDialog.Accepted:
+            return False
+
+        # Only the file header is rewritten; the key derivations run in a worker
+        self.worker = CryptoWorker(
+            self.encryption_service.change_password,
+            file_path, password_dialog.get_current_password(), password_dialog.get_password(),
+            parent=self
+        )
+        self.worker.succeeded.connect(lambda _: self._on_change_succeeded(file_path))
+        self.worker.failed.connect(self._on_change_failed)
+
+        window.status_bar.show_busy("Changing password...")
+        self.worker.start()
+        return True
+
+    def _on_change_succeeded(self, file_path):
+        """Report a successful password change."""
+        window = self.get_parent_window()
+        window.status_bar.clear_busy()
+        window.status_bar.show_message(f"Password changed: {file_path}", 2000)
+
+    def _on_change_failed(self, error):
+        """Report a failed password change."""
+        window = self.get_parent_window()
+        window.status_bar.clear_busy()
+        if isinstance(error, InvalidPasswordError):
+            QMessageBox.critical(window, "Error", "The current password is incorrect.")
+        else:
+            QMessageBox.critical(window, "Error", f"Could not change password: {str(error)}")
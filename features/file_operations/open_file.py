@@ -4,7 +4,7 @@ from PyQt5.QtWidgets import QFileDialog, QMessageBox
 from core.base_action import BaseAction
 from ui.icons import ModernIcon
 from ui.password_dialog import PasswordPromptDialog
-from utils.security.encryption import EncryptionService, InvalidPasswordError
+from utils.security.encryption import EncryptionService
 
 
 class OpenFileAction(BaseAction):
@@ -75,31 +75,23 @@ class OpenFileAction(BaseAction):
         """Open and decrypt an encrypted file."""
         window = self.get_parent_window()
 
-        # Prompt for password
-        password_dialog = PasswordPromptDialog(window, "Enter Password to Decrypt")
+        # Prompt for password; the dialog runs the read and decryption in a
+        # worker thread so the window keeps painting during key derivation
+        password_dialog = PasswordPromptDialog(
+            window, "Enter Password to Decrypt",
+            decrypt_job=lambda password: self._read_and_decrypt(file_path, password)
+        )
         if password_dialog.exec_() != PasswordPromptDialog.Accepted:
+            error = password_dialog.get_error()
+            if error is not None:
+                QMessageBox.critical(window, "Error", f"Failed to decrypt file: {str(error)}")
             return None
 
-        password = password_dialog.get_password()
-        if not password:
-            QMessageBox.warning(window, "Error", "Password cannot be empty.")
-            return None
-
-        try:
-            # Read encrypted data
-            with open(file_path, 'rb') as file:
-                encrypted_data = file.read()
-
-            # Decrypt
-            content = self.encryption_service.decrypt_data(encrypted_data, password)
-            return content
+        return password_dialog.get_result()
 
-        except InvalidPasswordError:
-            QMessageBox.critical(window, "Error", "Incorrect password. Cannot decrypt file.")
-            return None
-        except Exception as e:
-            QMessageBox.critical(window, "Error", f"Failed to decrypt file: {str(e)}")
-            return None
+    def _read_and_decrypt(self, file_path, password):
+        """Decrypt an encrypted file straight from a memory map. Runs on a worker thread."""
+        return self.encryption_service.decrypt_file(file_path, password)
 
     def _check_save_changes(self):
         """Check if there are unsaved changes and prompt user."""
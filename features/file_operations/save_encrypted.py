@@ -2,6 +2,7 @@ from PyQt5.QtWidgets import QFileDialog, QMessageBox
 
 from core.base_action import BaseAction
 from ui.password_dialog import PasswordDialog
+from utils.security.crypto_worker import CryptoWorker
 from utils.security.encryption import EncryptionService
 
 
@@ -18,6 +19,7 @@ class SaveEncryptedAction(BaseAction):
             status_tip="Save the current file with encryption"
         )
         self.encryption_service = EncryptionService()
+        self.worker = None
 
     def execute(self):
         """Execute the save encrypted action."""
@@ -31,6 +33,7 @@ class SaveEncryptedAction(BaseAction):
 
         password = password_dialog.get_password()
         algorithm = password_dialog.get_algorithm()
+        compression = password_dialog.get_compression()
 
         # Show save dialog
         file_path, _ = QFileDialog.getSaveFileName(
@@ -43,31 +46,68 @@ class SaveEncryptedAction(BaseAction):
             if not file_path.endswith('.enc'):
                 file_path += '.enc'
 
-            return self._save_encrypted_to_path(file_path, password, algorithm)
+            return self._save_encrypted_to_path(file_path, password, algorithm, compression)
         return False
 
-    def _save_encrypted_to_path(self, file_path, password, algorithm):
-        """Save encrypted content to the specified file path."""
+    def _save_encrypted_to_path(self, file_path, password, algorithm, compression='auto'):
+        """
+        Save encrypted content to the specified file path.
+
+        Encryption and the file write run in a worker thread; the document is
+        marked as saved when the worker reports success.
+        """
         window = self.get_parent_window()
         text_editor = self.get_text_editor()
 
+        if self.worker is not None and self.worker.isRunning():
+            window.status_bar.show_message("An encrypted save is already in progress", 2000)
+            return False
+
         try:
             content = text_editor.get_content()
+            tab = window.get_current_tab()
+            revision = text_editor.document().revision()
 
-            # Encrypt the content
-            encrypted_data = self.encryption_service.encrypt_data(content, password, algorithm)
-
-            # Save encrypted data
-            with open(file_path, 'wb') as file:
-                file.write(encrypted_data)
+            self.worker = CryptoWorker(self._encrypt_to_file, file_path, content, password, algorithm, compression,
+                                       parent=self)
+            self.worker.succeeded.connect(lambda _: self._on_save_succeeded(tab, file_path, revision))
+            self.worker.failed.connect(self._on_save_failed)
 
-            window.set_current_file_path(file_path)
-            window.set_modified(False)
-
-            # Update status bar
-            window.status_bar.show_message(f"Saved encrypted file: {file_path}", 2000)
+            window.status_bar.show_busy(f"Encrypting {file_path}...")
+            self.worker.start()
             return True
 
         except Exception as e:
             QMessageBox.critical(window, "Error", f"Could not save encrypted file: {str(e)}")
-            return False
\ No newline at end of file
+            return False
+
+    def _encrypt_to_file(self, file_path, content, password, algorithm, compression):
+        """Encrypt content and write it to disk. Runs on a worker thread."""
+        # Replaces the file only once written, so a failed save keeps the previous copy
+        self.encryption_service.encrypt_to_file(content, file_path, password, algorithm, compression)
+
+    def _on_save_succeeded(self, tab, file_path, revision):
+        """Mark the saved tab as clean once the worker has written the file."""
+        window = self.get_parent_window()
+        window.status_bar.clear_busy()
+
+        if tab is None or tab is window.get_current_tab():
+            window.set_current_file_path(file_path)
+            window.set_modified(tab is not None and tab.text_editor.document().revision() != revision)
+        else:
+            # The user switched tabs while the save was running
+            if file_path != tab.file_path:
+                tab.language_chosen = False
+            tab.file_path = file_path
+            tab.is_modified = tab.text_editor.document().revision() != revision
+            tab.update_language()
+            window.update_tab_title(window.tab_widget.indexOf(tab))
+
+        # Update status bar
+        window.status_bar.show_message(f"Saved encrypted file: {file_path}", 2000)
+
+    def _on_save_failed(self, error):
+        """Report a failed encrypted save."""
+        window = self.get_parent_window()
+        window.status_bar.clear_busy()
+        QMessageBox.critical(window, "Error", f"Could not save encrypted file: {str(error)}")
@@ -2,6 +2,12 @@ from PyQt5.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QLabel, QComboBox
 from PyQt5.QtCore import Qt
 
 from core.base_action import BaseAction
+from core.grammar import available_grammars
+
+
+def language_labels():
+    """Map dialog labels to language names, one per grammar in core/grammars."""
+    return {info['label']: language for language, info in available_grammars().items()}
 
 
 class SyntaxHighlightingAction(BaseAction):
@@ -16,46 +22,26 @@ class SyntaxHighlightingAction(BaseAction):
             tooltip="Enable syntax highlighting for code",
             status_tip="Enable syntax highlighting for code"
         )
-        self.languages = ["None", "Python", "JavaScript", "C++"]
-        self.load_syntax_highlighting_setting()
+        self.languages = ["None"] + sorted(language_labels())
 
     def execute(self):
         """Execute the syntax highlighting action."""
         dialog = SyntaxHighlightingDialog(self.get_parent_window())
         if dialog.exec_() == QDialog.Accepted:
             language = dialog.get_selected_language()
-            self.save_syntax_highlighting_setting(language)
             text_editor = self.get_text_editor()
 
             if language == "None":
                 text_editor.disable_syntax_highlighting()
             else:
-                text_editor.enable_syntax_highlighting(language.lower())
-
-    def load_syntax_highlighting_setting(self):
-        """Load syntax highlighting setting from persistent storage."""
-        try:
-            from PyQt5.QtCore import QSettings
-            settings = QSettings("ModernNotepad", "SyntaxHighlighting")
-            language = settings.value("language", "None", type=str)
-            if language != "None":
-                text_editor = self.get_text_editor()
-                if text_editor:
-                    text_editor.enable_syntax_highlighting(language.lower())
-        except Exception:
-            # If loading fails, default to no highlighting
-            pass
-
-    def save_syntax_highlighting_setting(self, language):
-        """Save syntax highlighting setting to persistent storage."""
-        try:
-            from PyQt5.QtCore import QSettings
-            settings = QSettings("ModernNotepad", "SyntaxHighlighting")
-            settings.setValue("language", language)
-            settings.sync()  # Ensure immediate write
-        except Exception:
-            # If saving fails, continue without error
-            pass
+                text_editor.enable_syntax_highlighting(language_labels()[language])
+
+            # The choice is per tab and wins over detection until another file is opened there
+            window = self.get_parent_window()
+            if window is not None and hasattr(window, 'get_current_tab'):
+                current_tab = window.get_current_tab()
+                if current_tab:
+                    current_tab.language_chosen = True
 
 
 class SyntaxHighlightingDialog(QDialog):
@@ -106,7 +92,7 @@ class SyntaxHighlightingDialog(QDialog):
         language_layout = QHBoxLayout()
         language_layout.addWidget(QLabel("Language:"))
         self.language_combo = QComboBox()
-        self.language_combo.addItems(["None", "Python", "JavaScript", "C++"])
+        self.language_combo.addItems(["None"] + sorted(language_labels()))
         # Apply dark theme styling to match the app
         self.language_combo.setStyleSheet("""
             QComboBox {
@@ -168,14 +154,10 @@ class SyntaxHighlightingDialog(QDialog):
             text_editor = parent_window.text_editor
             if text_editor.is_syntax_highlighting_enabled():
                 language = text_editor.get_current_language()
-                self.status_label.setText(f"Syntax highlighting is enabled for {language.title()}")
+                label = available_grammars().get(language, {}).get('label', language.title())
+                self.status_label.setText(f"Syntax highlighting is enabled for {label}")
                 # Set current language in combo
-                if language == "python":
-                    self.language_combo.setCurrentText("Python")
-                elif language == "javascript":
-                    self.language_combo.setCurrentText("JavaScript")
-                elif language == "cpp":
-                    self.language_combo.setCurrentText("C++")
+                self.language_combo.setCurrentText(label)
             else:
                 self.status_label.setText("Syntax highlighting is currently disabled")
                 self.language_combo.setCurrentText("None")
@@ -0,0 +1,22 @@
+from PyQt5.QtGui import QKeySequence
+
+from core.base_action import BaseAction
+
+
+class FoldAllAction(BaseAction):
+    """
+    Action for folding every top-level region.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(
+            parent=parent,
+            text="&Fold All",
+            shortcut=QKeySequence("Ctrl+Alt+["),
+            tooltip="Fold all top-level regions (Ctrl+Alt+[)",
+            status_tip="Fold all top-level regions"
+        )
+
+    def execute(self):
+        """Execute the fold all action."""
+        self.get_text_editor().fold_all()
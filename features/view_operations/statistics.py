@@ -0,0 +1,25 @@
+from core.base_action import BaseAction
+
+
+class StatisticsAction(BaseAction):
+    """
+    Action for showing the statistics panel.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(
+            parent=parent,
+            text="S&tatistics...",
+            tooltip="Show document statistics",
+            status_tip="Show word frequencies, reading time and line lengths"
+        )
+
+    def execute(self):
+        """Execute the statistics action."""
+        window = self.get_parent_window()
+        if not hasattr(window, 'statistics_dialog'):
+            from ui.statistics_dialog import StatisticsDialog
+            window.statistics_dialog = StatisticsDialog(window)
+        window.statistics_dialog.show()
+        window.statistics_dialog.raise_()
+        window.statistics_dialog.activateWindow()
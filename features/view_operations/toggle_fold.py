@@ -0,0 +1,24 @@
+from PyQt5.QtGui import QKeySequence
+
+from core.base_action import BaseAction
+
+
+class ToggleFoldAction(BaseAction):
+    """
+    Action for folding or unfolding the region at the cursor.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(
+            parent=parent,
+            text="&Toggle Fold",
+            shortcut=QKeySequence("Ctrl+Shift+["),
+            tooltip="Fold or unfold the region at the cursor (Ctrl+Shift+[)",
+            status_tip="Fold or unfold the region at the cursor"
+        )
+
+    def execute(self):
+        """Execute the toggle fold action."""
+        text_editor = self.get_text_editor()
+        if not text_editor.toggle_fold():
+            self.get_parent_window().status_bar.show_message("Nothing to fold here", 2000)
@@ -22,5 +22,6 @@ class ToggleStatusBarAction(BaseAction):
         if hasattr(window, 'status_bar'):
             if self.isChecked():
                 window.status_bar.status_bar.show()
+                window.status_bar.update_counters()  # Skipped while hidden
             else:
                 window.status_bar.status_bar.hide()
\ No newline at end of file
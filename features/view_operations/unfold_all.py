@@ -0,0 +1,22 @@
+from PyQt5.QtGui import QKeySequence
+
+from core.base_action import BaseAction
+
+
+class UnfoldAllAction(BaseAction):
+    """
+    Action for unfolding every folded region.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(
+            parent=parent,
+            text="&Unfold All",
+            shortcut=QKeySequence("Ctrl+Alt+]"),
+            tooltip="Unfold all regions (Ctrl+Alt+])",
+            status_tip="Unfold all regions"
+        )
+
+    def execute(self):
+        """Execute the unfold all action."""
+        self.get_text_editor().unfold_all()
@@ -5,7 +5,7 @@ a = Analysis(
     ['main.py'],
     pathex=[],
     binaries=[],
-    datas=[],
+    datas=[('core/grammars/*.json', 'core/grammars')],
     hiddenimports=[],
     hookspath=[],
     hooksconfig={},
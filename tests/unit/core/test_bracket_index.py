@@ -0,0 +1,120 @@
+import pytest
+from PyQt5.QtGui import QTextCursor, QTextDocument
+from PyQt5.QtWidgets import QPlainTextDocumentLayout
+
+from core import bracket_index
+from core.bracket_index import BracketIndex, summarize_brackets
+from core.lexer import tokenize_cached
+from core.text_editor import TextEditor
+
+
+def make_document(text):
+    """Create a document laid out as in the editor."""
+    document = QTextDocument()
+    document.setDocumentLayout(QPlainTextDocumentLayout(document))
+    document.setPlainText(text)
+    return document
+
+
+class TestBracketIndex:
+    """Test cases for the bracket index."""
+
+    def test_summary_counts_unmatched_brackets(self):
+        """A line's summary leaves out matched pairs and brackets in strings and comments."""
+        text = ") f(a, '(') [  # {"
+        spans, _ = tokenize_cached("python", text, 0)
+
+        chars, columns, closes, opens = summarize_brackets(text, spans)
+
+        assert chars == ")()["
+        assert columns == (0, 3, 10, 12)
+        assert (closes, opens) == (1, 1)
+
+    def test_match_across_blocks(self, qtbot):
+        """Brackets are matched over lines in both directions."""
+        text = "def f(a,\n      b):\n    return {\n        'x': [1, 2],\n    }\n"
+        document = make_document(text)
+        index = BracketIndex(document, "python")
+        open_brace = text.index("{")
+        close_brace = text.rindex("}")
+
+        assert index.find_match(open_brace) == (open_brace, close_brace, True)
+        # Just after the closing bracket counts too
+        assert index.find_match(close_brace + 1) == (close_brace, open_brace, True)
+        assert index.find_match(text.index("(")) == (text.index("("), text.index(")"), True)
+        assert index.find_match(text.index("return")) is None
+
+    def test_brackets_in_multiline_strings_are_ignored(self, qtbot):
+        """Brackets inside a string that spans lines do not count."""
+        text = 'x = (\n"""\n)\n"""\n)'
+        document = make_document(text)
+        index = BracketIndex(document, "python")
+
+        assert index.find_match(4) == (4, len(text) - 1, True)
+
+    def test_edits_update_the_index(self, qtbot):
+        """Summaries of edited blocks are recomputed, including blocks whose string state changed."""
+        text = "a = [\n1,\n]\n"
+        document = make_document(text)
+        index = BracketIndex(document, "python")
+        assert index.find_match(4) == (4, 9, True)
+
+        cursor = QTextCursor(document)
+        cursor.setPosition(6)
+        cursor.insertText("(\n")
+        assert index.find_match(4) == (4, None, False)
+        assert index.find_match(6) == (6, 11, False)  # "(" closed by "]"
+
+        cursor.insertText(")\n")
+        assert index.find_match(4) == (4, 13, True)
+
+        # Opening a string above hides the brackets below it
+        cursor.setPosition(0)
+        cursor.insertText('"""\n')
+        assert index.find_match(8) is None
+
+    def test_unbalanced_and_mismatched_brackets(self, qtbot):
+        """An unclosed bracket has no match; a wrong kind is reported as such."""
+        document = make_document("(\n[\n)")
+        index = BracketIndex(document)
+
+        assert index.find_match(0) == (0, None, False)
+        assert index.find_match(2) == (2, 4, False)
+
+    def test_goto_matching_bracket(self, qtbot):
+        """The editor jumps to the match and highlights both brackets."""
+        editor = TextEditor()
+        qtbot.addWidget(editor)
+        editor.setPlainText("f(x,\n  [y])")
+
+        assert len(editor.extraSelections()) == 0
+        cursor = editor.textCursor()
+        cursor.setPosition(1)
+        editor.setTextCursor(cursor)
+
+        assert len(editor.extraSelections()) == 2
+        assert editor.goto_matching_bracket()
+        assert editor.textCursor().position() == 10
+
+        cursor.setPosition(3)
+        editor.setTextCursor(cursor)
+        assert not editor.goto_matching_bracket()
+
+    def test_jump_to_the_end_leaves_summaries_to_the_background(self, qtbot, monkeypatch):
+        """Moving to the end of a large document summarizes nothing on the spot; the match shows once built."""
+        editor = TextEditor()
+        qtbot.addWidget(editor)
+        editor.setPlainText("f(x)\n" * 20000 + "g(y)")
+        summarized = []
+        summarize = bracket_index.summarize_brackets
+        monkeypatch.setattr(bracket_index, "summarize_brackets",
+                            lambda *args: summarized.append(1) or summarize(*args))
+
+        editor.moveCursor(QTextCursor.End)
+        assert len(summarized) <= BracketIndex.FIND_BLOCKS
+        assert editor._extra_selections["brackets"] == []
+
+        qtbot.waitUntil(lambda: len(editor._extra_selections["brackets"]) == 2)
+        end = len(editor.toPlainText())
+        assert [selection.cursor.selectionStart() for selection in editor._extra_selections["brackets"]] \
+            == [end - 1, end - 3]
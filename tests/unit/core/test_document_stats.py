@@ -0,0 +1,145 @@
+import random
+
+import pytest
+from PyQt5.QtWidgets import QMainWindow
+
+from core import document_stats
+from core.document_stats import (BlockTexts, DocumentStats, MIN_CHUNK_CHARS, is_cut_line, split_chunks,
+                                 summarize_chunk)
+from core.text_editor import TextEditor
+from ui.statistics_dialog import StatisticsDialog
+
+PROSE = ["The cat sat. The dog ran!", "A heading", "", "Is it done? Yes, the end.", ""]
+
+
+def make_lines(count, seed=3):
+    """Build many random lines of short sentences."""
+    rng = random.Random(seed)
+    words = "the a cat dog sat ran far away. then? yes! quite".split()
+    return [" ".join(rng.choice(words) for _ in range(rng.randrange(0, 12))) for _ in range(count)]
+
+
+class TestDocumentStats:
+    """Test cases for the document statistics."""
+
+    def test_statistics(self):
+        """Words are counted case-insensitively, with sentences and line lengths."""
+        results = DocumentStats().update(PROSE)
+
+        assert results["top_words"][0] == ("the", 3)
+        assert results["unique_words"] == 12
+        assert results["sentence_length"] == pytest.approx(14 / 5)  # "A heading" ends unfinished
+        assert results["line_lengths"] == [3, 2, 0, 0, 0]  # Blank lines included
+
+    def test_empty_text(self):
+        """An empty text is a single empty line with no words."""
+        results = DocumentStats().update([""])
+
+        assert results["top_words"] == []
+        assert results["sentence_length"] == 0.0
+        assert results["line_lengths"] == [1, 0, 0, 0, 0]
+
+    def test_chunks_cover_all_lines(self):
+        """Chunks follow each other without gaps and are long enough."""
+        lines = make_lines(5000)
+        bounds = split_chunks(lines)
+
+        assert bounds[0][0] == 0 and bounds[-1][1] == len(lines)
+        assert all(end == start for (_, end), (start, _) in zip(bounds, bounds[1:]))
+        assert len(bounds) > 1
+        assert all(sum(len(line) + 1 for line in lines[start:end]) >= MIN_CHUNK_CHARS
+                   for start, end in bounds[:-1])
+
+    def test_edits_only_resummarize_nearby_chunks(self, monkeypatch):
+        """Updating after an edit anywhere gives the same results as starting over, reusing most chunks."""
+        lines = make_lines(20000)
+        stats = DocumentStats()
+        original = stats.update(lines)
+        summarized = []
+
+        def counting(chunk):
+            summarized.append(chunk)
+            return summarize_chunk(chunk)
+
+        for position in (0, 1, 7777, 15001, 20000):
+            for edited in (lines[:position] + ["Inserted words here."] + lines[position:],
+                           lines[:position] + lines[position + 1:]):
+                summarized.clear()
+                monkeypatch.setattr(document_stats, "summarize_chunk", counting)
+                results = stats.update(edited)
+                monkeypatch.undo()
+
+                assert results == DocumentStats().update(edited)
+                assert len(summarized) <= 3, position
+                assert stats.update(lines) == original
+
+    def test_chunks_do_not_depend_on_the_hash_seed(self):
+        """The cuts come from the lines' content, so every process cuts a text the same way."""
+        assert [is_cut_line(line) for line in ("", "a", "The cat sat.", "x" * 10000)] == [False, False, False, True]
+        assert split_chunks(make_lines(5000))[:3] == [(0, 373), (373, 3018), (3018, 3446)]
+
+    def test_block_texts(self, qtbot):
+        """Block snapshots follow edits; after large ones, blocks are read in the background."""
+        editor = TextEditor()
+        qtbot.addWidget(editor)
+        editor.setPlainText("one\ntwo")
+        block_texts = BlockTexts(editor.document())
+        assert block_texts.snapshot() is None
+        with qtbot.waitSignal(block_texts.filled):
+            pass
+        assert [text for _, text in block_texts.snapshot()] == ["one", "two"]
+
+        editor.appendPlainText("three")
+        assert [text for _, text in block_texts.snapshot()] == ["one", "two", "three"]
+        editor.setPlainText("x\n" * 100)
+        assert block_texts.snapshot() is None
+        with qtbot.waitSignal(block_texts.filled):
+            pass
+        assert [text for _, text in block_texts.snapshot()] == ["x"] * 100 + [""]
+
+    def test_equal_chunk_hashes_are_not_merged(self, monkeypatch):
+        """Chunks are told apart by their lines, not only by their hash."""
+        class Line(str):
+            def __hash__(self):
+                return 0
+
+        monkeypatch.setattr(document_stats, "split_chunks", lambda lines: [(index, index + 1)
+                                                                           for index in range(len(lines))])
+        results = DocumentStats().update([Line("alpha"), Line("beta")])
+
+        assert results["unique_words"] == 2
+
+
+class TestStatisticsDialog:
+    """Test cases for the statistics panel."""
+
+    def test_shows_statistics_of_current_editor(self, qtbot):
+        """The panel shows the counters at once and the rest when the worker is done."""
+        window = QMainWindow()
+        qtbot.addWidget(window)
+        window.text_editor = TextEditor()
+        window.text_editor.setPlainText("\n".join(PROSE))
+        dialog = StatisticsDialog(window)
+
+        dialog.show()
+        assert dialog.words_label.text() == "14"
+        assert dialog.lines_label.text() == "5"
+        qtbot.waitUntil(lambda: dialog.unique_words_label.text() == "12")
+        qtbot.waitUntil(lambda: dialog.worker is None)
+
+        assert dialog.top_words_label.text().startswith("the (3)")
+        assert dialog.reading_time_label.text() == "Less than a minute"
+        assert [bar.value() for bar in dialog.histogram_bars] == [3, 2, 0, 0, 0]
+
+    def test_refreshes_after_edits(self, qtbot):
+        """Edits to the watched editor refresh the panel after a delay."""
+        window = QMainWindow()
+        qtbot.addWidget(window)
+        window.text_editor = TextEditor()
+        dialog = StatisticsDialog(window)
+        dialog.show()
+        qtbot.waitUntil(lambda: dialog.worker is None)
+
+        window.text_editor.setPlainText("word word word")
+        qtbot.waitUntil(lambda: dialog.top_words_label.text() == "word (3)", timeout=3000)
+        assert dialog.words_label.text() == "3"
@@ -0,0 +1,120 @@
+import pytest
+from PyQt5.QtGui import QTextCursor, QTextDocument
+from PyQt5.QtWidgets import QPlainTextDocumentLayout
+
+from core.bracket_index import BracketIndex
+from core.fold_index import FoldIndex, indentation
+from core.text_editor import TextEditor
+
+PYTHON = "import os\n\ndef f(x):\n    if x:\n        return 1\n\n    return 2\n\nvalues = [\n1,\n2,\n]\n"
+
+
+def make_index(text, language="python"):
+    """Create a fold index over a document laid out as in the editor."""
+    document = QTextDocument()
+    document.setDocumentLayout(QPlainTextDocumentLayout(document))
+    document.setPlainText(text)
+    return document, FoldIndex(document, BracketIndex(document, language))
+
+
+class TestFoldIndex:
+    """Test cases for the fold index."""
+
+    def test_indentation(self):
+        """Tabs count to the next tab stop and blank lines have no indentation."""
+        assert indentation("    x") == 4
+        assert indentation("\t  x") == 6
+        assert indentation("   ") is None
+
+    def test_regions_from_indentation_and_brackets(self, qtbot):
+        """Indented blocks fold up to their last non-blank line; brackets up to the closing line."""
+        document, index = make_index(PYTHON)
+
+        assert index.region_end(2) == 6  # def f, without the trailing blank line
+        assert index.region_end(3) == 4
+        assert index.region_end(8) == 10  # values = [ ... ] keeps "]" visible
+        assert index.region_end(0) is None
+        assert index.top_level_regions() == [(2, 6), (8, 10)]
+
+    def test_top_level_regions_agree_with_region_end(self, qtbot):
+        """The one-pass listing finds the regions that walking region_end from the top finds."""
+        text = "a = (\n\n\t1,\n)\n\n\nif x:\n\ty = [\n1]\n  \n\tz\nw = {'{': 1}\nclass C:\n\n    pass\n"
+        document, index = make_index(text)
+
+        expected = []
+        number = 0
+        while number < document.blockCount():
+            end = index.region_end(number)
+            if end is None:
+                number += 1
+            else:
+                expected.append((number, end))
+                number = end + 1
+        assert index.top_level_regions() == expected == [(0, 2), (6, 7), (8, 10), (12, 14)]
+
+    def test_enclosing_region(self, qtbot):
+        """The innermost region around a line is found from inside it."""
+        document, index = make_index(PYTHON)
+
+        assert index.enclosing_region(4) == (3, 4)
+        assert index.enclosing_region(6) == (2, 6)
+        assert index.enclosing_region(9) == (8, 10)
+        assert index.enclosing_region(0) is None
+
+    def test_edits_update_regions(self, qtbot):
+        """Only edited blocks are recomputed, and regions follow inserted lines."""
+        document, index = make_index(PYTHON)
+        assert index.region_end(2) == 6
+
+        cursor = QTextCursor(document.findBlockByNumber(4))
+        cursor.movePosition(QTextCursor.EndOfBlock)
+        cursor.insertText("\n        y = 2")
+        assert index.region_end(2) == 7
+
+        # Dedenting the body ends the region early
+        cursor = QTextCursor(document.findBlockByNumber(3))
+        cursor.movePosition(QTextCursor.Right, QTextCursor.KeepAnchor, 4)
+        cursor.removeSelectedText()
+        assert index.region_end(2) is None
+        assert index.region_end(3) == 7  # Now heads the rest of the old body
+
+
+class TestEditorFolding:
+    """Test cases for folding in the editor."""
+
+    def test_fold_all_and_unfold_all(self, qtbot):
+        """Folding hides the region bodies and unfolding shows them again."""
+        editor = TextEditor()
+        qtbot.addWidget(editor)
+        editor.setPlainText(PYTHON)
+
+        editor.fold_all()
+        hidden = [block for block in range(editor.document().blockCount())
+                  if not editor.document().findBlockByNumber(block).isVisible()]
+        assert hidden == [3, 4, 5, 6, 9, 10]
+        assert editor.is_folded(editor.document().findBlockByNumber(2))
+
+        editor.unfold_all()
+        assert all(editor.document().findBlockByNumber(block).isVisible() for block in hidden)
+
+    def test_toggle_fold_and_reveal_cursor(self, qtbot):
+        """Toggling folds the region at the cursor; moving the cursor into it unfolds it."""
+        editor = TextEditor()
+        qtbot.addWidget(editor)
+        editor.setPlainText(PYTHON)
+        document = editor.document()
+
+        cursor = editor.textCursor()
+        cursor.setPosition(document.findBlockByNumber(4).position())
+        editor.setTextCursor(cursor)
+        assert editor.toggle_fold()
+        assert editor.textCursor().blockNumber() == 3
+        assert not document.findBlockByNumber(4).isVisible()
+
+        cursor.setPosition(document.findBlockByNumber(4).position())
+        editor.setTextCursor(cursor)
+        assert document.findBlockByNumber(4).isVisible()
+
+        cursor.setPosition(0)
+        editor.setTextCursor(cursor)
+        assert not editor.toggle_fold()
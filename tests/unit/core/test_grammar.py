@@ -0,0 +1,99 @@
+import json
+
+import pytest
+
+from core import grammar
+from core.grammar import GrammarError, available_grammars, compile_grammar, load_rules
+from core.lexer import Tokenizer
+
+
+SAMPLES = {
+    "json": ('{"name": "x", "size": 3, "ok": true}', {"property", "string", "number", "keyword"}),
+    "yaml": ("name: x  # who\nsize: 3\nok: yes", {"property", "comment", "number", "keyword"}),
+    "markdown": ("# Title\nSome **bold** and a [link](http://x) and `code`.", {"heading", "emphasis", "link", "string"}),
+    "shell": ('#!/bin/sh\nif [ -n "$HOME" ]; then echo $USER; fi', {"comment", "keyword", "string", "property"}),
+    "sql": ("SELECT id FROM users WHERE name = 'x' -- all\nlimit 10", {"keyword", "string", "comment", "number"}),
+    "go": ('package main\nfunc main() { var n int = 0x1F; fmt.Println("hi") }', {"keyword", "function", "type", "number", "string"}),
+    "rust": ("fn main() { let s: &'static str = \"hi\"; println!(\"{}\", s); }", {"keyword", "function", "type", "string"}),
+    "python": ("def f(x):\n    return 'x'  # done", {"function", "keyword", "string", "comment"}),
+    "javascript": ("function f() { return 'x'; } // done", {"function", "keyword", "string", "comment"}),
+    "cpp": ('#include <vector>\nint main() { return 0; } /* done */', {"preprocessor", "keyword", "comment"}),
+}
+
+
+def token_types(language, text):
+    """Tokenize a multi-line sample and collect the token types seen."""
+    tokenizer = Tokenizer(load_rules(language))
+    seen = set()
+    state = Tokenizer.NORMAL_STATE
+    for line in text.split("\n"):
+        spans, state = tokenizer.tokenize(line, state)
+        seen.update(token_type for _, _, token_type in spans)
+    return seen
+
+
+class TestGrammar:
+    """Test cases for data-driven grammars."""
+
+    def test_shipped_grammars(self):
+        """Test that every common format ships a grammar with a sample here."""
+        assert set(available_grammars()) == set(SAMPLES)
+
+    @pytest.mark.parametrize("language", sorted(SAMPLES))
+    def test_grammar_compiles_and_tokenizes(self, language):
+        """Test that a shipped grammar compiles and finds its main token types."""
+        text, expected = SAMPLES[language]
+        assert expected <= token_types(language, text)
+
+    def test_markdown_fenced_code_spans_lines(self):
+        """Test that a fenced code block is one multi-line construct."""
+        tokenizer = Tokenizer(load_rules("markdown"))
+        _, state = tokenizer.tokenize("```python")
+        spans, state = tokenizer.tokenize("# not a heading", state)
+        assert spans == [(0, 15, "string")]
+        _, state = tokenizer.tokenize("```", state)
+        assert state == Tokenizer.NORMAL_STATE
+
+    def test_rules_are_compiled_once(self, monkeypatch):
+        """Test that a language's rules are compiled on first use only."""
+        monkeypatch.setattr(grammar, "_rules", {})
+        rules = load_rules("go")
+
+        def fail(data):
+            raise AssertionError("grammar was recompiled")
+
+        monkeypatch.setattr(grammar, "compile_grammar", fail)
+        assert load_rules("go") is rules
+
+    def test_listing_reads_no_grammar(self, tmp_path, monkeypatch):
+        """Test that grammars are listed from file names and the manifest alone."""
+        grammar_dir = tmp_path / "grammars"
+        grammar_dir.mkdir()
+        (grammar_dir / "demo.json").write_text("not parsed")
+        (grammar_dir / "extra.json").write_text("not parsed")
+        (grammar_dir / "index.json").write_text(json.dumps(
+            {"demo": {"label": "Demo", "extensions": [".DEM"], "shebangs": ["demo"]}}))
+        monkeypatch.setattr(grammar, "GRAMMAR_DIR", str(grammar_dir))
+        monkeypatch.setattr(grammar, "_index", None)
+
+        listed = available_grammars()
+        assert set(listed) == {"demo", "extra"}
+        assert listed["demo"]["label"] == "Demo"
+        assert listed["demo"]["extensions"] == [".dem"]
+        assert listed["extra"] == {"path": str(grammar_dir / "extra.json"), "label": "Extra",
+                                   "extensions": [], "shebangs": []}
+
+    @pytest.mark.parametrize("rule, message", [
+        ({"token": "bogus", "match": "x"}, "unknown token type"),
+        ({"token": "string", "match": "("}, "missing"),
+        ({"token": "string", "match": "(a)"}, "capturing groups"),
+        ({"token": "string"}, "needs"),
+    ])
+    def test_invalid_grammar_is_rejected(self, rule, message):
+        """Test that malformed rules raise GrammarError with the reason."""
+        with pytest.raises(GrammarError, match=message):
+            compile_grammar({"name": "demo", "rules": [rule]})
+
+    def test_ignore_case_rule(self):
+        """Test that ignore_case rules match in any case."""
+        assert "keyword" in token_types("sql", "select 1 FROM t")
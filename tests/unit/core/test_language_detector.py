@@ -0,0 +1,69 @@
+import os
+
+import pytest
+
+from core import language_detector
+from core.language_detector import classify_content, detect_language, language_from_extension, language_from_shebang
+
+
+class TestLanguageDetector:
+    """Test cases for language detection."""
+
+    @pytest.mark.parametrize("file_path, expected", [
+        ("script.py", "python"),
+        ("C:/code/App.JSX", "javascript"),
+        ("vector.hpp", "cpp"),
+        ("notes.py.enc", "python"),
+        ("notes.txt", None),
+        ("Makefile", None),
+    ])
+    def test_language_from_extension(self, file_path, expected):
+        """Test that extensions map to languages, also inside encrypted file names."""
+        assert language_from_extension(file_path) == expected
+
+    @pytest.mark.parametrize("head, expected", [
+        ("#!/usr/bin/env python3\nprint(1)", "python"),
+        ("#!/usr/bin/python2.7 -u\n", "python"),
+        ("#!/usr/bin/env -S node --harmony\n", "javascript"),
+        ("#!/bin/sh\n", "shell"),
+        ("#!/usr/bin/awk -f\n", None),
+        ("print(1)\n", None),
+    ])
+    def test_language_from_shebang(self, head, expected):
+        """Test that the interpreter on a '#!' line picks the language."""
+        assert language_from_shebang(head) == expected
+
+    @pytest.mark.parametrize("head, expected", [
+        ("import os\n\nclass Config:\n    def load(self, path):\n        return self.path\n", "python"),
+        ("const fs = require('fs');\nconsole.log(fs.readdirSync('.'));\n", "javascript"),
+        ("#include <vector>\nint main() {\n    std::vector<int> v;\n}\n", "cpp"),
+        ("Dear diary, today I wrote some code.\n", None),
+    ])
+    def test_classify_content(self, head, expected):
+        """Test that the content classifier recognises typical code and leaves prose alone."""
+        assert classify_content(head) == expected
+
+    def test_detection_is_cached_per_path_until_file_changes(self, tmp_path, monkeypatch):
+        """Test that a file is classified once, and again after it changes."""
+        monkeypatch.setattr(language_detector, "_detected", {})
+        calls = []
+        original = language_detector.classify_content
+        monkeypatch.setattr(language_detector, "classify_content",
+                            lambda head: calls.append(head) or original(head))
+
+        path = tmp_path / "notes"
+        path.write_text("#include <map>\nstd::map<int, int> m;\n")
+        head = path.read_text()
+        assert detect_language(str(path), head) == "cpp"
+        assert detect_language(str(path), head) == "cpp"
+        assert len(calls) == 1
+
+        path.write_text("from os import path\n\ndef run():\n    pass\n")
+        os.utime(path, ns=(0, 0))  # Make sure the stamp changes even on coarse clocks
+        assert detect_language(str(path), path.read_text()) == "python"
+        assert len(calls) == 2
+
+    def test_unsaved_document_is_classified_by_content(self):
+        """Test that a document without a path falls back to shebang and content."""
+        assert detect_language("", "#!/usr/bin/env node\n") == "javascript"
+        assert detect_language("", "hello") is None
@@ -0,0 +1,73 @@
+from array import array
+
+from core import lexer
+from core.lexer import TOKEN_INDEX, TokenCache, Tokenizer, get_tokenizer, tokenize_lines
+
+
+class TestLexer:
+    """Test cases for the Qt-free lexer."""
+
+    def test_tokenize_compact_uses_utf16_positions(self):
+        """Test that compact spans are flat triples counted in UTF-16 units."""
+        spans, state = get_tokenizer("python").tokenize_compact("x = '🎉' # done")
+
+        assert list(spans) == [4, 4, TOKEN_INDEX["string"], 9, 6, TOKEN_INDEX["comment"]]
+        assert state == Tokenizer.NORMAL_STATE
+
+    def test_tokenize_lines_carries_state(self):
+        """Test that each line starts from the state the previous line ended in."""
+        results = tokenize_lines("cpp", ["int a; /* open", "if (x)", "*/ return;"])
+
+        start_states = [start for start, _, _ in results]
+        end_states = [end for _, _, end in results]
+        assert start_states == [0, end_states[0], end_states[1]]
+        assert end_states[0] == end_states[1] != 0
+        assert end_states[2] == 0
+        assert list(results[1][1]) == [0, 6, TOKEN_INDEX["comment"]]
+
+    def test_unknown_language_has_no_tokenizer(self):
+        """Test that plain text is not tokenized."""
+        assert get_tokenizer("plain") is None
+
+    def test_token_cache_counts_hits_and_keys_on_state(self):
+        """Test that a line is only reused when it starts in the same state."""
+        cache = TokenCache()
+        spans = array('i', [0, 2, TOKEN_INDEX["keyword"]])
+
+        assert cache.get("python", 0, "if x") is None
+        cache.put("python", 0, "if x", spans, 0)
+        assert cache.get("python", 0, "if x") == (spans, 0)
+        assert cache.get("python", 1, "if x") is None
+        assert cache.get("cpp", 0, "if x") is None
+
+        stats = cache.stats()
+        assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 3, 1)
+        assert stats["hit_rate"] == 0.25
+
+    def test_token_cache_evicts_least_recently_used(self):
+        """Test that the cache stays within its memory budget, dropping the oldest lines first."""
+        spans = array('i')
+        sizer = TokenCache()
+        sizer.put("python", 0, "line 00", spans, 0)
+        cache = TokenCache(max_bytes=sizer.size * 20)
+
+        for number in range(20):
+            cache.put("python", 0, f"line {number:02d}", spans, 0)
+        cache.get("python", 0, "line 00")  # Now the most recently used
+        cache.put("python", 0, "line 20", spans, 0)
+
+        assert cache.get("python", 0, "line 01") is None
+        assert cache.get("python", 0, "line 00") is not None
+        assert cache.size <= cache.max_bytes
+
+        cache.set_budget(0)
+        assert cache.stats()["entries"] == 0
+
+    def test_repeated_lines_skip_tokenization(self, monkeypatch):
+        """Test that identical lines are tokenized once."""
+        monkeypatch.setattr(lexer, "_token_cache", TokenCache())
+        results = tokenize_lines("python", ["x = 1  # log line"] * 100)
+
+        assert lexer.get_token_cache().stats()["misses"] == 1
+        assert lexer.get_token_cache().stats()["hits"] == 99
+        assert all(result == results[0] for result in results)
@@ -0,0 +1,73 @@
+from unittest.mock import Mock
+
+import pytest
+
+from core import bracket_index
+from core.bracket_index import BracketIndex
+from core.notepad_window import NotepadWindow
+from core.text_editor import TextEditor
+
+TEXT = "Foo bar foo\nbaz FOO\nqux"
+
+
+@pytest.fixture
+def window(qtbot):
+    """A stand-in window with a real editor for the window's search methods."""
+    editor = TextEditor()
+    qtbot.addWidget(editor)
+    editor.setPlainText(TEXT)
+    window = Mock()
+    window.text_editor = editor
+    window.find_text_advanced = lambda *args: NotepadWindow.find_text_advanced(window, *args)
+    return window
+
+
+class TestNotepadWindowSearch:
+    """Test cases for the search methods the Find and Replace dialog calls."""
+
+    def test_find_text_advanced(self, window):
+        """The next occurrence after the selection gets selected."""
+        assert NotepadWindow.find_text_advanced(window, "foo")
+        assert window.text_editor.textCursor().selectionStart() == 0
+        assert NotepadWindow.find_text_advanced(window, "foo")
+        assert window.text_editor.textCursor().selectionStart() == 8
+
+    def test_find_text_advanced_not_found(self, window):
+        """A missing text is reported in the status bar."""
+        assert not NotepadWindow.find_text_advanced(window, "missing")
+        window.status_bar.show_message.assert_called_once_with('Cannot find "missing"', 3000)
+
+    def test_replace_current_selection(self, window):
+        """The selected occurrence is replaced and the next one selected."""
+        assert not NotepadWindow.replace_current_selection(window, "foo", "x")
+        assert window.text_editor.textCursor().selectedText() == "Foo"
+
+        assert NotepadWindow.replace_current_selection(window, "foo", "x")
+        assert window.text_editor.toPlainText() == "x bar foo\nbaz FOO\nqux"
+        assert window.text_editor.textCursor().selectedText() == "foo"
+
+    def test_replace_all_text(self, window):
+        """All occurrences are replaced, leaving the cursor in place."""
+        cursor = window.text_editor.textCursor()
+        cursor.setPosition(4)
+        window.text_editor.setTextCursor(cursor)
+
+        assert NotepadWindow.replace_all_text(window, "foo", "quux") == 3
+        assert window.text_editor.toPlainText() == "quux bar quux\nbaz quux\nqux"
+        assert window.text_editor.textCursor().position() == 4
+
+    def test_replace_all_leaves_index_work_to_the_background(self, window, qtbot, monkeypatch):
+        """Replacing throughout a large document does not rebuild the bracket index on the spot."""
+        editor = window.text_editor
+        editor.setPlainText("f(foo)\n" * 20000)
+        qtbot.waitUntil(lambda: not editor.bracket_index._build_timer.isActive())
+        editor.moveCursor(editor.textCursor().End)
+        editor.moveCursor(editor.textCursor().Left)
+        summarized = []
+        summarize = bracket_index.summarize_brackets
+        monkeypatch.setattr(bracket_index, "summarize_brackets",
+                            lambda *args: summarized.append(1) or summarize(*args))
+
+        assert NotepadWindow.replace_all_text(window, "foo", "quux") == 20000
+        assert len(summarized) <= BracketIndex.FIND_BLOCKS
+        qtbot.waitUntil(lambda: len(editor._extra_selections["brackets"]) == 2)
@@ -21,6 +21,37 @@ class TestDocumentTab:
             assert tab.is_modified == False
             assert tab.text_editor == mock_editor_instance
 
+    def test_each_tab_detects_its_own_language(self, qtbot, tmp_path):
+        """Test that tabs get their own highlighter in the language of their file."""
+        script = tmp_path / "tool.py"
+        script.write_text("print('hi')\n")
+        unknown = tmp_path / "build"
+        unknown.write_text("#include <cstdio>\nint main() { std::puts(\"hi\"); }\n")
+
+        python_tab, cpp_tab, text_tab = DocumentTab(), DocumentTab(), DocumentTab()
+        for tab, path in ((python_tab, script), (cpp_tab, unknown), (text_tab, tmp_path / "notes.txt")):
+            qtbot.addWidget(tab)
+            tab.text_editor.set_content(path.read_text() if path.exists() else "Shopping list")
+            tab.file_path = str(path)
+            tab.update_language()
+
+        assert python_tab.text_editor.get_current_language() == "python"
+        assert cpp_tab.text_editor.get_current_language() == "cpp"
+        assert not text_tab.text_editor.is_syntax_highlighting_enabled()
+        assert python_tab.text_editor.syntax_highlighter is not cpp_tab.text_editor.syntax_highlighter
+
+    def test_language_chosen_by_hand_is_kept(self, qtbot):
+        """Test that detection does not override a language picked in the dialog."""
+        tab = DocumentTab()
+        qtbot.addWidget(tab)
+        tab.text_editor.enable_syntax_highlighting("javascript")
+        tab.language_chosen = True
+        tab.file_path = "script.py"
+
+        tab.update_language()
+
+        assert tab.text_editor.get_current_language() == "javascript"
+
 
 class TestNotepadWindowTabs:
     """Test cases for tab functionality in NotepadWindow."""
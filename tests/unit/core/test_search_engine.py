@@ -0,0 +1,247 @@
+import gc
+import re
+import weakref
+
+import pytest
+from PyQt5.QtGui import QTextCursor, QTextDocument
+from PyQt5.QtWidgets import QMainWindow, QPlainTextDocumentLayout
+
+from core.search_engine import MatchCounter, find_in_range, find_next, is_match, replace_all, utf16_length
+from core.text_editor import TextEditor
+from ui.find_replace_dialog import FindReplaceDialog
+
+TEXT = "Foo bar foo\nbaz FOO\nqux"
+
+
+def make_document(text):
+    """Create a document laid out as in the editor."""
+    document = QTextDocument()
+    document.setDocumentLayout(QPlainTextDocumentLayout(document))
+    document.setPlainText(text)
+    return document
+
+
+class TestSearchEngine:
+    """Test cases for the search engine behind Find and Replace."""
+
+    def test_find_next(self, qtbot):
+        """Occurrences are found from a position, ignoring case unless asked."""
+        document = make_document(TEXT)
+
+        cursor = find_next(document, "foo", 1)
+        assert (cursor.selectionStart(), cursor.selectionEnd()) == (8, 11)
+        assert find_next(document, "foo", 1, match_case=True).selectionStart() == 8
+        assert find_next(document, "FOO", 0, match_case=True).selectionStart() == 16
+
+    def test_find_next_wraps_around(self, qtbot):
+        """Past the last occurrence the search starts over from the top, if asked to."""
+        document = make_document(TEXT)
+
+        assert find_next(document, "foo", 19).selectionStart() == 0
+        assert find_next(document, "foo", 19, wrap_around=False) is None
+        assert find_next(document, "missing", 0) is None
+        assert find_next(document, "", 0) is None
+
+    def test_is_match(self):
+        """Only a whole occurrence of the query matches."""
+        assert is_match("FOO", "foo")
+        assert not is_match("FOO", "foo", match_case=True)
+        assert not is_match("foo ", "foo")
+        assert is_match("a.b", "a.b")
+        assert not is_match("axb", "a.b")
+
+    def test_utf16_length(self):
+        """Characters outside the BMP count as two positions."""
+        assert utf16_length("abc") == 3
+        assert utf16_length("a\U0001F600b") == 4
+
+    def test_find_in_range(self, qtbot):
+        """Occurrences overlapping the range are found, in document positions."""
+        document = make_document("\U0001F600foo\nfoo foo\nfoo")
+
+        assert find_in_range(document, "foo", 0, 100) == [(2, 5), (6, 9), (10, 13), (14, 17)]
+        assert find_in_range(document, "foo", 4, 11) == [(2, 5), (6, 9), (10, 13)]
+        assert find_in_range(document, "FOO", 0, 100, match_case=True) == []
+        assert find_in_range(document, "", 0, 100) == []
+
+    def test_find_in_range_long_line(self, qtbot):
+        """Within a long line only the part in range is searched."""
+        document = make_document("ab" * 50000)
+
+        assert find_in_range(document, "ba", 1000, 1004) == [(999, 1001), (1001, 1003), (1003, 1005)]
+
+    def test_replace_all(self, qtbot):
+        """Every occurrence is replaced and counted."""
+        document = make_document(TEXT)
+
+        assert replace_all(document, "foo", "x") == 3
+        assert document.toPlainText() == "x bar x\nbaz x\nqux"
+
+    def test_replace_all_match_case(self, qtbot):
+        """With match case, only occurrences of the same case are replaced."""
+        document = make_document(TEXT)
+
+        assert replace_all(document, "foo", "x", match_case=True) == 1
+        assert document.toPlainText() == "Foo bar x\nbaz FOO\nqux"
+
+    def test_replace_all_no_match(self, qtbot):
+        """Without occurrences the document is left alone."""
+        document = make_document(TEXT)
+
+        assert replace_all(document, "missing", "x") == 0
+        assert replace_all(document, "", "x") == 0
+        assert document.toPlainText() == TEXT
+        assert not document.isUndoAvailable()
+
+    def test_replace_all_is_one_undo_step(self, qtbot):
+        """Replacing many occurrences is undone at once and changes the text once."""
+        text = "foo bar\n" * 1000
+        document = make_document(text)
+        changes = []
+        document.contentsChange.connect(lambda *args: changes.append(args))
+
+        assert replace_all(document, "foo", "quux") == 1000
+        assert document.toPlainText() == "quux bar\n" * 1000
+        assert len(changes) == 1
+
+        document.undo()
+        assert document.toPlainText() == text
+        assert not document.isUndoAvailable()
+
+    def test_replace_all_keeps_text_around_matches(self, qtbot):
+        """Only the span from the first to the last occurrence is edited."""
+        document = make_document("head\n\U0001F600 foo mid foo\ntail")
+        changes = []
+        document.contentsChange.connect(lambda *args: changes.append(args))
+
+        assert replace_all(document, "foo", "x") == 2
+        assert document.toPlainText() == "head\n\U0001F600 x mid x\ntail"
+        assert changes[0][0] == 8  # After the surrogate pair
+
+    def test_replace_all_literal_replacement(self, qtbot):
+        """Backslashes and regular expression characters are taken literally."""
+        document = make_document("a.b axb a.b")
+
+        assert replace_all(document, "a.b", r"\1\n$") == 2
+        assert document.toPlainText() == r"\1\n$ axb \1\n$"
+
+
+def count_matches(qtbot, document, query, match_case=False, chunk_size=None):
+    """Count the occurrences of a query with a match counter."""
+    counter = MatchCounter()
+    if chunk_size is not None:
+        counter.CHUNK_SIZE = chunk_size
+    with qtbot.waitSignal(counter.counted) as blocker:
+        counter.start(document, query, match_case)
+    return blocker.args[0]
+
+
+class TestMatchCounter:
+    """Test cases for counting occurrences in the background."""
+
+    @pytest.mark.parametrize("query, match_case", [
+        ("foo", False), ("FOO", True), ("o", False), ("oo", False), ("\U0001F600", False), ("\u00e9", False),
+    ])
+    def test_counts_like_a_full_scan(self, qtbot, query, match_case):
+        """Chunks, long lines and overlapping occurrences give the count of a scan of the whole text."""
+        text = "foo FOO \u00c9\u00e9 ooo\n" * 50 + "\U0001F600fooooo" * 200 + "\nend"
+        document = make_document(text)
+
+        expected = len(re.findall(re.escape(query), text, 0 if match_case else re.IGNORECASE))
+        assert count_matches(qtbot, document, query, match_case, chunk_size=64) == expected
+
+    def test_restarts_on_edit(self, qtbot):
+        """An edit while counting starts the count over."""
+        document = make_document("foo\n" * 1000)
+        counter = MatchCounter()
+        counter.start(document, "foo")
+
+        QTextCursor(document).insertText("foo")
+        with qtbot.waitSignal(counter.counted) as blocker:
+            pass
+        assert blocker.args == [1001]
+
+    def test_cancel(self, qtbot):
+        """A cancelled count never reports."""
+        document = make_document("foo")
+        counter = MatchCounter()
+        counted = []
+        counter.counted.connect(counted.append)
+
+        counter.start(document, "foo")
+        counter.cancel()
+        qtbot.wait(20)
+        assert counted == []
+        assert not counter.is_counting()
+
+
+class TestSearchHighlight:
+    """Test cases for highlighting the search text in the editor."""
+
+    def test_highlights_visible_occurrences(self, qtbot):
+        """Only occurrences in view are highlighted, next to the other highlights."""
+        editor = TextEditor()
+        qtbot.addWidget(editor)
+        editor.setPlainText("foo\n" * 5000)
+        editor.resize(400, 300)
+        editor.show()
+
+        editor.set_search("foo")
+        searched = [selection for selection in editor.extraSelections()
+                    if selection.format.background().color() == editor.SEARCH_COLOR]
+        assert 0 < len(searched) < 100
+        assert searched[0].cursor.selectedText() == "foo"
+
+        editor.set_search("")
+        assert not any(selection.format.background().color() == editor.SEARCH_COLOR
+                       for selection in editor.extraSelections())
+
+    def test_replaced_highlights_are_freed_at_once(self, qtbot):
+        """Highlights that were replaced or cleared do not wait for the garbage collector."""
+        editor = TextEditor()
+        qtbot.addWidget(editor)
+        editor.setPlainText("foo\n" * 50)
+        editor.show()
+
+        editor.set_search("foo")
+        old = weakref.ref(editor._extra_selections["search"][0])
+        gc.disable()
+        try:
+            editor.set_search("fo")
+            assert old() is None
+
+            old = weakref.ref(editor._extra_selections["search"][0])
+            editor.clear_highlights()
+            assert old() is None
+            assert editor.extraSelections() == []
+        finally:
+            gc.enable()
+
+        with qtbot.waitSignal(editor._highlight_timer.timeout):
+            editor.insertPlainText("x")
+        assert editor._extra_selections["search"]
+
+
+class TestFindReplaceDialog:
+    """Test cases for searching as you type in the find and replace dialog."""
+
+    def test_search_as_you_type(self, qtbot):
+        """Typing highlights and counts the occurrences; hiding the dialog clears them."""
+        window = QMainWindow()
+        qtbot.addWidget(window)
+        window.text_editor = TextEditor()
+        window.text_editor.setPlainText(TEXT)
+        dialog = FindReplaceDialog(window)
+        dialog.show()
+
+        dialog.find_input.setText("fo")
+        dialog.find_input.setText("foo")
+        assert len(window.text_editor._extra_selections["search"]) == 3
+        qtbot.waitUntil(lambda: dialog.count_label.text() == "3 matches")
+
+        dialog.match_case.setChecked(True)
+        qtbot.waitUntil(lambda: dialog.count_label.text() == "1 match")
+
+        dialog.hide()
+        assert window.text_editor._extra_selections["search"] == []
+        assert dialog.count_label.text() == ""
@@ -0,0 +1,124 @@
+import random
+
+import pytest
+from PyQt5.QtGui import QTextCursor, QTextDocument
+from PyQt5.QtWidgets import QMainWindow, QPlainTextDocumentLayout
+
+from core.text_counts import TextCounts
+from core.text_editor import TextEditor
+from ui.status_bar import StatusBar
+
+TEXT = "one two  three\n\n  four\tfive\nsix\n"
+
+
+def make_counts(text):
+    """Create text counts over a document laid out as in the editor."""
+    document = QTextDocument()
+    document.setDocumentLayout(QPlainTextDocumentLayout(document))
+    document.setPlainText(text)
+    return document, TextCounts(document)
+
+
+def assert_matches_text(document, counts):
+    """The kept totals equal counting the plain text."""
+    text = document.toPlainText()
+    assert counts.words() == len(text.split())
+    assert counts.chars() == len(text)
+
+
+class TestTextCounts:
+    """Test cases for the incremental text counts."""
+
+    def test_counts(self, qtbot):
+        """Words are whitespace-separated and characters include line breaks."""
+        document, counts = make_counts(TEXT)
+
+        assert counts.words() == 6
+        assert counts.chars() == len(TEXT)
+
+    def test_empty_document(self, qtbot):
+        """An empty document has no words or characters."""
+        document, counts = make_counts("")
+
+        assert counts.words() == 0
+        assert counts.chars() == 0
+
+    def test_edits_update_counts(self, qtbot):
+        """Typing, joining lines and pasting keep the totals equal to the text's."""
+        document, counts = make_counts(TEXT)
+
+        cursor = QTextCursor(document.findBlockByNumber(2))
+        cursor.insertText("zero ")
+        assert counts.words() == 7
+        assert_matches_text(document, counts)
+
+        cursor.movePosition(QTextCursor.StartOfBlock)
+        cursor.deletePreviousChar()  # Join with the blank line above
+        assert_matches_text(document, counts)
+
+        cursor.insertText("pasted words\n" * (TextCounts.EAGER_BLOCKS * 2))
+        assert_matches_text(document, counts)
+
+    def test_set_plain_text(self, qtbot):
+        """Replacing the whole text recounts it, though block revisions start over."""
+        editor = TextEditor()
+        qtbot.addWidget(editor)
+        assert editor.get_word_count() == 0
+
+        editor.setPlainText("word word word")
+        assert editor.get_word_count() == 3
+        editor.setPlainText("one")
+        assert editor.get_word_count() == 1
+
+    def test_random_edits(self, qtbot):
+        """Totals stay right through a series of random insertions and removals."""
+        rng = random.Random(7)
+        document, counts = make_counts(TEXT * 20)
+        for _ in range(200):
+            cursor = QTextCursor(document)
+            cursor.setPosition(rng.randrange(document.characterCount()))
+            if rng.random() < 0.6:
+                cursor.insertText(rng.choice(["a", " ", "\n", "word ", "x\ny", "\t"]))
+            else:
+                cursor.setPosition(min(cursor.position() + rng.randrange(1, 8), document.characterCount() - 1),
+                                   QTextCursor.KeepAnchor)
+                cursor.removeSelectedText()
+            assert_matches_text(document, counts)
+
+
+class TestStatusBarCounters:
+    """Test cases for the status bar counters."""
+
+    def make_status_bar(self, qtbot):
+        """Create a status bar in a window with an editor."""
+        window = QMainWindow()
+        qtbot.addWidget(window)
+        window.text_editor = TextEditor()
+        status_bar = StatusBar(window)
+        window.setStatusBar(status_bar.status_bar)
+        return window, status_bar
+
+    def test_edits_update_counters_after_a_delay(self, qtbot):
+        """A burst of edits updates the labels once, after the delay."""
+        window, status_bar = self.make_status_bar(qtbot)
+        window.text_editor.textChanged.connect(status_bar.schedule_counters)
+
+        window.text_editor.insertPlainText("one two\nthree")
+        assert status_bar.word_count_label.text() == "Words: 0"
+
+        qtbot.waitUntil(lambda: status_bar.word_count_label.text() == "Words: 3")
+        assert status_bar.char_count_label.text() == "Chars: 13"
+        assert status_bar.line_count_label.text() == "Lines: 2"
+
+    def test_hidden_status_bar_skips_counting(self, qtbot):
+        """Counters are left alone while the status bar is hidden."""
+        window, status_bar = self.make_status_bar(qtbot)
+        window.text_editor.insertPlainText("one two")
+        status_bar.status_bar.hide()
+
+        status_bar.update_counters()
+        assert status_bar.word_count_label.text() == "Words: 0"
+
+        status_bar.status_bar.show()
+        status_bar.update_counters()
+        assert status_bar.word_count_label.text() == "Words: 2"
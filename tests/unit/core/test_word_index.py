@@ -0,0 +1,142 @@
+import pytest
+from PyQt5.QtGui import QTextCursor, QTextDocument
+from PyQt5.QtWidgets import QPlainTextDocumentLayout
+
+from core.text_editor import TextEditor
+from core.word_index import WordIndex, word_at, word_columns
+
+TEXT = "alpha beta\nbeta gamma beta\n\ndelta alpha\n"
+
+
+def make_index(text):
+    """Create a fully built word index over a document laid out as in the editor."""
+    document = QTextDocument()
+    document.setDocumentLayout(QPlainTextDocumentLayout(document))
+    document.setPlainText(text)
+    index = WordIndex(document)
+    index._build_slice()
+    return document, index
+
+
+class TestWordIndex:
+    """Test cases for the word index."""
+
+    def test_word_at_and_columns(self):
+        """Words are found on either side of the cursor, with UTF-16 columns."""
+        assert word_at("foo bar", 0) == "foo"
+        assert word_at("foo bar", 3) == "foo"
+        assert word_at("foo  bar", 4) is None
+        assert word_at("  ", 1) is None
+        assert word_columns("foo food foo", "foo") == [0, 9]
+        assert word_columns("\U0001F600 foo foo", "foo") == [3, 7]
+        assert word_at("\U0001F600 foo", 3) == "foo"
+
+    def test_counts(self, qtbot):
+        """Every word is counted across the whole document."""
+        document, index = make_index(TEXT)
+
+        assert index.count("beta") == 3
+        assert index.count("alpha") == 2
+        assert index.count("missing") == 0
+
+    def test_edits_update_counts(self, qtbot):
+        """Small edits recount only the blocks they touched, at once."""
+        document, index = make_index(TEXT)
+
+        cursor = QTextCursor(document.findBlockByNumber(1))
+        cursor.insertText("alpha ")
+        assert index.count("alpha") == 3
+        assert index.count("beta") == 3
+
+        cursor.movePosition(QTextCursor.EndOfBlock)
+        cursor.insertText("\nbeta")
+        assert index.count("beta") == 4
+
+        cursor = QTextCursor(document)
+        cursor.select(QTextCursor.Document)
+        cursor.removeSelectedText()
+        assert index.count("beta") == 0
+        assert index.count("alpha") == 0
+
+    def test_set_plain_text(self, qtbot):
+        """Replacing the whole text reindexes it, though block revisions start over."""
+        document, index = make_index("")
+
+        document.setPlainText("beta beta")
+        assert index.count("beta") == 2
+
+    def test_large_edits_count_in_background(self, qtbot):
+        """Counts are unknown until the background pass has indexed a large insertion."""
+        document, index = make_index(TEXT)
+
+        cursor = QTextCursor(document)
+        cursor.movePosition(QTextCursor.End)
+        cursor.insertText("beta\n" * (WordIndex.EAGER_BLOCKS * 2))
+        assert index.count("beta") is None
+
+        with qtbot.waitSignal(index.counted):
+            pass
+        assert index.count("beta") == 3 + WordIndex.EAGER_BLOCKS * 2
+
+    def test_edits_to_most_blocks_count_from_scratch(self, qtbot):
+        """An edit touching most of the document indexes it all again rather than uncounting it."""
+        lines = WordIndex.EAGER_BLOCKS * 4
+        document, index = make_index("delta\n" + "alpha beta\n" * lines + "beta")
+
+        cursor = QTextCursor(document.findBlockByNumber(1))
+        cursor.movePosition(QTextCursor.End, QTextCursor.KeepAnchor)
+        cursor.insertText("alpha gamma\n" * lines)
+        assert index._counts == {}
+        assert index.count("delta") is None
+
+        with qtbot.waitSignal(index.counted):
+            pass
+        assert index.count("delta") == 1
+        assert index.count("alpha") == lines
+        assert index.count("gamma") == lines
+        assert index.count("beta") == 0
+
+
+class TestEditorOccurrences:
+    """Test cases for highlighting occurrences in the editor."""
+
+    def test_highlights_visible_occurrences(self, qtbot):
+        """The word under the cursor is highlighted where visible and its count reported."""
+        editor = TextEditor()
+        qtbot.addWidget(editor)
+        editor.resize(400, 300)
+        editor.setPlainText(TEXT)
+        with qtbot.waitSignal(editor.word_index.counted):
+            pass
+
+        cursor = editor.textCursor()
+        cursor.setPosition(editor.document().findBlockByNumber(1).position() + 1)
+        editor.setTextCursor(cursor)
+        with qtbot.waitSignal(editor.occurrences_changed) as blocker:
+            pass
+
+        assert blocker.args == ["beta", 3]
+        selections = editor._extra_selections["occurrences"]
+        assert sorted(selection.cursor.selectionStart() for selection in selections) == [6, 11, 22]
+
+    def test_single_occurrence_and_selection_not_highlighted(self, qtbot):
+        """A word occurring once, or a selection, highlights nothing."""
+        editor = TextEditor()
+        qtbot.addWidget(editor)
+        editor.setPlainText(TEXT)
+        with qtbot.waitSignal(editor.word_index.counted):
+            pass
+
+        cursor = editor.textCursor()
+        cursor.setPosition(editor.document().findBlockByNumber(1).position() + 7)  # gamma
+        editor.setTextCursor(cursor)
+        editor.highlight_occurrences()
+        assert editor._extra_selections["occurrences"] == []
+
+        cursor.setPosition(0)
+        cursor.setPosition(3, QTextCursor.KeepAnchor)
+        editor.setTextCursor(cursor)
+        with qtbot.waitSignal(editor.occurrences_changed) as blocker:
+            pass
+        assert blocker.args == ["", 0]
+        assert editor._extra_selections["occurrences"] == []
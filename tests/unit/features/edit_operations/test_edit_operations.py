@@ -10,6 +10,7 @@ from features.edit_operations.delete import DeleteAction
 from features.edit_operations.find import FindAction
 from features.edit_operations.replace import ReplaceAction
 from features.edit_operations.goto import GotoAction
+from features.edit_operations.goto_bracket import GotoBracketAction
 from features.edit_operations.select_all import SelectAllAction
 from features.edit_operations.time_date import TimeDateAction
 
@@ -263,6 +264,40 @@ class TestGotoAction:
         mock_text_editor.goto_line.assert_not_called()
 
 
+class TestGotoBracketAction:
+    """Test cases for GotoBracketAction."""
+
+    def test_goto_bracket_action_initialization(self):
+        """Test GotoBracketAction initializes correctly."""
+        action = GotoBracketAction(parent=None)
+
+        assert action.text() == "Go To &Matching Bracket"
+        assert action.shortcut().toString() == "Ctrl+B"
+
+    def test_execute_goto_bracket(self):
+        """Test jumping to the matching bracket."""
+        mock_parent = Mock()
+        mock_parent.get_text_editor.return_value.goto_matching_bracket.return_value = True
+
+        action = GotoBracketAction(parent=None)
+        with patch.object(action, 'get_parent_window', return_value=mock_parent):
+            action.execute()
+
+        mock_parent.get_text_editor.return_value.goto_matching_bracket.assert_called_once()
+        mock_parent.status_bar.show_message.assert_not_called()
+
+    def test_execute_goto_bracket_without_match(self):
+        """Test that a missing match is reported in the status bar."""
+        mock_parent = Mock()
+        mock_parent.get_text_editor.return_value.goto_matching_bracket.return_value = False
+
+        action = GotoBracketAction(parent=None)
+        with patch.object(action, 'get_parent_window', return_value=mock_parent):
+            action.execute()
+
+        mock_parent.status_bar.show_message.assert_called_once_with("No matching bracket", 2000)
+
+
 class TestSelectAllAction:
     """Test cases for SelectAllAction."""
 
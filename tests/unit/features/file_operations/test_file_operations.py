@@ -5,6 +5,7 @@ from features.file_operations.new_file import NewFileAction
 from features.file_operations.open_file import OpenFileAction
 from features.file_operations.save_file import SaveFileAction
 from features.file_operations.save_as_file import SaveAsFileAction
+from features.file_operations.save_encrypted import SaveEncryptedAction
 from features.file_operations.print_file import PrintFileAction
 from features.file_operations.exit_app import ExitAppAction
 
@@ -202,6 +203,26 @@ class TestSaveFileAction:
         assert result is False
 
 
+class TestSaveEncryptedAction:
+    """Test cases for SaveEncryptedAction."""
+
+    def test_save_finished_on_background_tab(self, qtbot):
+        """Test that a save finishing after a tab switch updates that tab's path and language."""
+        mock_parent = Mock()
+        action = SaveEncryptedAction()
+        tab = Mock(file_path="old.txt", language_chosen=True)
+        tab.text_editor.document.return_value.revision.return_value = 3
+
+        with patch.object(action, 'get_parent_window', return_value=mock_parent):
+            action._on_save_succeeded(tab, "notes.enc", 3)
+
+        assert tab.file_path == "notes.enc"
+        assert not tab.is_modified
+        assert not tab.language_chosen
+        tab.update_language.assert_called_once()
+        mock_parent.set_current_file_path.assert_not_called()
+
+
 class TestPrintFileAction:
     """Test cases for PrintFileAction."""
 
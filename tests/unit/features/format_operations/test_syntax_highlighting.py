@@ -1,9 +1,14 @@
 import pytest
+from array import array
 from unittest.mock import Mock, patch
 
 from features.format_operations.syntax_highlighting import SyntaxHighlightingAction, SyntaxHighlightingDialog
-from core.syntax_highlighter import SyntaxHighlighter
-from PyQt5.QtWidgets import QDialog
+from core.lexer import TOKEN_INDEX
+from core.syntax_highlighter import SyntaxHighlighter, get_tokenizer
+from core.text_editor import TextEditor
+from PyQt5.QtWidgets import QDialog, QApplication
+from PyQt5.QtGui import QTextDocument, QTextCursor
+from PyQt5.QtWidgets import QPlainTextDocumentLayout
 
 
 class TestSyntaxHighlightingAction:
@@ -116,12 +121,210 @@ class TestSyntaxHighlighter:
             highlighter.set_language("javascript")
             assert highlighter.language == "javascript"
 
+    @patch('PyQt5.QtGui.QSyntaxHighlighter.setCurrentBlockState')
+    @patch('PyQt5.QtGui.QSyntaxHighlighter.previousBlockState', return_value=-1)
     @patch('PyQt5.QtGui.QSyntaxHighlighter.setFormat')
-    def test_highlight_block_python(self, mock_set_format):
+    def test_highlight_block_python(self, mock_set_format, mock_previous_state, mock_set_state):
         """Test highlighting a Python code block."""
         with patch('PyQt5.QtGui.QSyntaxHighlighter.__init__'):
             highlighter = SyntaxHighlighter(None, "python")
             text = "def test_function():\n    print('hello')"
             highlighter.highlightBlock(text)
             # Verify that setFormat was called (actual calls depend on regex matches)
-            assert mock_set_format.called
\ No newline at end of file
+            assert mock_set_format.called
+
+    def test_tokenizer_is_shared_between_highlighters(self):
+        """Test that language tables are compiled once and shared."""
+        with patch('PyQt5.QtGui.QSyntaxHighlighter.__init__'):
+            first = SyntaxHighlighter(None, "cpp")
+            second = SyntaxHighlighter(None, "cpp")
+            assert first.tokenizer is second.tokenizer
+            assert first.tokenizer is get_tokenizer("CPP")
+
+    def test_tokenize_python_line(self):
+        """Test that one pass yields the expected spans, with comments and strings hiding keywords."""
+        tokenizer = get_tokenizer("python")
+        text = "def run(x): return 'if x' if x else None  # not a keyword"
+
+        spans, state = tokenizer.tokenize(text)
+
+        assert (0, 7, "function") in spans
+        assert (text.index("return"), 6, "keyword") in spans
+        assert (text.index("'if x'"), 6, "string") in spans
+        assert (text.index("None"), 4, "keyword") in spans
+        assert spans[-1] == (text.index("#"), len(text) - text.index("#"), "comment")
+        assert not any(start > text.index("#") for start, _, _ in spans)
+        assert state == 0
+
+    def test_tokenize_cpp_prefers_longest_keyword(self):
+        """Test that keyword alternation matches whole words only."""
+        spans, _ = get_tokenizer("cpp").tokenize('char16_t c = "a \\" b"; // done')
+
+        assert spans[0] == (0, 8, "keyword")
+        assert (13, 8, "string") in spans
+        assert spans[-1][2] == "comment"
+
+    def test_highlight_block_uses_utf16_positions(self, qtbot):
+        """Test that spans after characters outside the BMP land on the right text."""
+        document = QTextDocument()
+        highlighter = SyntaxHighlighter(document, "python")
+        document.setPlainText("x = '🎉' # done")
+        highlighter.rehighlight()
+
+        formats = document.firstBlock().layout().formats()
+        comment = [f for f in formats if f.format.fontItalic()][0]
+
+        # The emoji is two UTF-16 code units, so the comment starts one position later than in Python
+        assert comment.start == "x = '🎉' # done".index("#") + 1
+        assert comment.length == len("# done")
+        assert highlighter.tokenizer is get_tokenizer("python")
+
+    def test_multi_line_constructs_carry_state(self):
+        """Test that triple-quoted strings and block comments continue on the next line."""
+        python = get_tokenizer("python")
+        spans, state = python.tokenize('x = """start of doc')
+        assert spans[-1] == (4, 15, "string")
+        assert state != 0
+
+        spans, state = python.tokenize('still in the string if def', state)
+        assert spans == [(0, 26, "string")] and state != 0
+
+        spans, state = python.tokenize('end""" if x', state)
+        assert spans == [(0, 6, "string"), (7, 2, "keyword")]
+        assert state == 0
+
+        cpp = get_tokenizer("cpp")
+        spans, state = cpp.tokenize('int a; /* open')
+        assert state != 0
+        spans, state = cpp.tokenize('int b; */ int c;', state)
+        assert spans[0] == (0, 9, "comment") and spans[1] == (10, 3, "keyword")
+        assert state == 0
+
+    def test_block_states_in_document(self, qtbot):
+        """Test that a multi-line string is highlighted across blocks of a document."""
+        document = QTextDocument()
+        document.setPlainText('s = """\nif x\n"""\nif x')
+        highlighter = SyntaxHighlighter(document, "python")
+        highlighter.rehighlight()
+
+        blocks = [document.findBlockByNumber(i) for i in range(4)]
+        colors = [[f.format.foreground().color().name() for f in block.layout().formats()] for block in blocks]
+
+        assert colors[1] == ["#008000"]  # "if x" inside the string
+        assert colors[3] == ["#0000ff"]  # "if" after it is a keyword
+        assert blocks[1].userState() != 0
+        assert blocks[3].userState() == 0
+
+    def test_keystroke_rehighlights_only_until_state_settles(self, qtbot):
+        """Test that typing in a large document does not rescan the rest of it."""
+        calls = []
+
+        class CountingHighlighter(SyntaxHighlighter):
+            def highlightBlock(self, text):
+                calls.append(text)
+                super().highlightBlock(text)
+
+        document = QTextDocument()
+        document.setDocumentLayout(QPlainTextDocumentLayout(document))  # As in the editor
+        document.setPlainText("def f(x):\n    return x  # comment\n" * 25000)
+        CountingHighlighter(document, "python")
+        qtbot.wait(1)  # Let the highlighter's initial pass run
+        assert len(calls) == document.blockCount()
+
+        calls.clear()
+        cursor = QTextCursor(document.findBlockByNumber(25000))
+        cursor.insertText("y = 1 ")
+        assert 1 <= len(calls) <= 2
+
+        # Opening a triple-quoted string changes every following block, closing it settles again
+        cursor.insertText('"""')
+        calls.clear()
+        cursor.insertText('"""')
+        assert len(calls) >= 25000 - 1
+
+    def test_large_document_highlights_viewport_first(self, qtbot, monkeypatch):
+        """Test that a large document is highlighted from the visible blocks, then in the background."""
+        monkeypatch.setattr(SyntaxHighlighter, "LAZY_MIN_CHARACTERS", 1000)
+        monkeypatch.setattr(SyntaxHighlighter, "SLICE_BUDGET", 0)  # One block per slice
+        editor = TextEditor()
+        qtbot.addWidget(editor)
+        editor.resize(400, 300)
+        editor.show()
+        editor.setPlainText('s = """\nif x\n"""\nif x\n' * 500)
+        document = editor.document()
+
+        editor.enable_syntax_highlighting("python")
+        highlighter = editor.syntax_highlighter
+        QApplication.processEvents()
+
+        assert not highlighter.is_fully_highlighted()
+        assert document.firstBlock().layout().formats()
+        assert not document.lastBlock().previous().layout().formats()
+
+        qtbot.waitUntil(highlighter.is_fully_highlighted, timeout=10000)
+        last_if = document.lastBlock().previous()
+        assert [f.format.foreground().color().name() for f in last_if.layout().formats()] == ["#0000ff"]
+        assert last_if.previous().previous().userState() != 0  # Still inside the last string
+
+    def test_large_change_is_left_to_the_background_pass(self, qtbot, monkeypatch):
+        """Test that the blocks of a large change are skipped at once and highlighted in the background."""
+        monkeypatch.setattr(SyntaxHighlighter, "LAZY_MIN_CHARACTERS", 1000)
+        editor = TextEditor()
+        qtbot.addWidget(editor)
+        editor.resize(400, 300)
+        editor.show()
+        editor.setPlainText("x = 1\n" * 10)
+        editor.enable_syntax_highlighting("python")
+        highlighter = editor.syntax_highlighter
+        qtbot.waitUntil(highlighter.is_fully_highlighted, timeout=10000)
+
+        checked = []
+        is_due = SyntaxHighlighter._is_due
+        monkeypatch.setattr(SyntaxHighlighter, "_is_due", lambda self, block: checked.append(1) or is_due(self, block))
+        cursor = editor.textCursor()
+        cursor.setPosition(2)
+        cursor.setPosition(4, QTextCursor.KeepAnchor)
+        cursor.insertText("=\nif x:\n    pass\n" * 500)
+
+        assert len(checked) < 100  # The visible blocks, not the 1500 changed ones
+        assert highlighter._skip_blocks == 0
+        qtbot.waitUntil(highlighter.is_fully_highlighted, timeout=10000)
+        last_if = editor.document().findBlockByNumber(1498)
+        assert last_if.text() == "if x:"
+        assert [f.format.foreground().color().name() for f in last_if.layout().formats()] == ["#0000ff"]
+
+    def test_small_document_is_highlighted_at_once(self, qtbot):
+        """Test that documents below the lazy threshold skip the background pass."""
+        editor = TextEditor()
+        qtbot.addWidget(editor)
+        editor.setPlainText("if x:\n    pass\n" * 100)
+        editor.enable_syntax_highlighting("python")
+        qtbot.wait(1)
+
+        assert editor.syntax_highlighter.is_fully_highlighted()
+        assert editor.document().lastBlock().previous().layout().formats()
+
+    @pytest.mark.parametrize("start_offset, expected_color", [(0, "#808080"), (1, "#0000ff")])
+    def test_background_pass_applies_worker_spans(self, qtbot, monkeypatch, start_offset, expected_color):
+        """Test that spans from the worker are applied, unless their start state does not match."""
+        def fake_tokenize_lines(language, lines, state=0):
+            # Everything a comment, to tell worker spans from the highlighter's own
+            return [(state + start_offset, array('i', [0, len(line), TOKEN_INDEX["comment"]]), state)
+                    for line in lines]
+
+        monkeypatch.setattr("core.syntax_highlighter.tokenize_lines", fake_tokenize_lines)
+        monkeypatch.setattr(SyntaxHighlighter, "LAZY_MIN_CHARACTERS", 1000)
+        monkeypatch.setattr(SyntaxHighlighter, "SLICE_BUDGET", 0)  # Keep the worker ahead
+        editor = TextEditor()
+        qtbot.addWidget(editor)
+        editor.resize(400, 300)
+        editor.show()
+        editor.setPlainText("if x\n" * 600)
+
+        editor.enable_syntax_highlighting("python")
+        highlighter = editor.syntax_highlighter
+        qtbot.waitUntil(highlighter.is_fully_highlighted, timeout=10000)
+
+        block = editor.document().findBlockByNumber(500)
+        assert [f.format.foreground().color().name() for f in block.layout().formats()] == [expected_color]
+        assert block.userData() is None  # Spans are dropped once applied
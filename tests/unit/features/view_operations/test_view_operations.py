@@ -1,10 +1,14 @@
 import pytest
-from unittest.mock import Mock
+from unittest.mock import Mock, patch
 
 from features.view_operations.zoom_in import ZoomInAction
 from features.view_operations.zoom_out import ZoomOutAction
 from features.view_operations.restore_zoom import RestoreZoomAction
 from features.view_operations.toggle_status_bar import ToggleStatusBarAction
+from features.view_operations.toggle_fold import ToggleFoldAction
+from features.view_operations.fold_all import FoldAllAction
+from features.view_operations.unfold_all import UnfoldAllAction
+from features.view_operations.statistics import StatisticsAction
 
 
 class TestZoomInAction:
@@ -138,4 +142,55 @@ class TestToggleStatusBarAction:
         action.setChecked(False)
         action.execute()
 
-        mock_status_bar.status_bar.hide.assert_called_once()
\ No newline at end of file
+        mock_status_bar.status_bar.hide.assert_called_once()
+
+
+class TestFoldingActions:
+    """Test cases for the folding actions."""
+
+    def test_folding_actions_initialization(self):
+        """Test the folding actions initialize correctly."""
+        assert ToggleFoldAction(parent=None).text() == "&Toggle Fold"
+        assert FoldAllAction(parent=None).shortcut().toString() == "Ctrl+Alt+["
+        assert UnfoldAllAction(parent=None).shortcut().toString() == "Ctrl+Alt+]"
+
+    def test_execute_fold_all_and_unfold_all(self):
+        """Test folding and unfolding everything in the current editor."""
+        mock_parent = Mock()
+
+        for action_class, method in ((FoldAllAction, "fold_all"), (UnfoldAllAction, "unfold_all")):
+            action = action_class(parent=None)
+            with patch.object(action, 'get_parent_window', return_value=mock_parent):
+                action.execute()
+            getattr(mock_parent.get_text_editor.return_value, method).assert_called_once()
+
+    def test_execute_toggle_fold_without_region(self):
+        """Test that toggling where nothing folds is reported in the status bar."""
+        mock_parent = Mock()
+        mock_parent.get_text_editor.return_value.toggle_fold.return_value = False
+
+        action = ToggleFoldAction(parent=None)
+        with patch.object(action, 'get_parent_window', return_value=mock_parent):
+            action.execute()
+
+        mock_parent.status_bar.show_message.assert_called_once_with("Nothing to fold here", 2000)
+
+
+class TestStatisticsAction:
+    """Test cases for StatisticsAction."""
+
+    def test_statistics_action_initialization(self):
+        """Test StatisticsAction initializes correctly."""
+        action = StatisticsAction(parent=None)
+        assert action.text() == "S&tatistics..."
+
+    def test_execute_shows_existing_panel(self):
+        """Test that executing shows the window's statistics panel."""
+        mock_parent = Mock()
+
+        action = StatisticsAction(parent=None)
+        with patch.object(action, 'get_parent_window', return_value=mock_parent):
+            action.execute()
+
+        mock_parent.statistics_dialog.show.assert_called_once()
+        mock_parent.statistics_dialog.raise_.assert_called_once()
@@ -0,0 +1,117 @@
+"""
+Unit tests for the headless batch encryption tool.
+Tests encrypting, decrypting and re-keying directory trees over a process pool.
+"""
+
+import io
+import os
+import subprocess
+import sys
+
+from utils.security.encryption import EncryptionService
+from utils.security.batch import plan_tasks, run_batch, main
+
+
+PASSWORD = "TestPassword123!"
+NEW_PASSWORD = "NewPassword456!"
+
+
+def _make_tree(root):
+    """Create a small tree of notes and return {relative path: content}."""
+    notes = {
+        'todo.txt': "milk\neggs\n" * 100,
+        os.path.join('work', 'meeting.md'): "# Meeting\n" + "notes " * 2000,
+        os.path.join('work', 'deep', 'empty.txt'): "",
+    }
+    for relative, content in notes.items():
+        path = os.path.join(root, relative)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(content)
+    return notes
+
+
+def _run(mode, source, output=None, password=PASSWORD, new_password=None):
+    """Run a batch quietly and return its summary."""
+    tasks = plan_tasks(mode, str(source), str(output) if output else None)
+    return run_batch(mode, tasks, password, new_password, jobs=2, out=io.StringIO(), err=io.StringIO())
+
+
+def test_encrypt_and_decrypt_tree(tmp_path):
+    """Test that a tree survives an encrypt/decrypt round trip."""
+    notes = _make_tree(tmp_path / 'plain')
+
+    summary = _run('encrypt', tmp_path / 'plain', tmp_path / 'encrypted')
+    assert summary['done'] == len(notes)
+    assert summary['failed'] == 0
+
+    service = EncryptionService()
+    for relative, content in notes.items():
+        encrypted_path = tmp_path / 'encrypted' / (relative + '.enc')
+        assert service.is_encrypted_file(str(encrypted_path))
+        assert service.decrypt_file(str(encrypted_path), PASSWORD) == content
+
+    summary = _run('decrypt', tmp_path / 'encrypted', tmp_path / 'decrypted')
+    assert summary['done'] == len(notes)
+    for relative, content in notes.items():
+        with open(tmp_path / 'decrypted' / relative, encoding='utf-8') as file:
+            assert file.read() == content
+
+
+def test_finished_files_are_skipped(tmp_path):
+    """Test that a second run leaves finished files alone."""
+    notes = _make_tree(tmp_path / 'plain')
+    _run('encrypt', tmp_path / 'plain', tmp_path / 'encrypted')
+
+    summary = _run('encrypt', tmp_path / 'plain', tmp_path / 'encrypted')
+
+    assert summary['done'] == 0
+    assert summary['skipped'] == len(notes)
+
+
+def test_rekey_tree(tmp_path):
+    """Test re-keying a tree in place, then re-running it."""
+    notes = _make_tree(tmp_path)
+    _run('encrypt', tmp_path)
+
+    summary = _run('rekey', tmp_path, new_password=NEW_PASSWORD)
+    assert summary['done'] == len(notes)
+
+    service = EncryptionService()
+    for relative, content in notes.items():
+        assert service.decrypt_file(str(tmp_path / (relative + '.enc')), NEW_PASSWORD) == content
+
+    # Plain files are not encrypted, and encrypted ones already use the new password
+    summary = _run('rekey', tmp_path, new_password=NEW_PASSWORD)
+    assert summary['done'] == 0
+    assert summary['failed'] == 0
+
+
+def test_wrong_password_fails(tmp_path):
+    """Test that files the password cannot open are reported as failures."""
+    _make_tree(tmp_path / 'plain')
+    _run('encrypt', tmp_path / 'plain', tmp_path / 'encrypted')
+
+    summary = _run('decrypt', tmp_path / 'encrypted', tmp_path / 'decrypted', password="WrongPassword1!")
+
+    assert summary['failed'] == 3
+    assert not (tmp_path / 'decrypted' / 'todo.txt').exists()
+
+
+def test_main_reads_password_from_environment(tmp_path, monkeypatch, capsys):
+    """Test the command-line entry point."""
+    _make_tree(tmp_path)
+    monkeypatch.setenv('NOTEPAD_PASSWORD', PASSWORD)
+
+    exit_code = main(['encrypt', str(tmp_path), '--password-env', 'NOTEPAD_PASSWORD', '--jobs', '2'])
+
+    assert exit_code == 0
+    assert "3 done" in capsys.readouterr().out
+
+
+def test_does_not_import_pyqt():
+    """Test that the batch tool runs without PyQt5."""
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+    code = "import sys, utils.security.batch; sys.exit('PyQt5' in sys.modules)"
+
+    assert subprocess.run([sys.executable, '-c', code], cwd=root).returncode == 0
@@ -0,0 +1,87 @@
+"""
+Unit tests for the background encryption worker.
+"""
+
+import pytest
+from unittest.mock import patch
+
+from ui.password_dialog import PasswordDialog
+from utils.security.crypto_worker import CryptoWorker
+from utils.security.encryption import EncryptionService, InvalidPasswordError
+
+
+class TestCryptoWorker:
+    """Test cases for CryptoWorker."""
+
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.service = EncryptionService()
+        self.test_password = "TestPassword123!"
+        self.test_data = "Worker thread test data"
+
+    def test_succeeded_signal_carries_result(self, qtbot):
+        """Test that a successful job emits its return value."""
+        encrypted = self.service.encrypt_data(self.test_data, self.test_password, "AES-256")
+        worker = CryptoWorker(self.service.decrypt_data, encrypted, self.test_password)
+
+        with qtbot.waitSignal(worker.succeeded, timeout=10000) as blocker:
+            worker.start()
+        worker.wait()
+
+        assert blocker.args == [self.test_data]
+
+    def test_failed_signal_carries_wrong_password_error(self, qtbot):
+        """Test that a wrong password comes back as an InvalidPasswordError."""
+        encrypted = self.service.encrypt_data(self.test_data, self.test_password, "ChaCha20")
+        worker = CryptoWorker(self.service.decrypt_data, encrypted, "WrongPassword123!")
+
+        with qtbot.waitSignal(worker.failed, timeout=10000) as blocker:
+            worker.start()
+        worker.wait()
+
+        assert isinstance(blocker.args[0], InvalidPasswordError)
+
+    def test_job_runs_off_gui_thread(self, qtbot):
+        """Test that the job does not run on the thread that started it."""
+        import threading
+        main_thread = threading.get_ident()
+        worker = CryptoWorker(threading.get_ident)
+
+        with qtbot.waitSignal(worker.succeeded, timeout=10000) as blocker:
+            worker.start()
+        worker.wait()
+
+        assert blocker.args[0] != main_thread
+
+
+class TestPasswordDialogBenchmark:
+    """Test cases for measuring the algorithms off the GUI thread."""
+
+    def test_benchmark_runs_in_worker(self, qtbot, tmp_path):
+        """Test that the dialog opens before the benchmark and is labelled once it is done."""
+        speeds = {algorithm: 100.0 for algorithm in EncryptionService.ALGORITHMS}
+        speeds['ChaCha20'] = 900.0
+
+        with patch.object(EncryptionService, '_benchmark_results', None), \
+                patch.object(EncryptionService, '_default_benchmark_cache_path',
+                             return_value=str(tmp_path / 'benchmark.json')), \
+                patch.object(EncryptionService, '_measure_throughput',
+                             side_effect=lambda algorithm: speeds[algorithm]), \
+                patch.object(PasswordDialog, 'benchmark_worker', None):
+            dialog = PasswordDialog(mode="encrypt")
+            qtbot.addWidget(dialog)
+            worker = PasswordDialog.benchmark_worker
+            assert worker is not None
+            assert dialog.get_algorithm() == 'AES-256-GCM'
+
+            qtbot.waitUntil(lambda: dialog.get_algorithm() == 'ChaCha20', timeout=10000)
+            worker.wait()
+
+            assert "RECOMMENDED" in dialog.algorithm_combo.currentText()
+            assert "900 MB/s" in dialog.algorithm_combo.currentText()
+
+            # Later dialogs use the results at once
+            other = PasswordDialog(mode="encrypt")
+            qtbot.addWidget(other)
+            assert PasswordDialog.benchmark_worker is worker
+            assert other.get_algorithm() == 'ChaCha20'
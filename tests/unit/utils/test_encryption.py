@@ -5,6 +5,7 @@ Tests AES and ChaCha20 encryption/decryption, password generation, and validatio
 
 import pytest
 import os
+from unittest.mock import patch
 from utils.security.encryption import EncryptionService, InvalidPasswordError, EncryptionError
 
 
@@ -41,6 +42,126 @@ class TestEncryptionService:
 
         assert decrypted == self.test_data
 
+    def test_encrypt_decrypt_aes_gcm(self):
+        """Test AES-GCM encryption and decryption round trip for every key size."""
+        for algorithm in ["AES-256-GCM", "AES-192-GCM", "AES-128-GCM"]:
+            encrypted = self.service.encrypt_data(self.test_data, self.test_password, algorithm)
+            decrypted = self.service.decrypt_data(encrypted, self.test_password)
+
+            assert decrypted == self.test_data
+
+    def test_aes_gcm_wrong_password_fails(self):
+        """Test that AES-GCM rejects a wrong password through the tag check."""
+        encrypted = self.service.encrypt_data(self.test_data, self.test_password, "AES-256-GCM")
+
+        with pytest.raises(InvalidPasswordError):
+            self.service.decrypt_data(encrypted, "WrongPassword123!")
+
+    def test_aes_gcm_detects_header_tampering(self):
+        """Test that a tampered header is rejected."""
+        encrypted = bytearray(self.service.encrypt_data(self.test_data, self.test_password, "AES-256-GCM"))
+        fields, header_size = self.service._parse_header(bytes(encrypted))
+        nonce_offset = bytes(encrypted).index(fields[self.service.FIELD_NONCE])
+        encrypted[nonce_offset] ^= 0x01
+
+        with pytest.raises(InvalidPasswordError):
+            self.service.decrypt_data(bytes(encrypted), self.test_password)
+
+    def test_decrypt_legacy_v1_cbc_file(self):
+        """Test that files written in the V1 CBC format still decrypt."""
+        from cryptography.hazmat.primitives import padding
+        from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+
+        salt = os.urandom(self.service.SALT_SIZE)
+        iv = os.urandom(self.service.AES_IV_SIZE)
+        key = self.service.derive_key(self.test_password, salt, 32)
+        padder = padding.PKCS7(algorithms.AES.block_size).padder()
+        padded = padder.update(self.test_data.encode('utf-8')) + padder.finalize()
+        encryptor = Cipher(algorithms.AES(key), modes.CBC(iv)).encryptor()
+        ciphertext = encryptor.update(padded) + encryptor.finalize()
+
+        legacy = (
+            self.service.MAGIC_HEADER_V1 +
+            salt +
+            iv.ljust(self.service.IV_SIZE, b'\x00') +
+            b"AES-256".ljust(self.service.ALGORITHM_SIZE, b'\x00') +
+            ciphertext
+        )
+
+        assert self.service.decrypt_data(legacy, self.test_password) == self.test_data
+
+    def test_compressible_data_is_compressed(self):
+        """Test that repetitive text is compressed and the codec is recorded."""
+        log_data = "2024-01-01 12:00:00 INFO request handled in 12ms\n" * 2000
+        encrypted = self.service.encrypt_data(log_data, self.test_password, "AES-256-GCM")
+        fields, _ = self.service._parse_header(encrypted)
+
+        assert fields[self.service.FIELD_COMPRESSION] in (b"zlib", b"lzma")
+        assert len(encrypted) < len(log_data) // 10
+        assert self.service.decrypt_data(encrypted, self.test_password) == log_data
+
+    def test_small_data_is_stored_raw(self):
+        """Test that small payloads skip the compression stage."""
+        encrypted = self.service.encrypt_data(self.test_data, self.test_password, "ChaCha20")
+        fields, _ = self.service._parse_header(encrypted)
+
+        assert self.service.FIELD_COMPRESSION not in fields
+        assert self.service.decrypt_data(encrypted, self.test_password) == self.test_data
+
+    def test_explicit_compression_codecs(self):
+        """Test round trips with each codec and with compression disabled."""
+        text = "compress me " * 500
+        for compression in ["zlib", "lzma", "none"]:
+            encrypted = self.service.encrypt_data(text, self.test_password, "AES-128-GCM", compression)
+            assert self.service.decrypt_data(encrypted, self.test_password) == text
+
+        with pytest.raises(EncryptionError):
+            self.service.encrypt_data(text, self.test_password, "AES-256-GCM", "brotli")
+
+    def test_choose_compression(self):
+        """Test codec selection from the sampled compressibility check."""
+        assert self.service.choose_compression(b"short") is None
+        assert self.service.choose_compression(b"abc" * 1000) == "lzma"
+        assert self.service.choose_compression(b"abc" * self.service.LZMA_MAX_SIZE) == "zlib"
+        assert self.service.choose_compression(os.urandom(100000)) is None
+
+    def test_decrypt_accepts_buffers(self):
+        """Test decrypting from bytearray and memoryview inputs."""
+        for algorithm in ["AES-256-GCM", "AES-256", "ChaCha20"]:
+            encrypted = self.service.encrypt_data(self.test_data, self.test_password, algorithm)
+
+            assert self.service.decrypt_data(bytearray(encrypted), self.test_password) == self.test_data
+            assert self.service.decrypt_data(memoryview(encrypted), self.test_password) == self.test_data
+
+    def test_decrypt_file_peak_memory(self):
+        """Test that decrypting an N-byte file peaks at about 2N."""
+        import tempfile
+        import tracemalloc
+
+        size = 4 * 1024 * 1024
+        document = ("x" * 63 + "\n") * (size // 64)
+        encrypted = self.service.encrypt_data(document, self.test_password, "AES-256-GCM", compression='none')
+
+        with tempfile.NamedTemporaryFile(delete=False) as temp_file:
+            temp_file.write(encrypted)
+            temp_path = temp_file.name
+        del encrypted
+
+        try:
+            tracemalloc.start()
+            decrypted = self.service.decrypt_file(temp_path, self.test_password)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            assert decrypted == document
+            assert peak < 2.5 * size
+
+            # Wrong password still leaves the mapping closable
+            with pytest.raises(InvalidPasswordError):
+                self.service.decrypt_file(temp_path, "WrongPassword123!")
+        finally:
+            os.unlink(temp_path)
+
     def test_encrypt_decrypt_chacha20(self):
         """Test ChaCha20 encryption and decryption round trip."""
         encrypted = self.service.encrypt_data(self.test_data, self.test_password, "ChaCha20")
@@ -62,6 +183,119 @@ class TestEncryptionService:
         with pytest.raises(InvalidPasswordError):
             self.service.decrypt_data(encrypted, "WrongPassword123!")
 
+    def test_wrong_password_rejected_before_decrypting_payload(self):
+        """Test that a wrong password is rejected without touching the ciphertext."""
+        for algorithm in ["AES-256", "AES-256-GCM", "XChaCha20"]:
+            for envelope in [True, False]:
+                encrypted = self.service.encrypt_data(self.test_data, self.test_password, algorithm,
+                                                      envelope=envelope)
+                fields, _ = self.service._parse_header(encrypted)
+                if not envelope:
+                    assert len(fields[self.service.FIELD_KEY_CHECK]) == self.service.KEY_CHECK_SIZE
+
+                with patch.object(self.service, '_decrypt_payload') as mock_decrypt:
+                    with pytest.raises(InvalidPasswordError):
+                        self.service.decrypt_data(encrypted, "WrongPassword123!")
+                    mock_decrypt.assert_not_called()
+
+    def _write_temp_file(self, data):
+        """Write bytes to a temporary file and return its path."""
+        import tempfile
+        with tempfile.NamedTemporaryFile(suffix='.enc', delete=False) as temp_file:
+            temp_file.write(data)
+            return temp_file.name
+
+    def test_change_password_rewrites_header_only(self):
+        """Test that changing the password leaves the payload bytes untouched."""
+        encrypted = self.service.encrypt_data(self.test_data * 100, self.test_password, "AES-256-GCM")
+        _, header_size = self.service._parse_header(encrypted)
+        temp_path = self._write_temp_file(encrypted)
+
+        try:
+            self.service.change_password(temp_path, self.test_password, "NewPassword456!")
+
+            with open(temp_path, 'rb') as file:
+                updated = file.read()
+
+            assert len(updated) == len(encrypted)
+            assert updated[header_size:] == encrypted[header_size:]
+            assert self.service.decrypt_file(temp_path, "NewPassword456!") == self.test_data * 100
+            with pytest.raises(InvalidPasswordError):
+                self.service.decrypt_file(temp_path, self.test_password)
+        finally:
+            os.unlink(temp_path)
+
+    def test_add_and_remove_passwords(self):
+        """Test that several passwords can open the same file."""
+        encrypted = self.service.encrypt_data(self.test_data, self.test_password, "ChaCha20")
+        temp_path = self._write_temp_file(encrypted)
+
+        try:
+            self.service.add_password(temp_path, self.test_password, "SecondPassword1!")
+            assert self.service.decrypt_file(temp_path, self.test_password) == self.test_data
+            assert self.service.decrypt_file(temp_path, "SecondPassword1!") == self.test_data
+
+            self.service.remove_password(temp_path, self.test_password)
+            assert self.service.decrypt_file(temp_path, "SecondPassword1!") == self.test_data
+            with pytest.raises(InvalidPasswordError):
+                self.service.decrypt_file(temp_path, self.test_password)
+
+            with pytest.raises(EncryptionError):
+                self.service.remove_password(temp_path, "SecondPassword1!")
+            with pytest.raises(InvalidPasswordError):
+                self.service.add_password(temp_path, "WrongPassword123!", "Another1!")
+        finally:
+            os.unlink(temp_path)
+
+    def test_key_slot_capacity(self):
+        """Test that adding more passwords than there are key slots fails."""
+        encrypted = self.service.encrypt_data(self.test_data, self.test_password, "AES-128-GCM")
+        temp_path = self._write_temp_file(encrypted)
+
+        try:
+            for i in range(self.service.KEY_SLOT_CAPACITY - 1):
+                self.service.add_password(temp_path, self.test_password, f"Extra{i}Password!")
+            with pytest.raises(EncryptionError):
+                self.service.add_password(temp_path, self.test_password, "OneTooMany1!")
+        finally:
+            os.unlink(temp_path)
+
+    def test_change_password_requires_key_slots(self):
+        """Test that files without key slots cannot be re-keyed in place."""
+        encrypted = self.service.encrypt_data(self.test_data, self.test_password, "AES-256-GCM", envelope=False)
+        temp_path = self._write_temp_file(encrypted)
+
+        try:
+            with pytest.raises(EncryptionError):
+                self.service.change_password(temp_path, self.test_password, "NewPassword456!")
+        finally:
+            os.unlink(temp_path)
+
+    def test_data_key_api(self):
+        """Test sealing records with a data key from key slots, as containers do."""
+        for algorithm in ("AES-128-GCM", "ChaCha20", "XChaCha20"):
+            key, key_slots = self.service.create_key_slots(algorithm, self.test_password)
+            sealed = self.service.seal(algorithm, key, b"record", b"context")
+            assert len(sealed) == self.service.sealed_size(algorithm, len(b"record"))
+
+            rewrapped = self.service.rewrap_key_slots(key_slots, self.test_password, "NewPassword456!")
+            assert len(rewrapped) == len(key_slots)
+            assert self.service.open_key_slots(rewrapped, "NewPassword456!") == key
+            with pytest.raises(InvalidPasswordError):
+                self.service.open_key_slots(rewrapped, self.test_password)
+
+            assert bytes(self.service.unseal(algorithm, key, sealed, b"context")) == b"record"
+            with pytest.raises(EncryptionError):
+                self.service.unseal(algorithm, key, sealed, b"other context")
+
+    def test_corrupted_payload_with_correct_password(self):
+        """Test that a corrupted CBC payload is still reported after the key check passes."""
+        encrypted = bytearray(self.service.encrypt_data(self.test_data, self.test_password, "AES-256"))
+        encrypted[-1] ^= 0xFF
+
+        with pytest.raises(EncryptionError):
+            self.service.decrypt_data(bytes(encrypted), self.test_password)
+
     def test_invalid_file_format(self):
         """Test that invalid file format raises EncryptionError."""
         invalid_data = b"Not an encrypted file"
@@ -173,6 +407,9 @@ class TestEncryptionService:
         assert self.service._get_key_size("AES-256") == 32
         assert self.service._get_key_size("AES-192") == 24
         assert self.service._get_key_size("AES-128") == 16
+        assert self.service._get_key_size("AES-256-GCM") == 32
+        assert self.service._get_key_size("AES-192-GCM") == 24
+        assert self.service._get_key_size("AES-128-GCM") == 16
         assert self.service._get_key_size("ChaCha20") == 32
         assert self.service._get_key_size("XChaCha20") == 32
         assert self.service._get_key_size("Unknown") == 32  # Default
@@ -181,6 +418,8 @@ class TestEncryptionService:
         """Test AEAD algorithm detection."""
         assert self.service._is_aead_algorithm("ChaCha20") == True
         assert self.service._is_aead_algorithm("XChaCha20") == True
+        assert self.service._is_aead_algorithm("AES-256-GCM") == True
+        assert self.service._is_aead_algorithm("AES-128-GCM") == True
         assert self.service._is_aead_algorithm("AES-256") == False
         assert self.service._is_aead_algorithm("AES-192") == False
         assert self.service._is_aead_algorithm("AES-128") == False
@@ -221,7 +460,142 @@ class TestEncryptionService:
 
     def test_algorithm_persistence(self):
         """Test that algorithm information is preserved in encrypted data."""
-        for algorithm in ["AES-256", "AES-192", "AES-128", "ChaCha20", "XChaCha20"]:
+        for algorithm in self.service.ALGORITHMS:
             encrypted = self.service.encrypt_data(self.test_data, self.test_password, algorithm)
             decrypted = self.service.decrypt_data(encrypted, self.test_password)
-            assert decrypted == self.test_data
\ No newline at end of file
+            assert decrypted == self.test_data
+    def test_encrypt_file_streams_in_chunks(self):
+        """Test that streamed files decrypt like encrypt_data output, for every algorithm."""
+        content = ("Streamed line of text\n" * 5000).encode('utf-8')
+        source_path = self._write_temp_file(content)
+        target_path = source_path + '.out'
+
+        try:
+            with patch.object(EncryptionService, 'STREAM_CHUNK_SIZE', 4096):
+                for algorithm in self.service.ALGORITHMS:
+                    for compression in ('auto', 'none'):
+                        encrypted_path = source_path + '.enc'
+                        size = self.service.encrypt_file(source_path, encrypted_path, self.test_password,
+                                                         algorithm, compression)
+                        assert size == len(content)
+                        assert self.service.decrypt_file(encrypted_path, self.test_password) == content.decode('utf-8')
+
+                        written = self.service.decrypt_to_file(encrypted_path, target_path, self.test_password)
+                        with open(target_path, 'rb') as file:
+                            assert file.read() == content
+                        assert written == len(content)
+        finally:
+            for path in (source_path, source_path + '.enc', target_path):
+                if os.path.exists(path):
+                    os.unlink(path)
+
+    def test_decrypt_to_file_wrong_password_leaves_no_output(self):
+        """Test that a failed streaming decrypt removes its temporary output."""
+        encrypted = self.service.encrypt_data(self.test_data, self.test_password, "AES-256-GCM", envelope=False)
+        source_path = self._write_temp_file(encrypted)
+        target_path = source_path + '.out'
+        directory = os.path.dirname(source_path)
+
+        try:
+            before = set(os.listdir(directory))
+            with pytest.raises(InvalidPasswordError):
+                self.service.decrypt_to_file(source_path, target_path, "WrongPassword123!")
+            assert set(os.listdir(directory)) == before
+        finally:
+            os.unlink(source_path)
+
+    def test_encrypt_to_file_keeps_old_file_on_failure(self):
+        """Test that a failed encrypted save leaves the existing file untouched."""
+        encrypted = self.service.encrypt_data(self.test_data, self.test_password)
+        temp_path = self._write_temp_file(encrypted)
+        directory = os.path.dirname(temp_path)
+
+        try:
+            before = set(os.listdir(directory))
+            with patch.object(EncryptionService, 'encrypt_data', return_value=b"partial"), \
+                    patch('os.fsync', side_effect=OSError("Disk full")):
+                with pytest.raises(OSError):
+                    self.service.encrypt_to_file("New text", temp_path, self.test_password)
+            assert set(os.listdir(directory)) == before
+            with open(temp_path, 'rb') as file:
+                assert file.read() == encrypted
+
+            self.service.encrypt_to_file("New text", temp_path, self.test_password)
+            assert self.service.decrypt_file(temp_path, self.test_password) == "New text"
+        finally:
+            os.unlink(temp_path)
+
+    def test_rekey_file(self):
+        """Test re-keying files with and without key slots."""
+        for envelope in (True, False):
+            encrypted = self.service.encrypt_data(self.test_data * 200, self.test_password, "AES-256",
+                                                  envelope=envelope)
+            temp_path = self._write_temp_file(encrypted)
+
+            try:
+                self.service.rekey_file(temp_path, self.test_password, "NewPassword456!")
+
+                assert self.service.decrypt_file(temp_path, "NewPassword456!") == self.test_data * 200
+                assert self.service.verify_password(temp_path, "NewPassword456!")
+                assert not self.service.verify_password(temp_path, self.test_password)
+                with pytest.raises(InvalidPasswordError):
+                    self.service.rekey_file(temp_path, self.test_password, "Other789!")
+            finally:
+                os.unlink(temp_path)
+
+    def test_benchmark_algorithms_runs_once_per_host(self, tmp_path):
+        """Test that cipher benchmark results are cached on disk and per process."""
+        cache_path = str(tmp_path / 'benchmark.json')
+
+        with patch.object(EncryptionService, '_benchmark_results', None), \
+                patch.object(EncryptionService, '_measure_throughput', return_value=100.0) as mock_measure:
+            results = self.service.benchmark_algorithms(cache_path)
+            assert set(results) == set(self.service.ALGORITHMS)
+            assert mock_measure.call_count == len(self.service.ALGORITHMS)
+
+            # Same process: no new measurement
+            self.service.benchmark_algorithms(cache_path)
+            assert mock_measure.call_count == len(self.service.ALGORITHMS)
+
+            # New process on the same host: loaded from the cache file
+            EncryptionService._benchmark_results = None
+            assert self.service.benchmark_algorithms(cache_path) == results
+            assert mock_measure.call_count == len(self.service.ALGORITHMS)
+
+            # Different host: measured again
+            EncryptionService._benchmark_results = None
+            with patch.object(EncryptionService, '_host_fingerprint', return_value="other-cpu"):
+                self.service.benchmark_algorithms(cache_path)
+            assert mock_measure.call_count == 2 * len(self.service.ALGORITHMS)
+
+    def test_recommended_algorithm_is_fastest_safe_choice(self):
+        """Test that the default follows the benchmark but never picks a legacy or 128-bit cipher."""
+        speeds = {algorithm: 10.0 for algorithm in self.service.ALGORITHMS}
+        speeds.update({'AES-128': 9000.0, 'AES-128-GCM': 8000.0, 'ChaCha20': 900.0, 'AES-256-GCM': 300.0})
+
+        with patch.object(EncryptionService, '_benchmark_results', speeds):
+            assert self.service.recommended_algorithm() == 'ChaCha20'
+
+        speeds['AES-256-GCM'] = 3000.0
+        with patch.object(EncryptionService, '_benchmark_results', speeds):
+            assert self.service.recommended_algorithm() == 'AES-256-GCM'
+
+    def test_cached_benchmark_never_measures(self, tmp_path):
+        """Test that cached results are read without running the benchmark."""
+        cache_path = str(tmp_path / 'benchmark.json')
+
+        with patch.object(EncryptionService, '_benchmark_results', None), \
+                patch.object(EncryptionService, '_measure_throughput', return_value=100.0) as mock_measure:
+            assert self.service.cached_benchmark(cache_path) is None
+            assert self.service.recommended_algorithm(cache_path, measure=False) == 'AES-256-GCM'
+            assert mock_measure.call_count == 0
+
+            results = self.service.benchmark_algorithms(cache_path)
+            EncryptionService._benchmark_results = None
+            assert self.service.cached_benchmark(cache_path) == results
+
+    def test_measure_throughput(self):
+        """Test that a real measurement returns a positive speed."""
+        with patch.object(EncryptionService, 'BENCHMARK_SIZE', 4096):
+            for algorithm in self.service.ALGORITHMS:
+                assert self.service._measure_throughput(algorithm) > 0
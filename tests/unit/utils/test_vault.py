@@ -0,0 +1,193 @@
+"""
+Unit tests for the encrypted note vault.
+Tests lazy note decryption, append-only updates, compaction and password handling.
+"""
+
+import os
+import tempfile
+import pytest
+from unittest.mock import patch
+
+from utils.security.encryption import EncryptionService, EncryptionError, InvalidPasswordError
+from utils.security.vault import NoteVault
+
+
+class TestNoteVault:
+    """Test cases for NoteVault."""
+
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.service = EncryptionService()
+        self.test_password = "TestPassword123!"
+        fd, self.vault_path = tempfile.mkstemp(suffix='.vault')
+        os.close(fd)
+
+    def teardown_method(self):
+        """Remove the vault file."""
+        for path in (self.vault_path, self.vault_path + '.compact'):
+            if os.path.exists(path):
+                os.unlink(path)
+
+    def test_create_add_and_reopen(self):
+        """Test that notes survive closing and reopening the vault."""
+        vault = NoteVault.create(self.vault_path, self.test_password)
+        first = vault.add_note("Shopping", "milk\neggs")
+        second = vault.add_note("Ideas", "Hello 世界 🌍")
+
+        reopened = NoteVault.open(self.vault_path, self.test_password)
+
+        assert [note['title'] for note in reopened.list_notes()] == ["Shopping", "Ideas"]
+        assert reopened.read_note(first) == "milk\neggs"
+        assert reopened.read_note(second) == "Hello 世界 🌍"
+        assert NoteVault.is_vault_file(self.vault_path)
+        assert not self.service.is_encrypted_file(self.vault_path)
+
+    def test_open_costs_one_key_derivation(self):
+        """Test that browsing a vault derives the key once and decrypts no notes."""
+        vault = NoteVault.create(self.vault_path, self.test_password, service=self.service)
+        with vault.batch():
+            for i in range(50):
+                vault.add_note(f"Note {i}", f"Body of note {i}")
+
+        with patch.object(EncryptionService, 'derive_key', wraps=self.service.derive_key) as mock_derive, \
+                patch.object(EncryptionService, '_decrypt_payload', wraps=self.service._decrypt_payload) as mock_decrypt:
+            reopened = NoteVault.open(self.vault_path, self.test_password)
+            notes = reopened.list_notes()
+
+            assert len(notes) == 50
+            assert mock_derive.call_count == 1
+            assert mock_decrypt.call_count == 1  # The index only
+
+    def test_wrong_password(self):
+        """Test that a wrong password is rejected."""
+        NoteVault.create(self.vault_path, self.test_password)
+
+        with pytest.raises(InvalidPasswordError):
+            NoteVault.open(self.vault_path, "WrongPassword123!")
+
+    def test_update_appends_without_rewriting(self):
+        """Test that updating a note appends and leaves earlier bytes in place."""
+        vault = NoteVault.create(self.vault_path, self.test_password)
+        note_id = vault.add_note("Draft", "first version")
+        other_id = vault.add_note("Other", "unchanged")
+
+        with open(self.vault_path, 'rb') as file:
+            before = file.read()
+        vault.update_note(note_id, "second version", title="Final")
+        with open(self.vault_path, 'rb') as file:
+            after = file.read()
+
+        header_size = len(vault._pack_header(0, 0))
+        assert after[header_size:len(before)] == before[header_size:]
+
+        reopened = NoteVault.open(self.vault_path, self.test_password)
+        assert reopened.read_note(note_id) == "second version"
+        assert reopened.read_note(other_id) == "unchanged"
+        assert {note['title'] for note in reopened.list_notes()} == {"Final", "Other"}
+
+    def test_delete_note(self):
+        """Test deleting a note."""
+        vault = NoteVault.create(self.vault_path, self.test_password)
+        note_id = vault.add_note("Temporary", "bye")
+        vault.delete_note(note_id)
+
+        reopened = NoteVault.open(self.vault_path, self.test_password)
+        assert reopened.list_notes() == []
+        with pytest.raises(KeyError):
+            reopened.read_note(note_id)
+
+    def test_compaction_reclaims_dead_records(self):
+        """Test that compaction shrinks the file and keeps every live note."""
+        vault = NoteVault.create(self.vault_path, self.test_password)
+        vault.COMPACTION_DEAD_RATIO = 1.0  # Keep automatic compaction out of the way
+        with vault.batch():
+            keep_id = vault.add_note("Keep", "kept content")
+            drop_ids = [vault.add_note(f"Drop {i}", os.urandom(4096).hex()) for i in range(20)]
+        with vault.batch():
+            for note_id in drop_ids:
+                vault.delete_note(note_id)
+
+        vault.COMPACTION_DEAD_RATIO = NoteVault.COMPACTION_DEAD_RATIO
+        assert vault.needs_compaction()
+        size_before = os.path.getsize(self.vault_path)
+        vault.compact()
+
+        assert os.path.getsize(self.vault_path) < size_before / 4
+        assert not vault.needs_compaction()
+        reopened = NoteVault.open(self.vault_path, self.test_password)
+        assert reopened.read_note(keep_id) == "kept content"
+
+    def test_compaction_runs_automatically(self):
+        """Test that heavy churn triggers compaction on its own."""
+        vault = NoteVault.create(self.vault_path, self.test_password)
+        note_id = vault.add_note("Churn", "x")
+        for i in range(30):
+            vault.update_note(note_id, os.urandom(4096).hex())
+
+        assert os.path.getsize(self.vault_path) < 30 * 8192 / 2
+        assert NoteVault.open(self.vault_path, self.test_password).read_note(note_id) == vault.read_note(note_id)
+
+    def test_change_password(self):
+        """Test changing the vault password."""
+        vault = NoteVault.create(self.vault_path, self.test_password)
+        note_id = vault.add_note("Secret", "content")
+        vault.change_password(self.test_password, "NewPassword456!")
+
+        reopened = NoteVault.open(self.vault_path, "NewPassword456!")
+        assert reopened.read_note(note_id) == "content"
+        with pytest.raises(InvalidPasswordError):
+            NoteVault.open(self.vault_path, self.test_password)
+
+    def test_tampered_header_is_rejected(self):
+        """Test that the header is authenticated along with the index."""
+        vault = NoteVault.create(self.vault_path, self.test_password)
+        vault.add_note("Secret", "content")
+        header_size = len(vault._pack_header(0, 0))
+
+        with open(self.vault_path, 'r+b') as file:
+            file.seek(header_size - 1)  # Unused key slot capacity, which no password opens
+            last = file.read(1)
+            file.seek(header_size - 1)
+            file.write(bytes([last[0] ^ 1]))
+
+        with pytest.raises(EncryptionError):
+            NoteVault.open(self.vault_path, self.test_password)
+
+    def test_failed_compaction_leaves_vault_intact(self):
+        """Test that a failing compaction removes its temporary file and keeps the index."""
+        vault = NoteVault.create(self.vault_path, self.test_password)
+        note_id = vault.add_note("Keep", "kept content")
+        index = vault.index
+
+        with patch.object(NoteVault, '_append_index', side_effect=OSError("disk full")):
+            with pytest.raises(OSError):
+                vault.compact()
+
+        assert not os.path.exists(self.vault_path + '.compact')
+        assert vault.index == index
+        assert vault.read_note(note_id) == "kept content"
+
+    def test_requires_authenticated_algorithm(self):
+        """Test that unauthenticated CBC cannot be used for vaults."""
+        with pytest.raises(EncryptionError):
+            NoteVault.create(self.vault_path, self.test_password, algorithm="AES-256")
+
+    def test_open_rejects_unauthenticated_algorithm(self):
+        """Test that a header naming CBC is rejected before any key slot is opened."""
+        vault = NoteVault.create(self.vault_path, self.test_password)
+        vault.algorithm = "AES-256"
+        with open(self.vault_path, 'r+b') as file:
+            file.write(vault._pack_header(0, 0))
+
+        with patch.object(EncryptionService, 'open_key_slots') as open_key_slots:
+            with pytest.raises(EncryptionError):
+                NoteVault.open(self.vault_path, self.test_password)
+        open_key_slots.assert_not_called()
+
+    def test_not_a_vault(self):
+        """Test opening a file that is not a vault."""
+        with open(self.vault_path, 'wb') as file:
+            file.write(b"plain text")
+
+        with pytest.raises(EncryptionError):
+            NoteVault.open(self.vault_path, self.test_password)
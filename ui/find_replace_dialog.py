@@ -1,9 +1,14 @@
 from PyQt5.QtWidgets import QDialog, QLabel, QLineEdit, QPushButton, QVBoxLayout, QHBoxLayout, QCheckBox, QMessageBox
 
+from core.search_engine import MatchCounter
+
 
 class FindReplaceDialog(QDialog):
     """
     A dialog for finding and replacing text in the notepad application.
+
+    While it is open, the occurrences of the text being typed are
+    highlighted in the current editor and counted in the background.
     """
 
     def __init__(self, parent=None):
@@ -15,12 +20,17 @@ class FindReplaceDialog(QDialog):
         """
         super().__init__(parent)
         self.parent_editor = parent
+        self.editor = None  # Editor showing the search highlights
+        self.match_counter = MatchCounter(self)
+        self.match_counter.counted.connect(self.show_match_count)
         self.init_ui()
+        if hasattr(parent, 'tab_widget'):
+            parent.tab_widget.currentChanged.connect(self.update_search)
 
     def init_ui(self):
         """Initialize the user interface components."""
         self.setWindowTitle("Find and Replace")
-        self.setFixedSize(400, 200)
+        self.setFixedSize(400, 220)
         layout = QVBoxLayout()
 
         # Find section
@@ -43,6 +53,8 @@ class FindReplaceDialog(QDialog):
         self.wrap_around.setChecked(True)
         layout.addWidget(self.match_case)
         layout.addWidget(self.wrap_around)
+        self.count_label = QLabel()
+        layout.addWidget(self.count_label)
 
         # Buttons
         button_layout = QHBoxLayout()
@@ -64,6 +76,47 @@ class FindReplaceDialog(QDialog):
         self.replace_btn.clicked.connect(self.replace_current)
         self.replace_all_btn.clicked.connect(self.replace_all)
         self.cancel_btn.clicked.connect(self.close)
+        self.find_input.textChanged.connect(self.update_search)
+        self.match_case.toggled.connect(self.update_search)
+
+    def showEvent(self, event):
+        """Highlight the search text again whenever the dialog is shown."""
+        super().showEvent(event)
+        self.update_search()
+
+    def hideEvent(self, event):
+        """Remove the highlights and stop counting."""
+        super().hideEvent(event)
+        self.update_search()
+
+    def update_search(self):
+        """Highlight the visible occurrences of the search text at once and start counting them all."""
+        editor = getattr(self.parent_editor, 'text_editor', None) if self.isVisible() else None
+        text = self.find_input.text()
+        if self.editor is not None and self.editor is not editor:
+            try:
+                self.editor.set_search("")
+            except RuntimeError:
+                pass  # Its tab was closed
+        self.editor = editor
+
+        if editor is None or not text:
+            self.match_counter.cancel()
+            self.count_label.clear()
+            if editor is not None:
+                editor.set_search("")
+            return
+        match_case = self.match_case.isChecked()
+        editor.set_search(text, match_case)
+        self.match_counter.start(editor.document(), text, match_case)
+        self.count_label.setText("Counting matches...")
+
+    def show_match_count(self, count):
+        """Show the number of occurrences once counted."""
+        if count == 1:
+            self.count_label.setText("1 match")
+        else:
+            self.count_label.setText(f"{count or 'No'} matches")
 
     def find_next(self):
         """Find the next occurrence of the search text."""
@@ -8,6 +8,7 @@ from features.file_operations.print_file import PrintFileAction
 from features.file_operations.exit_app import ExitAppAction
 from features.file_operations.recent_files import RecentFilesAction
 from features.file_operations.save_encrypted import SaveEncryptedAction
+from features.file_operations.change_password import ChangePasswordAction
 
 from features.edit_operations.undo import UndoAction
 from features.edit_operations.redo import RedoAction
@@ -18,6 +19,7 @@ from features.edit_operations.delete import DeleteAction
 from features.edit_operations.find import FindAction
 from features.edit_operations.replace import ReplaceAction
 from features.edit_operations.goto import GotoAction
+from features.edit_operations.goto_bracket import GotoBracketAction
 from features.edit_operations.select_all import SelectAllAction
 from features.edit_operations.time_date import TimeDateAction
 
@@ -30,6 +32,10 @@ from features.view_operations.zoom_out import ZoomOutAction
 from features.view_operations.restore_zoom import RestoreZoomAction
 from features.view_operations.toggle_status_bar import ToggleStatusBarAction
 from features.view_operations.dark_mode import DarkModeAction
+from features.view_operations.toggle_fold import ToggleFoldAction
+from features.view_operations.fold_all import FoldAllAction
+from features.view_operations.unfold_all import UnfoldAllAction
+from features.view_operations.statistics import StatisticsAction
 
 from features.help_operations.about import AboutAction
 from features.help_operations.setup_file_associations import SetupFileAssociationsAction
@@ -78,6 +84,9 @@ class MenuBar(QMenuBar):
         save_encrypted_action = SaveEncryptedAction(self.parent_window)
         file_menu.addAction(save_encrypted_action)
 
+        change_password_action = ChangePasswordAction(self.parent_window)
+        file_menu.addAction(change_password_action)
+
         file_menu.addSeparator()
 
         # Recent files submenu
@@ -135,6 +144,9 @@ class MenuBar(QMenuBar):
         goto_action = GotoAction(self.parent_window)
         edit_menu.addAction(goto_action)
 
+        goto_bracket_action = GotoBracketAction(self.parent_window)
+        edit_menu.addAction(goto_bracket_action)
+
         edit_menu.addSeparator()
 
         # Selection operations
@@ -174,9 +186,23 @@ class MenuBar(QMenuBar):
         restore_zoom_action = RestoreZoomAction(self.parent_window)
         zoom_menu.addAction(restore_zoom_action)
 
+        fold_menu = view_menu.addMenu("&Folding")
+
+        toggle_fold_action = ToggleFoldAction(self.parent_window)
+        fold_menu.addAction(toggle_fold_action)
+
+        fold_all_action = FoldAllAction(self.parent_window)
+        fold_menu.addAction(fold_all_action)
+
+        unfold_all_action = UnfoldAllAction(self.parent_window)
+        fold_menu.addAction(unfold_all_action)
+
         toggle_status_bar_action = ToggleStatusBarAction(self.parent_window)
         view_menu.addAction(toggle_status_bar_action)
 
+        statistics_action = StatisticsAction(self.parent_window)
+        view_menu.addAction(statistics_action)
+
         view_menu.addSeparator()
 
         dark_mode_action = DarkModeAction(self.parent_window)
@@ -3,13 +3,14 @@ Password dialog for encrypted notepads.
 Provides UI for password entry, encryption settings, and password strength validation.
 """
 
-from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit,
+from PyQt5.QtWidgets import (QApplication, QDialog, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit,
                              QPushButton, QComboBox, QCheckBox, QProgressBar,
                              QMessageBox, QFormLayout, QGroupBox, QTextEdit)
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QFont, QPixmap, QIcon
 
-from utils.security.encryption import EncryptionService
+from utils.security.crypto_worker import CryptoWorker
+from utils.security.encryption import EncryptionService, InvalidPasswordError
 
 
 class PasswordDialog(QDialog):
@@ -17,6 +18,30 @@ class PasswordDialog(QDialog):
     Dialog for password entry and encryption settings.
     """
 
+    benchmark_worker = None  # Measures the algorithms the first time a dialog needs their speeds
+
+    ALGORITHM_LABELS = {
+        'AES-256-GCM': "MAXIMUM SECURITY",
+        'AES-192-GCM': "STRONG SECURITY",
+        'AES-128-GCM': "GOOD SECURITY",
+        'ChaCha20': "MODERN",
+        'XChaCha20': "ENHANCED MODERN",
+        'AES-256': "LEGACY CBC",
+        'AES-192': "LEGACY CBC",
+        'AES-128': "LEGACY CBC"
+    }
+
+    ALGORITHM_DESCRIPTIONS = {
+        'AES-256-GCM': "AES-256-GCM: MILITARY-GRADE AUTHENTICATED ENCRYPTION - MOST SECURE OPTION FOR SENSITIVE DATA",
+        'AES-192-GCM': "AES-192-GCM: VERY STRONG AUTHENTICATED ENCRYPTION - EXCELLENT SECURITY WITH GOOD PERFORMANCE",
+        'AES-128-GCM': "AES-128-GCM: STRONG AUTHENTICATED ENCRYPTION - GOOD SECURITY FOR MOST EVERYDAY USE",
+        'ChaCha20': "ChaCha20: MODERN AUTHENTICATED ENCRYPTION - FASTEST ON COMPUTERS WITHOUT AES HARDWARE SUPPORT",
+        'XChaCha20': "XChaCha20: ENHANCED MODERN ENCRYPTION - CHACHA20 WITH LONGER RANDOM NONCES",
+        'AES-256': "AES-256 CBC: UNAUTHENTICATED LEGACY MODE - PREFER AES-256-GCM FOR NEW DOCUMENTS",
+        'AES-192': "AES-192 CBC: UNAUTHENTICATED LEGACY MODE - PREFER AES-192-GCM FOR NEW DOCUMENTS",
+        'AES-128': "AES-128 CBC: UNAUTHENTICATED LEGACY MODE - PREFER AES-128-GCM FOR NEW DOCUMENTS"
+    }
+
     def __init__(self, parent=None, mode="encrypt", current_password=None):
         """
         Initialize password dialog.
@@ -151,8 +176,7 @@ class PasswordDialog(QDialog):
         algorithm_label = QLabel("CHOOSE ENCRYPTION ALGORITHM:")
         algorithm_label.setStyleSheet("font-weight: bold; font-size: 12px; color: #FF6B35;")
         self.algorithm_combo = QComboBox()
-        self.algorithm_combo.addItems(["AES-256 (RECOMMENDED - MAXIMUM SECURITY)", "AES-192 (STRONG SECURITY)", "AES-128 (GOOD SECURITY)", "ChaCha20 (MODERN & FAST)", "XChaCha20 (ENHANCED MODERN - BEST)"])
-        self.algorithm_combo.setCurrentText("AES-256 (RECOMMENDED - MAXIMUM SECURITY)")
+        self.populate_algorithms()
         self.algorithm_combo.setStyleSheet("""
             QComboBox {
                 padding: 8px;
@@ -193,7 +217,7 @@ class PasswordDialog(QDialog):
         settings_layout.addRow(algorithm_label, self.algorithm_combo)
 
         # Algorithm description
-        self.algorithm_desc = QLabel("AES-256: MILITARY-GRADE ENCRYPTION - MOST SECURE OPTION RECOMMENDED FOR SENSITIVE DATA")
+        self.algorithm_desc = QLabel(self.ALGORITHM_DESCRIPTIONS[self.get_algorithm()])
         self.algorithm_desc.setWordWrap(True)
         self.algorithm_desc.setStyleSheet("""
             QLabel {
@@ -212,6 +236,11 @@ class PasswordDialog(QDialog):
         # Connect algorithm change to update description
         self.algorithm_combo.currentTextChanged.connect(self.update_algorithm_description)
 
+        # Compress-then-encrypt option
+        self.compress_check = QCheckBox("Compress before encrypting (smaller files for large text)")
+        self.compress_check.setChecked(True)
+        settings_layout.addRow("", self.compress_check)
+
         # Generate password button - make it HUGE and visible
         generate_btn = QPushButton("🔑 GENERATE SECURE PASSWORD")
         generate_btn.setStyleSheet("""
@@ -240,6 +269,64 @@ class PasswordDialog(QDialog):
         settings_group.setLayout(settings_layout)
         layout.addWidget(settings_group)
 
+    def populate_algorithms(self):
+        """
+        Fill the algorithm list with the measured speed of each option on this
+        computer and select the fastest recommended one.
+
+        The speeds come from the per-host benchmark. The first time, it runs in
+        a worker shared by all dialogs of the process, and the list is labelled
+        once it is done.
+        """
+        # Authenticated algorithms first, legacy CBC modes last
+        algorithms = sorted(self.encryption_service.ALGORITHMS,
+                            key=lambda name: not self.encryption_service.is_authenticated_algorithm(name))
+        for algorithm in algorithms:
+            self.algorithm_combo.addItem(algorithm, algorithm)
+        self.algorithm_combo.activated.connect(self.on_algorithm_chosen)
+        self.algorithm_chosen = False
+
+        speeds = self.encryption_service.cached_benchmark()
+        if speeds is None:
+            worker = PasswordDialog.benchmark_worker
+            if worker is None:
+                worker = CryptoWorker(self.encryption_service.benchmark_algorithms)
+                QApplication.instance().aboutToQuit.connect(worker.wait)
+                PasswordDialog.benchmark_worker = worker  # Outlives the dialog, which may close first
+                worker.start()
+            worker.succeeded.connect(self.show_algorithm_speeds)
+            speeds = {}
+        self.show_algorithm_speeds(speeds)
+
+    def show_algorithm_speeds(self, speeds):
+        """Label the algorithms with their speeds and select the recommended one, unless one was chosen."""
+        recommended = self.encryption_service.recommended_algorithm(measure=False)
+        for index in range(self.algorithm_combo.count()):
+            algorithm = self.algorithm_combo.itemData(index)
+            label = self.ALGORITHM_LABELS.get(algorithm, "")
+            if speeds and algorithm == recommended:
+                label = f"RECOMMENDED - {label}"
+            text = f"{algorithm} ({label})"
+            if algorithm in speeds:
+                text += f" - {speeds[algorithm]:,.0f} MB/s"
+            self.algorithm_combo.setItemText(index, text)
+
+        if not self.algorithm_chosen:
+            self.algorithm_combo.setCurrentIndex(self.algorithm_combo.findData(recommended))
+
+    def on_algorithm_chosen(self):
+        """Keep the user's choice when the benchmark finishes."""
+        self.algorithm_chosen = True
+
+    def done(self, result):
+        """Stop waiting for the benchmark once the dialog closes."""
+        if PasswordDialog.benchmark_worker is not None:
+            try:
+                PasswordDialog.benchmark_worker.succeeded.disconnect(self.show_algorithm_speeds)
+            except TypeError:
+                pass  # Not connected
+        super().done(result)
+
     def setup_buttons(self, layout):
         """Setup dialog buttons."""
         button_layout = QHBoxLayout()
@@ -365,35 +452,38 @@ class PasswordDialog(QDialog):
     def get_algorithm(self):
         """Get the selected encryption algorithm."""
         if hasattr(self, 'algorithm_combo'):
-            algorithm_text = self.algorithm_combo.currentText()
-            # Extract algorithm name from "Algorithm (Description)" format
-            if " (" in algorithm_text:
-                return algorithm_text.split(" (")[0]
-            return algorithm_text
-        return "AES-256"
+            return self.algorithm_combo.currentData()
+        return self.encryption_service.recommended_algorithm(measure=False)
+
+    def get_compression(self):
+        """Get the compression mode for encryption ('auto' or 'none')."""
+        if hasattr(self, 'compress_check') and not self.compress_check.isChecked():
+            return 'none'
+        return 'auto'
 
     def update_algorithm_description(self, algorithm_text):
         """Update the algorithm description based on selection."""
-        descriptions = {
-            "AES-256 (RECOMMENDED - MAXIMUM SECURITY)": "AES-256: MILITARY-GRADE ENCRYPTION - MOST SECURE OPTION RECOMMENDED FOR SENSITIVE DATA",
-            "AES-192 (STRONG SECURITY)": "AES-192: VERY STRONG ENCRYPTION - EXCELLENT SECURITY WITH GOOD PERFORMANCE",
-            "AES-128 (GOOD SECURITY)": "AES-128: STRONG ENCRYPTION - GOOD SECURITY FOR MOST EVERYDAY USE",
-            "ChaCha20 (MODERN & FAST)": "ChaCha20: MODERN FAST ENCRYPTION - EXCELLENT SECURITY WITH HIGH SPEED",
-            "XChaCha20 (ENHANCED MODERN - BEST)": "XChaCha20: ENHANCED MODERN ENCRYPTION - BEST SPEED/SECURITY BALANCE WITH RANDOM NONCES"
-        }
-        self.algorithm_desc.setText(descriptions.get(algorithm_text, ""))
+        self.algorithm_desc.setText(self.ALGORITHM_DESCRIPTIONS.get(self.get_algorithm(), ""))
 
 
 class PasswordPromptDialog(QDialog):
     """
     Simple dialog for password entry (decrypt mode).
+
+    When a ``decrypt_job`` is given, the dialog runs it in a background
+    worker after the user confirms, shows a busy indicator while it runs and
+    stays open on a wrong password so the user can try again.
     """
 
-    def __init__(self, parent=None, title="Enter Password"):
+    def __init__(self, parent=None, title="Enter Password", decrypt_job=None):
         super().__init__(parent)
         self.setWindowTitle(title)
         self.setModal(True)
         self.resize(300, 150)
+        self.decrypt_job = decrypt_job
+        self.worker = None
+        self.result_value = None
+        self.error = None
 
         layout = QVBoxLayout()
 
@@ -411,19 +501,95 @@ class PasswordPromptDialog(QDialog):
         )
         layout.addWidget(self.show_password_check)
 
+        # Busy indicator shown while the decrypt job runs
+        self.status_label = QLabel("")
+        self.status_label.setWordWrap(True)
+        self.status_label.hide()
+        layout.addWidget(self.status_label)
+
+        self.busy_bar = QProgressBar()
+        self.busy_bar.setRange(0, 0)
+        self.busy_bar.setTextVisible(False)
+        self.busy_bar.hide()
+        layout.addWidget(self.busy_bar)
+
         button_layout = QHBoxLayout()
-        cancel_btn = QPushButton("Cancel")
-        cancel_btn.clicked.connect(self.reject)
-        button_layout.addWidget(cancel_btn)
+        self.cancel_btn = QPushButton("Cancel")
+        self.cancel_btn.clicked.connect(self.reject)
+        button_layout.addWidget(self.cancel_btn)
 
-        ok_btn = QPushButton("Decrypt")
-        ok_btn.clicked.connect(self.accept)
-        ok_btn.setDefault(True)
-        button_layout.addWidget(ok_btn)
+        self.ok_btn = QPushButton("Decrypt")
+        self.ok_btn.clicked.connect(self.on_decrypt_clicked)
+        self.ok_btn.setDefault(True)
+        button_layout.addWidget(self.ok_btn)
 
         layout.addLayout(button_layout)
         self.setLayout(layout)
 
+    def on_decrypt_clicked(self):
+        """Accept the dialog, or start the decrypt job if one was given."""
+        if self.decrypt_job is None:
+            self.accept()
+            return
+
+        password = self.get_password()
+        if not password:
+            self.show_status("Password cannot be empty.", error=True)
+            return
+
+        self.set_busy(True)
+        self.worker = CryptoWorker(self.decrypt_job, password, parent=self)
+        self.worker.succeeded.connect(self.on_decrypt_succeeded)
+        self.worker.failed.connect(self.on_decrypt_failed)
+        self.worker.start()
+
+    def on_decrypt_succeeded(self, result):
+        """Store the decrypted result and close the dialog."""
+        self.result_value = result
+        self.set_busy(False)
+        self.accept()
+
+    def on_decrypt_failed(self, error):
+        """Let the user retry on a wrong password, otherwise close with the error."""
+        self.set_busy(False)
+        if isinstance(error, InvalidPasswordError):
+            self.show_status("Incorrect password. Please try again.", error=True)
+            self.password_edit.selectAll()
+            self.password_edit.setFocus()
+            return
+        self.error = error
+        self.reject()
+
+    def set_busy(self, busy):
+        """Toggle the busy indicator and lock the inputs while working."""
+        self.password_edit.setEnabled(not busy)
+        self.show_password_check.setEnabled(not busy)
+        self.ok_btn.setEnabled(not busy)
+        self.cancel_btn.setEnabled(not busy)
+        self.busy_bar.setVisible(busy)
+        if busy:
+            self.show_status("Decrypting...")
+
+    def show_status(self, message, error=False):
+        """Show a status or error message inside the dialog."""
+        self.status_label.setStyleSheet("color: #dc3545;" if error else "")
+        self.status_label.setText(message)
+        self.status_label.show()
+
+    def reject(self):
+        """Ignore close requests while the decrypt job is still running."""
+        if self.worker is not None and self.worker.isRunning():
+            return
+        super().reject()
+
     def get_password(self):
         """Get the entered password."""
-        return self.password_edit.text()
\ No newline at end of file
+        return self.password_edit.text()
+
+    def get_result(self):
+        """Get the result of the decrypt job, if it succeeded."""
+        return self.result_value
+
+    def get_error(self):
+        """Get the error that ended the decrypt job, if any."""
+        return self.error
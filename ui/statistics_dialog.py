@@ -0,0 +1,198 @@
+"""
+Statistics panel.
+Shows the status bar's word, character and line counts along with word
+frequencies, sentence length, reading time and a line length histogram.
+The latter are computed in a background worker while the panel is open.
+"""
+
+from PyQt5.QtCore import QTimer
+from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QFormLayout, QGroupBox, QLabel,
+                             QProgressBar, QPushButton, QHBoxLayout)
+
+from core.document_stats import BlockTexts, DocumentStats, LINE_LENGTH_BUCKETS, StatisticsWorker
+
+READING_SPEED = 238  # Words per minute of an average silent reader
+
+
+class StatisticsDialog(QDialog):
+    """
+    A panel with statistics of the current document.
+
+    It follows the current tab and refreshes shortly after the text stops
+    changing. Only one worker runs at a time; edits made while it runs are
+    picked up by another run once it is done. The block texts the worker
+    reads are only kept while the panel is shown.
+    """
+
+    REFRESH_DELAY = 500  # Milliseconds of quiet typing before the statistics are refreshed
+
+    def __init__(self, parent=None):
+        """
+        Initialize the statistics dialog.
+
+        Args:
+            parent: The parent widget (typically the main notepad window)
+        """
+        super().__init__(parent)
+        self.parent_window = parent
+        self.editor = None
+        self.block_texts = None
+        self.stats = DocumentStats()
+        self.worker = None
+        self.pending = False
+
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setSingleShot(True)
+        self.refresh_timer.setInterval(self.REFRESH_DELAY)
+        self.refresh_timer.timeout.connect(self.refresh)
+
+        self.init_ui()
+        if hasattr(parent, 'tab_widget'):
+            parent.tab_widget.currentChanged.connect(self.schedule_refresh)
+
+    def init_ui(self):
+        """Initialize the user interface components."""
+        self.setWindowTitle("Statistics")
+        self.resize(360, 460)
+        layout = QVBoxLayout()
+
+        form = QFormLayout()
+        self.words_label = QLabel()
+        self.chars_label = QLabel()
+        self.lines_label = QLabel()
+        self.unique_words_label = QLabel()
+        self.sentence_length_label = QLabel()
+        self.reading_time_label = QLabel()
+        form.addRow("Words:", self.words_label)
+        form.addRow("Characters:", self.chars_label)
+        form.addRow("Lines:", self.lines_label)
+        form.addRow("Unique words:", self.unique_words_label)
+        form.addRow("Average sentence:", self.sentence_length_label)
+        form.addRow("Reading time:", self.reading_time_label)
+        layout.addLayout(form)
+
+        top_words_group = QGroupBox("Most Frequent Words")
+        top_words_layout = QVBoxLayout()
+        self.top_words_label = QLabel()
+        self.top_words_label.setWordWrap(True)
+        top_words_layout.addWidget(self.top_words_label)
+        top_words_group.setLayout(top_words_layout)
+        layout.addWidget(top_words_group)
+
+        histogram_group = QGroupBox("Line Lengths")
+        histogram_layout = QFormLayout()
+        self.histogram_bars = []
+        lower = 0
+        for upper in LINE_LENGTH_BUCKETS + (None,):
+            bar = QProgressBar()
+            bar.setFormat("%v")
+            bar.setValue(0)
+            self.histogram_bars.append(bar)
+            name = f"{lower}-{upper - 1}" if upper is not None else f"{lower}+"
+            histogram_layout.addRow(name, bar)
+            lower = upper
+        histogram_group.setLayout(histogram_layout)
+        layout.addWidget(histogram_group)
+
+        button_layout = QHBoxLayout()
+        self.status_label = QLabel("Updating...")
+        self.status_label.hide()
+        button_layout.addWidget(self.status_label)
+        button_layout.addStretch()
+        self.close_btn = QPushButton("Close")
+        self.close_btn.clicked.connect(self.close)
+        button_layout.addWidget(self.close_btn)
+        layout.addLayout(button_layout)
+
+        self.setLayout(layout)
+
+    def showEvent(self, event):
+        """Refresh the statistics whenever the panel is shown."""
+        super().showEvent(event)
+        self.refresh()
+
+    def hideEvent(self, event):
+        """Stop following the editor and let go of its block texts."""
+        super().hideEvent(event)
+        self.refresh_timer.stop()
+        self.watch_editor(None)
+
+    def schedule_refresh(self):
+        """Refresh once the current burst of edits is over, if the panel is open."""
+        if self.isVisible():
+            self.refresh_timer.start()
+
+    def watch_editor(self, editor):
+        """Follow the text changes of an editor, or of none."""
+        if editor is self.editor:
+            return
+        if self.editor is not None:
+            try:
+                self.editor.textChanged.disconnect(self.schedule_refresh)
+            except (TypeError, RuntimeError):
+                pass  # Not connected, or its tab was closed
+            self.block_texts.deleteLater()
+            self.block_texts = None
+        if editor is not None:
+            editor.textChanged.connect(self.schedule_refresh)
+            self.block_texts = BlockTexts(editor.document(), parent=self)
+            self.block_texts.filled.connect(self.refresh)
+        self.editor = editor
+
+    def refresh(self):
+        """Update the counts now and start the worker for the rest."""
+        if not self.isVisible():
+            return
+        editor = getattr(self.parent_window, 'text_editor', None)
+        self.watch_editor(editor)
+        if editor is None:
+            return
+        words = editor.get_word_count()
+        self.words_label.setText(str(words))
+        self.chars_label.setText(str(editor.get_char_count()))
+        self.lines_label.setText(str(editor.get_line_count()))
+        self.reading_time_label.setText(self.format_minutes(words / READING_SPEED))
+
+        if self.worker is not None:
+            self.pending = True
+            return
+        snapshot = self.block_texts.snapshot()
+        if snapshot is None:
+            self.status_label.show()
+            return  # Refreshed again once the block texts are read
+        self.worker = StatisticsWorker(self.stats, snapshot, parent=self)
+        self.worker.computed.connect(self.show_results)
+        self.worker.finished.connect(self.on_worker_finished)
+        self.status_label.show()
+        self.worker.start()
+
+    def on_worker_finished(self):
+        """Start another run if the text changed meanwhile."""
+        self.worker.deleteLater()
+        self.worker = None
+        if self.pending:
+            self.pending = False
+            self.refresh()
+        if self.worker is None:
+            self.status_label.hide()
+
+    def show_results(self, results):
+        """Show the statistics computed by the worker."""
+        self.unique_words_label.setText(str(results["unique_words"]))
+        self.sentence_length_label.setText(f"{results['sentence_length']:.1f} words")
+        self.top_words_label.setText(
+            ", ".join(f"{word} ({count})" for word, count in results["top_words"]) or "None")
+        line_lengths = results["line_lengths"]
+        for bar, lines in zip(self.histogram_bars, line_lengths):
+            bar.setMaximum(max(max(line_lengths), 1))
+            bar.setValue(lines)
+
+    @staticmethod
+    def format_minutes(minutes):
+        """Format a reading time."""
+        if minutes < 1:
+            return "Less than a minute"
+        hours, minutes = divmod(round(minutes), 60)
+        if hours:
+            return f"{hours} h {minutes} min"
+        return f"{minutes} min"
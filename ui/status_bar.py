@@ -1,4 +1,5 @@
-from PyQt5.QtWidgets import QStatusBar, QLabel
+from PyQt5.QtCore import QTimer
+from PyQt5.QtWidgets import QStatusBar, QLabel, QProgressBar
 
 
 class StatusBar:
@@ -6,6 +7,8 @@ class StatusBar:
     Custom status bar for the notepad application.
     """
 
+    COUNTER_DELAY = 150  # Milliseconds of quiet typing before the counters update
+
     def __init__(self, parent=None):
         self.parent_window = parent
         self.status_bar = QStatusBar(parent)
@@ -16,13 +19,30 @@ class StatusBar:
         self.char_count_label = QLabel("Chars: 0")
         self.line_count_label = QLabel("Lines: 1")
         self.zoom_label = QLabel("100%")
+        self.occurrences_label = QLabel()
+        self.occurrences_label.hide()
+
+        # Indeterminate progress bar shown during background work
+        self.busy_bar = QProgressBar()
+        self.busy_bar.setRange(0, 0)
+        self.busy_bar.setTextVisible(False)
+        self.busy_bar.setMaximumWidth(120)
+        self.busy_bar.hide()
 
         # Add permanent widgets
+        self.status_bar.addPermanentWidget(self.occurrences_label)
         self.status_bar.addPermanentWidget(self.line_col_label)
         self.status_bar.addPermanentWidget(self.word_count_label)
         self.status_bar.addPermanentWidget(self.char_count_label)
         self.status_bar.addPermanentWidget(self.line_count_label)
         self.status_bar.addPermanentWidget(self.zoom_label)
+        self.status_bar.addPermanentWidget(self.busy_bar)
+
+        # Coalesces the counter updates of a burst of edits
+        self.counter_timer = QTimer(self.status_bar)
+        self.counter_timer.setSingleShot(True)
+        self.counter_timer.setInterval(self.COUNTER_DELAY)
+        self.counter_timer.timeout.connect(self.update_counters)
 
     def update_cursor_position(self):
         """Update the cursor position display."""
@@ -30,18 +50,28 @@ class StatusBar:
             line, col = self.parent_window.text_editor.get_cursor_position()
             self.line_col_label.setText(f"Line {line}, Column {col}")
 
+    def schedule_counters(self):
+        """Update the counters once the current burst of edits is over."""
+        self.counter_timer.start()
+
+    def update_counters(self):
+        """Update the word, character and line counts, unless the status bar is hidden."""
+        if self.status_bar.isHidden():
+            return
+        self.update_word_count()
+        self.update_char_count()
+        self.update_line_count()
+
     def update_word_count(self):
         """Update the word count display."""
         if hasattr(self.parent_window, 'text_editor'):
-            text = self.parent_window.text_editor.get_content()
-            words = len(text.split()) if text.strip() else 0
+            words = self.parent_window.text_editor.get_word_count()
             self.word_count_label.setText(f"Words: {words}")
 
     def update_char_count(self):
         """Update the character count display."""
         if hasattr(self.parent_window, 'text_editor'):
-            text = self.parent_window.text_editor.get_content()
-            chars = len(text)
+            chars = self.parent_window.text_editor.get_char_count()
             self.char_count_label.setText(f"Chars: {chars}")
 
     def update_line_count(self):
@@ -50,10 +80,29 @@ class StatusBar:
             lines = self.parent_window.text_editor.get_line_count()
             self.line_count_label.setText(f"Lines: {lines}")
 
+    def update_occurrences(self, word, count):
+        """Show how often the word under the cursor occurs, or hide the count if there is no word."""
+        if not word:
+            self.occurrences_label.hide()
+            return
+        occurrences = "..." if count is None else count
+        self.occurrences_label.setText(f"Occurrences: {occurrences}")
+        self.occurrences_label.show()
+
     def update_zoom_label(self, zoom_level):
         """Update the zoom level display."""
         self.zoom_label.setText(f"{zoom_level}%")
 
     def show_message(self, message, timeout=0):
         """Show a message in the status bar."""
-        self.status_bar.showMessage(message, timeout)
\ No newline at end of file
+        self.status_bar.showMessage(message, timeout)
+
+    def show_busy(self, message):
+        """Show the busy indicator with a message until clear_busy is called."""
+        self.busy_bar.show()
+        self.status_bar.showMessage(message)
+
+    def clear_busy(self):
+        """Hide the busy indicator."""
+        self.busy_bar.hide()
+        self.status_bar.clearMessage()
@@ -0,0 +1,191 @@
+"""
+Headless batch encryption.
+Encrypts, decrypts or re-keys whole directory trees with EncryptionService,
+spreading the files across worker processes. Does not import PyQt5.
+
+Usage:
+    python -m utils.security.batch encrypt notes/ --output encrypted/
+    python -m utils.security.batch decrypt encrypted/ --output notes/
+    python -m utils.security.batch rekey encrypted/
+"""
+
+import argparse
+import getpass
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List, Optional, Tuple
+
+from utils.security.encryption import EncryptionService, EncryptionError, InvalidPasswordError
+
+
+ENCRYPTED_SUFFIX = '.enc'
+
+# Per-process state, set up once by _init_worker
+_service = None
+_passwords = None
+_options = None
+
+
+def plan_tasks(mode: str, source_dir: str, output_dir: Optional[str] = None,
+               suffix: str = ENCRYPTED_SUFFIX) -> List[Tuple[str, str]]:
+    """
+    List the (source, target) file pairs for a batch run.
+
+    Encrypting maps name to name + suffix, decrypting strips the suffix
+    again, and re-keying works in place. Targets mirror the layout of
+    source_dir under output_dir (default: next to the sources).
+    """
+    output_dir = output_dir or source_dir
+    tasks = []
+    for root, dirs, files in os.walk(source_dir):
+        dirs.sort()
+        for name in sorted(files):
+            source = os.path.join(root, name)
+            target = os.path.join(output_dir, os.path.relpath(source, source_dir))
+            if mode == 'encrypt':
+                if name.endswith(suffix):
+                    continue
+                target += suffix
+            elif mode == 'decrypt':
+                target = target[:-len(suffix)] if name.endswith(suffix) else target + '.decrypted'
+            else:
+                target = source
+            tasks.append((source, target))
+    return tasks
+
+
+def _init_worker(passwords: Tuple[str, Optional[str]], options: dict) -> None:
+    """Create the per-process encryption service."""
+    global _service, _passwords, _options
+    _service = EncryptionService()
+    _passwords = passwords
+    _options = options
+
+
+def _is_up_to_date(source: str, target: str) -> bool:
+    """Check if target exists and is at least as new as source."""
+    return os.path.exists(target) and os.path.getmtime(target) >= os.path.getmtime(source)
+
+
+def _process_file(mode: str, source: str, target: str) -> Tuple[str, str, int, str]:
+    """
+    Encrypt, decrypt or re-key one file in a worker process.
+
+    Returns:
+        Tuple of (source, status, size in bytes, message) where status is
+        'done', 'skipped' or 'failed'
+    """
+    password, new_password = _passwords
+    try:
+        size = os.path.getsize(source)
+        if mode == 'encrypt':
+            if _is_up_to_date(source, target) or _service.is_encrypted_file(source):
+                return source, 'skipped', 0, ''
+            os.makedirs(os.path.dirname(os.path.abspath(target)), exist_ok=True)
+            _service.encrypt_file(source, target, password, algorithm=_options['algorithm'],
+                                  compression=_options['compression'])
+        elif mode == 'decrypt':
+            if _is_up_to_date(source, target) or not _service.is_encrypted_file(source):
+                return source, 'skipped', 0, ''
+            os.makedirs(os.path.dirname(os.path.abspath(target)), exist_ok=True)
+            _service.decrypt_to_file(source, target, password)
+        else:
+            if not _service.is_encrypted_file(source):
+                return source, 'skipped', 0, ''
+            try:
+                _service.rekey_file(source, password, new_password)
+            except InvalidPasswordError:
+                # Already re-keyed by an earlier, interrupted run?
+                if _service.verify_password(source, new_password):
+                    return source, 'skipped', 0, ''
+                raise
+        return source, 'done', size, ''
+    except (EncryptionError, OSError) as e:
+        return source, 'failed', 0, str(e)
+
+
+def run_batch(mode: str, tasks: List[Tuple[str, str]], password: str, new_password: Optional[str] = None,
+              algorithm: str = 'AES-256-GCM', compression: str = 'auto', jobs: Optional[int] = None,
+              out=None, err=None) -> dict:
+    """
+    Run a batch over a process pool and print a throughput summary.
+
+    Returns:
+        Dict with counts of done, skipped and failed files, bytes processed
+        and elapsed seconds
+    """
+    out = out or sys.stdout
+    err = err or sys.stderr
+    summary = {'done': 0, 'skipped': 0, 'failed': 0, 'bytes': 0, 'elapsed': 0.0}
+    options = {'algorithm': algorithm, 'compression': compression}
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                             initargs=((password, new_password), options)) as executor:
+        futures = [executor.submit(_process_file, mode, source, target) for source, target in tasks]
+        for future in as_completed(futures):
+            source, status, size, message = future.result()
+            summary[status] += 1
+            summary['bytes'] += size
+            if status == 'failed':
+                print(f"FAILED {source}: {message}", file=err)
+    summary['elapsed'] = elapsed = time.perf_counter() - start
+
+    megabytes = summary['bytes'] / (1024 * 1024)
+    elapsed = max(elapsed, 1e-9)
+    print(f"{mode}: {summary['done']} done, {summary['skipped']} skipped, {summary['failed']} failed; "
+          f"{megabytes:.1f} MB in {elapsed:.2f}s ({megabytes / elapsed:.1f} MB/s, "
+          f"{summary['done'] / elapsed:.1f} files/s)", file=out)
+    return summary
+
+
+def _read_password(env_name: Optional[str], prompt: str, confirm: bool) -> str:
+    """Take a password from an environment variable or prompt for it."""
+    if env_name:
+        password = os.environ.get(env_name)
+        if password is None:
+            raise SystemExit(f"Environment variable {env_name} is not set")
+        return password
+
+    password = getpass.getpass(prompt)
+    if confirm and getpass.getpass("Confirm: ") != password:
+        raise SystemExit("Passwords do not match")
+    return password
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point; returns the process exit code."""
+    parser = argparse.ArgumentParser(
+        prog="python -m utils.security.batch",
+        description="Encrypt, decrypt or re-key every file under a directory."
+    )
+    parser.add_argument('mode', choices=('encrypt', 'decrypt', 'rekey'))
+    parser.add_argument('source', help="Directory to process")
+    parser.add_argument('--output', help="Directory for the results (default: next to the sources)")
+    parser.add_argument('--algorithm', default='AES-256-GCM', choices=list(EncryptionService.ALGORITHMS))
+    parser.add_argument('--compression', default='auto',
+                        choices=('auto', 'none') + EncryptionService.COMPRESSION_CODECS)
+    parser.add_argument('--suffix', default=ENCRYPTED_SUFFIX, help="Extension of encrypted files")
+    parser.add_argument('--jobs', type=int, help="Worker processes (default: one per CPU)")
+    parser.add_argument('--password-env', help="Read the password from this environment variable")
+    parser.add_argument('--new-password-env', help="Read the new password (rekey) from this environment variable")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.source):
+        parser.error(f"not a directory: {args.source}")
+
+    password = _read_password(args.password_env, "Password: ", confirm=args.mode == 'encrypt')
+    new_password = None
+    if args.mode == 'rekey':
+        new_password = _read_password(args.new_password_env, "New password: ", confirm=True)
+
+    tasks = plan_tasks(args.mode, args.source, args.output if args.mode != 'rekey' else None, args.suffix)
+    summary = run_batch(args.mode, tasks, password, new_password, algorithm=args.algorithm,
+                        compression=args.compression, jobs=args.jobs)
+    return 1 if summary['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
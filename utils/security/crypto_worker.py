@@ -0,0 +1,35 @@
+"""
+Background worker for encryption operations.
+Runs key derivation and ciphers off the GUI thread and reports back through signals.
+"""
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+
+class CryptoWorker(QThread):
+    """
+    Runs a single encryption or decryption job in a worker thread.
+
+    The job is any callable; its return value is delivered through the
+    ``succeeded`` signal and any exception it raises through ``failed``.
+    Both signals are queued back to the thread that owns the worker, so
+    slots connected from the GUI may touch widgets safely.
+    """
+
+    succeeded = pyqtSignal(object)
+    failed = pyqtSignal(object)
+
+    def __init__(self, job, *args, parent=None, **kwargs):
+        super().__init__(parent)
+        self.job = job
+        self.args = args
+        self.kwargs = kwargs
+
+    def run(self):
+        """Execute the job and emit its outcome."""
+        try:
+            result = self.job(*self.args, **self.kwargs)
+        except Exception as e:
+            self.failed.emit(e)
+        else:
+            self.succeeded.emit(result)
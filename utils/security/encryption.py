@@ -1,20 +1,31 @@
 """
 Secure encryption service for encrypted notepads.
-Provides AES encryption with PBKDF2 key derivation and secure file formats.
+Provides AES-GCM, AES-CBC and ChaCha20 encryption with PBKDF2 key derivation and secure file formats.
 """
 
 import os
+import mmap
 import hashlib
+import hmac
+import json
+import platform
 import secrets
-from typing import Optional, Tuple, Dict, Any
+import struct
+import tempfile
+import time
+import zlib
+import lzma
+from contextlib import contextmanager
+from typing import Optional, Tuple, Dict, Any, List, Union
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
 from cryptography.hazmat.backends import default_backend
 from cryptography.hazmat.primitives import padding
-from cryptography.hazmat.primitives.ciphers.aead import ChaCha20Poly1305
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM, ChaCha20Poly1305
 from cryptography.hazmat.primitives.ciphers import algorithms as crypto_algorithms
-from cryptography.exceptions import InvalidKey
+from cryptography.exceptions import InvalidKey, InvalidTag
+import cryptography
 
 
 class EncryptionError(Exception):
@@ -34,18 +45,56 @@ class EncryptionService:
     """
 
     # File format constants
-    MAGIC_HEADER = b"ENCRYPTED_NOTEPAD_V1"
+    MAGIC_HEADER = b"ENCRYPTED_NOTEPAD_V2"  # Current format, written by encrypt_data
+    MAGIC_HEADER_V1 = b"ENCRYPTED_NOTEPAD_V1"  # Legacy fixed-layout format, read only
     SALT_SIZE = 32
     IV_SIZE = 24  # Maximum IV size (for XChaCha20), pad others with zeros
     ALGORITHM_SIZE = 12  # Algorithm field size (enough for "XChaCha20" + padding)
     CHACHA_NONCE_SIZE = 12  # ChaCha20 uses 12-byte nonce
     XCHACHA_NONCE_SIZE = 24  # XChaCha20 uses 24-byte nonce
     AES_IV_SIZE = 16  # AES uses 16-byte IV
+    GCM_NONCE_SIZE = 12  # AES-GCM uses 12-byte nonce
+    GCM_TAG_SIZE = 16  # AES-GCM appends a 16-byte tag
     KEY_SIZE = 32  # 256 bits
     ITERATIONS = 100000
 
+    # V2 header field tags
+    FIELD_ALGORITHM = 1
+    FIELD_SALT = 2
+    FIELD_NONCE = 3
+    FIELD_COMPRESSION = 4  # Optional; absent means the plaintext is stored uncompressed
+    FIELD_KEY_CHECK = 5  # HMAC(derived key, "verify") for rejecting wrong passwords early
+    FIELD_KEY_SLOTS = 6  # Password-wrapped copies of a random data key (replaces SALT/KEY_CHECK)
+    HEADER_FIELDS = (FIELD_ALGORITHM, FIELD_SALT, FIELD_NONCE, FIELD_COMPRESSION, FIELD_KEY_CHECK,
+                     FIELD_KEY_SLOTS)
+    KEY_CHECK_SIZE = 16
+
+    # Envelope encryption: CAPACITY + COUNT + CAPACITY * (SALT + NONCE + WRAPPED_KEY + TAG)
+    KEY_SLOT_CAPACITY = 4  # Fixed, so re-keying never changes the header size
+    KEY_SLOT_ASSOCIATED_DATA = b"key-slot"
+
+    # Compression settings
+    COMPRESSION_CODECS = ('zlib', 'lzma')
+    COMPRESSION_MIN_SIZE = 512  # Smaller payloads are not worth compressing
+    COMPRESSION_SAMPLE_SIZE = 16384  # Bytes per sample for the compressibility check
+    COMPRESSION_SAMPLE_COUNT = 4
+    COMPRESSION_MAX_RATIO = 0.9  # Sampled ratio above this means "incompressible"
+    LZMA_MAX_SIZE = 1024 * 1024  # Above this, zlib is used for its throughput
+
+    # File-to-file operations read and write in chunks of this size
+    STREAM_CHUNK_SIZE = 1024 * 1024
+
+    # Per-host cipher benchmark
+    BENCHMARK_SIZE = 256 * 1024
+    BENCHMARK_ROUNDS = 3
+    BENCHMARK_CACHE_FILE = 'cipher_benchmark.json'
+    RECOMMENDED_ALGORITHMS = ('AES-256-GCM', 'ChaCha20', 'XChaCha20')  # 256-bit AEADs eligible as the default
+
     # Supported algorithms
     ALGORITHMS = {
+        'AES-256-GCM': 'aes256gcm',
+        'AES-192-GCM': 'aes192gcm',
+        'AES-128-GCM': 'aes128gcm',
         'AES-256': 'aes256',
         'AES-192': 'aes192',
         'AES-128': 'aes128',
@@ -53,6 +102,8 @@ class EncryptionService:
         'XChaCha20': 'xchacha20'
     }
 
+    _benchmark_results = None  # Shared by all instances once measured or loaded
+
     def __init__(self):
         self.backend = default_backend()
 
@@ -77,75 +128,91 @@ class EncryptionService:
         )
         return kdf.derive(password.encode('utf-8'))
 
-    def encrypt_data(self, data: str, password: str, algorithm: str = 'AES-256') -> bytes:
+    def encrypt_data(self, data: str, password: str, algorithm: str = 'AES-256-GCM',
+                     compression: str = 'auto', envelope: bool = True) -> bytes:
         """
         Encrypt text data with the specified algorithm.
 
+        With envelope encryption (the default) a random data key encrypts the
+        content and the password only wraps that key in a header key slot, so
+        passwords can later be changed, added or removed by rewriting the
+        header alone.
+
         Args:
             data: Text to encrypt
             password: Encryption password
-            algorithm: Encryption algorithm ('AES-256', 'AES-192', 'AES-128')
+            algorithm: Encryption algorithm (any key of ALGORITHMS)
+            compression: 'auto', 'none', or one of COMPRESSION_CODECS
+            envelope: Use a random data key wrapped by the password instead of
+                encrypting directly with the password-derived key
 
         Returns:
             Encrypted data as bytes with header information
         """
-        # Generate salt and IV/nonce
-        salt = secrets.token_bytes(self.SALT_SIZE)
-        if algorithm == 'XChaCha20':
-            iv = secrets.token_bytes(self.XCHACHA_NONCE_SIZE)  # 24-byte nonce for XChaCha20
-        elif self._is_aead_algorithm(algorithm):
-            iv = secrets.token_bytes(self.CHACHA_NONCE_SIZE)  # 12-byte nonce for ChaCha20
-        else:
-            iv = secrets.token_bytes(self.AES_IV_SIZE)  # 16-byte IV for AES
+        if algorithm not in self.ALGORITHMS:
+            raise EncryptionError(f"Unsupported algorithm: {algorithm}")
+
+        # Prepare data for encryption, compressing it first if worthwhile
+        data_bytes = data.encode('utf-8')
+        codec = self.choose_compression(data_bytes) if compression == 'auto' else compression
+        if codec == 'none':
+            codec = None
+        if codec is not None:
+            data_bytes = self.compress(codec, data_bytes)
+
+        header, key, nonce, associated_data = self._new_header(password, algorithm, codec, envelope)
 
-        # Pad IV to 24 bytes for consistent file format
-        iv_padded = iv.ljust(self.IV_SIZE, b'\x00')
+        # The header is bound to the ciphertext as associated data (AEAD only)
+        encrypted_data = self._encrypt_payload(algorithm, key, nonce, data_bytes, associated_data)
 
-        # Derive key
+        return header + encrypted_data
+
+    def _new_header(self, password: str, algorithm: str, codec: Optional[str],
+                    envelope: bool) -> Tuple[bytes, bytes, bytes, bytes]:
+        """
+        Generate the key and nonce for a new file and build its V2 header.
+
+        Returns:
+            Tuple of (header, content key, nonce, associated data for the payload)
+        """
+        # Generate IV/nonce
+        nonce = secrets.token_bytes(self._get_nonce_size(algorithm))
         key_size = self._get_key_size(algorithm)
-        key = self.derive_key(password, salt, key_size)
 
-        # Prepare data for encryption
-        data_bytes = data.encode('utf-8')
+        # Create file format: MAGIC + HEADER_LENGTH + HEADER_FIELDS + ENCRYPTED_DATA
+        fields = {
+            self.FIELD_ALGORITHM: algorithm.encode('utf-8'),
+            self.FIELD_NONCE: nonce,
+        }
+        if codec is not None:
+            fields[self.FIELD_COMPRESSION] = codec.encode('utf-8')
 
-        if algorithm == 'XChaCha20':
-            # XChaCha20-Poly1305 (AEAD) - use 24-byte nonce
-            subkey, chacha_nonce = self._xchacha20_setup(key, iv)
-            chacha = ChaCha20Poly1305(subkey)
-            encrypted_data = chacha.encrypt(chacha_nonce, data_bytes, None)  # None for associated data
-        elif self._is_aead_algorithm(algorithm):
-            # ChaCha20-Poly1305 (AEAD) - use first 12 bytes of IV as nonce
-            chacha = ChaCha20Poly1305(key)
-            encrypted_data = chacha.encrypt(iv[:self.CHACHA_NONCE_SIZE], data_bytes, None)  # None for associated data
+        if envelope:
+            # Random data key; the key slots are left out of the associated
+            # data so they can be rewritten without touching the payload
+            key = secrets.token_bytes(key_size)
+            associated_data = self._build_header(fields)
+            fields[self.FIELD_KEY_SLOTS] = self._pack_key_slots([self._wrap_key(key, password)], key_size)
+            header = self._build_header(fields)
         else:
-            # AES with padding
-            # Add PKCS7 padding
-            padder = padding.PKCS7(algorithms.AES.block_size).padder()
-            padded_data = padder.update(data_bytes) + padder.finalize()
-
-            # Encrypt
-            cipher = Cipher(algorithms.AES(key), modes.CBC(iv), backend=self.backend)
-            encryptor = cipher.encryptor()
-            encrypted_data = encryptor.update(padded_data) + encryptor.finalize()
-
-        # Create file format: MAGIC + SALT + IV + ALGORITHM + ENCRYPTED_DATA
-        algorithm_bytes = algorithm.encode('utf-8').ljust(self.ALGORITHM_SIZE, b'\x00')
-        file_data = (
-            self.MAGIC_HEADER +
-            salt +
-            iv_padded +
-            algorithm_bytes +
-            encrypted_data
-        )
+            # Derive key directly from the password
+            salt = secrets.token_bytes(self.SALT_SIZE)
+            key = self.derive_key(password, salt, key_size)
+            fields[self.FIELD_SALT] = salt
+            fields[self.FIELD_KEY_CHECK] = self._key_check_value(key)
+            header = associated_data = self._build_header(fields)
 
-        return file_data
+        return header, key, nonce, associated_data
 
-    def decrypt_data(self, encrypted_data: bytes, password: str) -> str:
+    def decrypt_data(self, encrypted_data, password: str) -> str:
         """
         Decrypt encrypted data.
 
+        The input is parsed through a memoryview, so it may be bytes, a
+        bytearray or an mmap of the file; the ciphertext is never copied.
+
         Args:
-            encrypted_data: Encrypted data with header
+            encrypted_data: Encrypted data with header (V1 or V2 format), any bytes-like object
             password: Decryption password
 
         Returns:
@@ -155,54 +222,87 @@ class EncryptionService:
             InvalidPasswordError: If password is incorrect
             EncryptionError: For other decryption errors
         """
+        view = memoryview(encrypted_data)
+        associated_data = encrypted_content = None
         try:
-            header_size = len(self.MAGIC_HEADER)
-            salt = encrypted_data[header_size:header_size + self.SALT_SIZE]
-            iv_padded = encrypted_data[header_size + self.SALT_SIZE:header_size + self.SALT_SIZE + self.IV_SIZE]
-            algorithm_bytes = encrypted_data[header_size + self.SALT_SIZE + self.IV_SIZE:header_size + self.SALT_SIZE + self.IV_SIZE + self.ALGORITHM_SIZE]
-            encrypted_content = encrypted_data[header_size + self.SALT_SIZE + self.IV_SIZE + self.ALGORITHM_SIZE:]
-
-            # Extract algorithm
-            algorithm = algorithm_bytes.decode('utf-8').rstrip('\x00')
-
-            # Unpad IV based on algorithm
-            if algorithm == 'XChaCha20':
-                iv = iv_padded[:self.XCHACHA_NONCE_SIZE]
-            elif self._is_aead_algorithm(algorithm):
-                iv = iv_padded[:self.CHACHA_NONCE_SIZE]
-            else:
-                iv = iv_padded[:16]  # AES uses 16 bytes
-
-            # Derive key
-            key_size = self._get_key_size(algorithm)
-            key = self.derive_key(password, salt, key_size)
+            with self._decryption_errors():
+                magic = bytes(view[:len(self.MAGIC_HEADER)])
+                if magic == self.MAGIC_HEADER:
+                    fields, header_size = self._parse_header(view)
+                    algorithm, codec, salt, iv, key_check, key_slots, associated_data = \
+                        self._unpack_fields(fields)
+                    if associated_data is None:
+                        associated_data = view[:header_size]
+                    encrypted_content = view[header_size:]
+                elif magic == self.MAGIC_HEADER_V1:
+                    algorithm, salt, iv, encrypted_content = self._parse_v1(view)
+                    codec = None
+                    key_check = key_slots = None
+                else:
+                    raise EncryptionError("Not an encrypted notepad file")
+
+                key = self._unlock_key(algorithm, codec, password, salt, key_check, key_slots)
+
+                data_bytes = self._decrypt_payload(algorithm, key, iv, encrypted_content, associated_data)
+                if codec is not None:
+                    data_bytes = self.decompress(codec, data_bytes)
+
+                return str(data_bytes, 'utf-8')
+        finally:
+            # Release the views so an mmap passed in can be closed afterwards
+            for part in (associated_data, encrypted_content):
+                if isinstance(part, memoryview):
+                    part.release()
+            view.release()
 
-            if algorithm == 'XChaCha20':
-                # XChaCha20-Poly1305 (AEAD) - use 24-byte nonce
-                subkey, chacha_nonce = self._xchacha20_setup(key, iv)
-                chacha = ChaCha20Poly1305(subkey)
-                data_bytes = chacha.decrypt(chacha_nonce, encrypted_content, None)  # None for associated data
-            elif self._is_aead_algorithm(algorithm):
-                # ChaCha20-Poly1305 (AEAD) - use first 12 bytes of IV as nonce
-                chacha = ChaCha20Poly1305(key)
-                data_bytes = chacha.decrypt(iv[:self.CHACHA_NONCE_SIZE], encrypted_content, None)  # None for associated data
-            else:
-                # AES decryption
-                # Decrypt
-                cipher = Cipher(algorithms.AES(key), modes.CBC(iv), backend=self.backend)
-                decryptor = cipher.decryptor()
-                padded_data = decryptor.update(encrypted_content) + decryptor.finalize()
-
-                # Remove padding
-                unpadder = padding.PKCS7(algorithms.AES.block_size).unpadder()
-                data_bytes = unpadder.update(padded_data) + unpadder.finalize()
-
-            return data_bytes.decode('utf-8')
-
-        except InvalidKey:
+    def _unpack_fields(self, fields: Dict[int, bytes]) -> tuple:
+        """
+        Read the decryption parameters out of parsed V2 header fields.
+
+        Returns:
+            Tuple of (algorithm, codec, salt, nonce, key check, key slots,
+            associated data); the associated data is None unless the file
+            uses key slots, in which case it is the header without them
+        """
+        algorithm = fields[self.FIELD_ALGORITHM].decode('utf-8')
+        codec = fields.get(self.FIELD_COMPRESSION, b"").decode('utf-8') or None
+        key_slots = fields.get(self.FIELD_KEY_SLOTS)
+        associated_data = None
+        if key_slots is not None:
+            associated_data = self._build_header(
+                {tag: value for tag, value in fields.items() if tag != self.FIELD_KEY_SLOTS}
+            )
+        return (algorithm, codec, fields.get(self.FIELD_SALT), fields[self.FIELD_NONCE],
+                fields.get(self.FIELD_KEY_CHECK), key_slots, associated_data)
+
+    def _unlock_key(self, algorithm: str, codec: Optional[str], password: str, salt: Optional[bytes],
+                    key_check: Optional[bytes], key_slots: Optional[bytes]) -> bytes:
+        """Validate the file parameters and derive or unwrap the content key."""
+        if algorithm not in self.ALGORITHMS:
+            raise EncryptionError(f"Unsupported algorithm: {algorithm}")
+        if codec is not None and codec not in self.COMPRESSION_CODECS:
+            raise EncryptionError(f"Unsupported compression: {codec}")
+
+        # Derive or unwrap the key, rejecting a wrong password before touching the ciphertext
+        if key_slots is not None:
+            key, _, _ = self._unlock_key_slots(key_slots, password)
+            return key
+        key = self.derive_key(password, salt, self._get_key_size(algorithm))
+        if key_check is not None and not hmac.compare_digest(self._key_check_value(key), key_check):
+            raise InvalidPasswordError("Incorrect password")
+        return key
+
+    @contextmanager
+    def _decryption_errors(self):
+        """Translate low-level decryption failures into EncryptionError or InvalidPasswordError."""
+        try:
+            yield
+        except EncryptionError:
+            raise
+        except (InvalidKey, InvalidTag):
             raise InvalidPasswordError("Incorrect password")
-        except UnicodeDecodeError:
-            # Wrong password often results in undecodable bytes
+        except (UnicodeDecodeError, zlib.error, lzma.LZMAError):
+            # Wrong password often results in undecodable or undecompressable bytes
             raise InvalidPasswordError("Incorrect password or corrupted data")
         except Exception as e:
             # For AES, wrong passwords often result in padding errors
@@ -211,9 +311,723 @@ class EncryptionService:
                 raise InvalidPasswordError("Incorrect password or corrupted data")
             raise EncryptionError(f"Decryption failed: {str(e)}")
 
+    def decrypt_file(self, file_path: str, password: str) -> str:
+        """
+        Decrypt an encrypted file without reading it into memory first.
+
+        The file is memory-mapped and decrypted straight from the mapping,
+        so peak memory is about the plaintext buffer plus the decoded text.
+
+        Args:
+            file_path: Path to the encrypted file
+            password: Decryption password
+
+        Returns:
+            Decrypted text
+        """
+        with open(file_path, 'rb') as file:
+            if os.fstat(file.fileno()).st_size == 0:
+                return self.decrypt_data(b"", password)
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return self.decrypt_data(mapped, password)
+
+    def encrypt_file(self, source_path: str, target_path: str, password: str, algorithm: str = 'AES-256-GCM',
+                     compression: str = 'auto', envelope: bool = True) -> int:
+        """
+        Encrypt a file into another file, streaming it in chunks.
+
+        The output has the same format as encrypt_data and is written to a
+        temporary file that replaces target_path only once it is complete.
+        ChaCha20 has no incremental API and is encrypted in one piece.
+
+        Args:
+            source_path: File to encrypt
+            target_path: Where to write the encrypted file
+            password: Encryption password
+            algorithm: Encryption algorithm (any key of ALGORITHMS)
+            compression: 'auto', 'none', or one of COMPRESSION_CODECS
+            envelope: Use a random data key wrapped by the password
+
+        Returns:
+            Number of plaintext bytes encrypted
+        """
+        if algorithm not in self.ALGORITHMS:
+            raise EncryptionError(f"Unsupported algorithm: {algorithm}")
+
+        with self._atomic_output(target_path) as target:
+            with open(source_path, 'rb') as source:
+                size = os.fstat(source.fileno()).st_size
+                if compression == 'auto':
+                    codec = self._choose_file_compression(source, size)
+                else:
+                    codec = None if compression == 'none' else compression
+                if codec is not None and codec not in self.COMPRESSION_CODECS:
+                    raise EncryptionError(f"Unsupported compression: {codec}")
+
+                header, key, nonce, associated_data = self._new_header(password, algorithm, codec, envelope)
+                chunks = self._read_chunks(source)
+                if codec is not None:
+                    chunks = self._compress_chunks(codec, chunks)
+
+                target.write(header)
+                self._encrypt_chunks(algorithm, key, nonce, associated_data, chunks, target)
+        return size
+
+    def encrypt_to_file(self, data: str, target_path: str, password: str, algorithm: str = 'AES-256-GCM',
+                        compression: str = 'auto', envelope: bool = True) -> None:
+        """
+        Encrypt text data into a file.
+
+        The output has the same format as encrypt_data and is written to a
+        temporary file that replaces target_path only once it is complete,
+        so a failed save leaves an existing file as it was.
+
+        Args:
+            data: Text to encrypt
+            target_path: Where to write the encrypted file
+            password: Encryption password
+            algorithm: Encryption algorithm (any key of ALGORITHMS)
+            compression: 'auto', 'none', or one of COMPRESSION_CODECS
+            envelope: Use a random data key wrapped by the password
+        """
+        encrypted_data = self.encrypt_data(data, password, algorithm, compression, envelope)
+        with self._atomic_output(target_path) as target:
+            target.write(encrypted_data)
+
+    def decrypt_to_file(self, source_path: str, target_path: str, password: str) -> int:
+        """
+        Decrypt an encrypted file into another file, streaming it in chunks.
+
+        The plaintext goes to a temporary file that replaces target_path
+        only after the whole payload has been authenticated.
+
+        Args:
+            source_path: Encrypted file (V1 or V2 format)
+            target_path: Where to write the decrypted bytes
+            password: Decryption password
+
+        Returns:
+            Number of plaintext bytes written
+
+        Raises:
+            InvalidPasswordError: If password is incorrect
+            EncryptionError: For other decryption errors
+        """
+        written = 0
+        with self._decryption_errors(), self._atomic_output(target_path) as target:
+            with open(source_path, 'rb') as source:
+                algorithm, codec, key, nonce, associated_data, _ = self._open_stream(source, password)
+                chunks = self._iter_payload(source, algorithm, key, nonce, associated_data)
+                if codec is not None:
+                    chunks = self._decompress_chunks(codec, chunks)
+                for chunk in chunks:
+                    target.write(chunk)
+                    written += len(chunk)
+        return written
+
+    def rekey_file(self, file_path: str, old_password: str, new_password: str) -> None:
+        """
+        Re-encrypt a file for a new password.
+
+        Files with key slots only get their header rewritten. Older files
+        (V1, or V2 keyed directly by the password) are streamed through a
+        fresh envelope key, keeping their algorithm and compression.
+
+        Raises:
+            InvalidPasswordError: If old_password is incorrect
+            EncryptionError: For other errors
+        """
+        if self._has_key_slots(file_path):
+            self.change_password(file_path, old_password, new_password)
+            return
+
+        with self._decryption_errors(), self._atomic_output(file_path) as target:
+            with open(file_path, 'rb') as source:
+                algorithm, codec, key, nonce, associated_data, _ = self._open_stream(source, old_password)
+                # The payload stays compressed; only its encryption changes
+                chunks = self._iter_payload(source, algorithm, key, nonce, associated_data)
+                header, key, nonce, associated_data = self._new_header(new_password, algorithm, codec, True)
+                target.write(header)
+                self._encrypt_chunks(algorithm, key, nonce, associated_data, chunks, target)
+
+    def verify_password(self, file_path: str, password: str) -> bool:
+        """
+        Check whether a password opens an encrypted file.
+
+        Uses the key slots or key check of the header where present, so
+        only files without either (V1) are decrypted to find out.
+        """
+        try:
+            with self._decryption_errors(), open(file_path, 'rb') as source:
+                algorithm, _, key, nonce, associated_data, verified = self._open_stream(source, password)
+                if not verified:
+                    for _ in self._iter_payload(source, algorithm, key, nonce, associated_data):
+                        pass
+        except InvalidPasswordError:
+            return False
+        return True
+
+    def _open_stream(self, source, password: str) -> tuple:
+        """
+        Read the header of an open encrypted file and unlock its key.
+
+        Returns:
+            Tuple of (algorithm, codec, key, nonce, associated data,
+            whether the password was verified by the header), with the file
+            positioned at the start of the payload
+        """
+        source.seek(0)
+        magic = source.read(len(self.MAGIC_HEADER))
+        source.seek(0)
+        if magic == self.MAGIC_HEADER:
+            header = self._read_header(source)
+            fields, _ = self._parse_header(header)
+            algorithm, codec, salt, nonce, key_check, key_slots, associated_data = self._unpack_fields(fields)
+            if associated_data is None:
+                associated_data = header
+        elif magic == self.MAGIC_HEADER_V1:
+            v1_size = len(self.MAGIC_HEADER_V1) + self.SALT_SIZE + self.IV_SIZE + self.ALGORITHM_SIZE
+            algorithm, salt, nonce, _ = self._parse_v1(memoryview(source.read(v1_size)))
+            codec = associated_data = key_check = key_slots = None
+        else:
+            raise EncryptionError("Not an encrypted notepad file")
+
+        key = self._unlock_key(algorithm, codec, password, salt, key_check, key_slots)
+        verified = key_slots is not None or key_check is not None
+        return algorithm, codec, key, nonce, associated_data, verified
+
+    def _iter_payload(self, source, algorithm: str, key: bytes, nonce: bytes, associated_data: Optional[bytes]):
+        """Decrypt the rest of an open file, from its current position, in chunks."""
+        offset = source.tell()
+        size = os.fstat(source.fileno()).st_size - offset
+        return self._decrypt_chunks(algorithm, key, nonce, associated_data, source, offset, size)
+
+    def _encrypt_chunks(self, algorithm: str, key: bytes, nonce: bytes, associated_data: bytes,
+                        chunks, target) -> None:
+        """Encrypt plaintext chunks into an open file, producing the same bytes as _encrypt_payload."""
+        if self._is_gcm_algorithm(algorithm):
+            encryptor = Cipher(algorithms.AES(key), modes.GCM(nonce), backend=self.backend).encryptor()
+            encryptor.authenticate_additional_data(associated_data)
+            for chunk in chunks:
+                target.write(encryptor.update(chunk))
+            target.write(encryptor.finalize())
+            target.write(encryptor.tag)
+        elif self._is_aead_algorithm(algorithm):
+            # ChaCha20-Poly1305 can only encrypt a whole message
+            target.write(self._encrypt_payload(algorithm, key, nonce, b"".join(chunks), associated_data))
+        else:
+            padder = padding.PKCS7(algorithms.AES.block_size).padder()
+            encryptor = Cipher(algorithms.AES(key), modes.CBC(nonce), backend=self.backend).encryptor()
+            for chunk in chunks:
+                target.write(encryptor.update(padder.update(chunk)))
+            target.write(encryptor.update(padder.finalize()) + encryptor.finalize())
+
+    def _decrypt_chunks(self, algorithm: str, key: bytes, nonce: bytes, associated_data: Optional[bytes],
+                        source, offset: int, size: int):
+        """
+        Decrypt the payload of an open file in chunks.
+
+        GCM output is unauthenticated until the last chunk has been yielded,
+        so callers must discard everything if iteration raises.
+        """
+        if self._is_gcm_algorithm(algorithm):
+            if size < self.GCM_TAG_SIZE:
+                raise InvalidTag()
+            source.seek(offset + size - self.GCM_TAG_SIZE)
+            tag = source.read(self.GCM_TAG_SIZE)
+            decryptor = Cipher(algorithms.AES(key), modes.GCM(nonce, tag), backend=self.backend).decryptor()
+            decryptor.authenticate_additional_data(associated_data)
+            source.seek(offset)
+            for chunk in self._read_chunks(source, size - self.GCM_TAG_SIZE):
+                yield decryptor.update(chunk)
+            yield decryptor.finalize()
+        elif self._is_aead_algorithm(algorithm):
+            # ChaCha20-Poly1305 can only decrypt a whole message
+            source.seek(offset)
+            yield self._decrypt_payload(algorithm, key, nonce, source.read(size), associated_data)
+        else:
+            decryptor = Cipher(algorithms.AES(key), modes.CBC(nonce[:self.AES_IV_SIZE]),
+                               backend=self.backend).decryptor()
+            unpadder = padding.PKCS7(algorithms.AES.block_size).unpadder()
+            source.seek(offset)
+            for chunk in self._read_chunks(source, size):
+                yield unpadder.update(decryptor.update(chunk))
+            yield unpadder.update(decryptor.finalize()) + unpadder.finalize()
+
+    def _read_chunks(self, source, size: Optional[int] = None):
+        """Yield up to size bytes (or the rest of the file) from an open file in chunks."""
+        while size is None or size > 0:
+            chunk = source.read(self.STREAM_CHUNK_SIZE if size is None else min(size, self.STREAM_CHUNK_SIZE))
+            if not chunk:
+                break
+            if size is not None:
+                size -= len(chunk)
+            yield chunk
+
+    @contextmanager
+    def _atomic_output(self, target_path: str):
+        """
+        Open a temporary file next to target_path and move it into place on success.
+
+        On any exception the temporary file is deleted and target_path is
+        left untouched.
+        """
+        directory = os.path.dirname(os.path.abspath(target_path))
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(target_path),
+                                         suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as target:
+                yield target
+                target.flush()
+                os.fsync(target.fileno())
+            os.replace(temp_path, target_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+
+    def _has_key_slots(self, file_path: str) -> bool:
+        """Check if a file is in V2 format with key slots."""
+        with open(file_path, 'rb') as file:
+            if file.read(len(self.MAGIC_HEADER)) != self.MAGIC_HEADER:
+                return False
+            file.seek(0)
+            fields, _ = self._parse_header(self._read_header(file))
+            return self.FIELD_KEY_SLOTS in fields
+
+    def change_password(self, file_path: str, old_password: str, new_password: str) -> None:
+        """
+        Replace a password of an encrypted file by rewriting its header only.
+
+        Args:
+            file_path: Path to an envelope-encrypted file
+            old_password: A password that currently opens the file
+            new_password: Password that replaces it
+
+        Raises:
+            InvalidPasswordError: If old_password opens no key slot
+            EncryptionError: If the file has no key slots
+        """
+        self._update_key_slots(
+            file_path, old_password,
+            lambda slots, index, key: slots[:index] + [self._wrap_key(key, new_password)] + slots[index + 1:]
+        )
+
+    def add_password(self, file_path: str, password: str, new_password: str) -> None:
+        """
+        Add another password to an encrypted file by rewriting its header only.
+
+        Args:
+            file_path: Path to an envelope-encrypted file
+            password: A password that currently opens the file
+            new_password: Additional password that will also open it
+
+        Raises:
+            InvalidPasswordError: If password opens no key slot
+            EncryptionError: If the file has no key slots or all slots are in use
+        """
+        self._update_key_slots(
+            file_path, password,
+            lambda slots, index, key: slots + [self._wrap_key(key, new_password)]
+        )
+
+    def remove_password(self, file_path: str, password: str) -> None:
+        """
+        Remove a password from an encrypted file by rewriting its header only.
+
+        Args:
+            file_path: Path to an envelope-encrypted file
+            password: The password to remove
+
+        Raises:
+            InvalidPasswordError: If password opens no key slot
+            EncryptionError: If the file has no key slots or this is its only password
+        """
+        def remove_slot(slots, index, key):
+            if len(slots) == 1:
+                raise EncryptionError("Cannot remove the only password")
+            return slots[:index] + slots[index + 1:]
+
+        self._update_key_slots(file_path, password, remove_slot)
+
+    def _update_key_slots(self, file_path: str, password: str, update) -> None:
+        """
+        Unlock the key slots of a file and rewrite them in place.
+
+        The slot field has a fixed capacity, so the new header is exactly as
+        long as the old one and the payload is never read or moved.
+        """
+        with open(file_path, 'r+b') as file:
+            header = self._read_header(file)
+            fields, header_size = self._parse_header(header)
+            if self.FIELD_KEY_SLOTS not in fields:
+                raise EncryptionError("This file has no key slots; save it encrypted again to manage its passwords")
+
+            key, index, slots = self._unlock_key_slots(fields[self.FIELD_KEY_SLOTS], password)
+            fields[self.FIELD_KEY_SLOTS] = self._pack_key_slots(update(slots, index, key), len(key))
+            new_header = self._build_header(fields)
+            if len(new_header) != header_size:
+                raise EncryptionError("Key slot update changed the header size")
+
+            file.seek(0)
+            file.write(new_header)
+
+    # Data key API for containers, such as NoteVault, that seal their own records with one random data key
+
+    def is_authenticated_algorithm(self, algorithm: str) -> bool:
+        """Check if an algorithm authenticates what it encrypts, as sealing records requires."""
+        return self._is_aead_algorithm(algorithm)
+
+    def create_key_slots(self, algorithm: str, password: str) -> Tuple[bytes, bytes]:
+        """
+        Generate a random data key for an algorithm and wrap it for a password.
+
+        Returns:
+            Tuple of (data key, key slot field)
+        """
+        key_size = self._get_key_size(algorithm)
+        key = secrets.token_bytes(key_size)
+        return key, self._pack_key_slots([self._wrap_key(key, password)], key_size)
+
+    def open_key_slots(self, key_slots: bytes, password: str) -> bytes:
+        """
+        Unwrap the data key from a key slot field.
+
+        Raises:
+            InvalidPasswordError: If the password opens no key slot
+        """
+        key, _, _ = self._unlock_key_slots(key_slots, password)
+        return key
+
+    def rewrap_key_slots(self, key_slots: bytes, old_password: str, new_password: str) -> bytes:
+        """
+        Replace a password in a key slot field; the result is as long as the original.
+
+        Raises:
+            InvalidPasswordError: If old_password opens no key slot
+        """
+        key, index, slots = self._unlock_key_slots(key_slots, old_password)
+        slots[index] = self._wrap_key(key, new_password)
+        return self._pack_key_slots(slots, len(key))
+
+    def sealed_size(self, algorithm: str, size: int) -> int:
+        """Get the length of a sealed record of size plaintext bytes with an authenticated algorithm."""
+        return self._get_nonce_size(algorithm) + size + self.GCM_TAG_SIZE  # Poly1305 tags are as long
+
+    def seal(self, algorithm: str, key: bytes, data_bytes: bytes, associated_data: bytes) -> bytes:
+        """Encrypt one record as NONCE + CIPHERTEXT with a data key."""
+        nonce = secrets.token_bytes(self._get_nonce_size(algorithm))
+        return nonce + self._encrypt_payload(algorithm, key, nonce, data_bytes, associated_data)
+
+    def unseal(self, algorithm: str, key: bytes, sealed: bytes, associated_data: bytes) -> Union[bytes, memoryview]:
+        """
+        Decrypt one NONCE + CIPHERTEXT record with a data key.
+
+        Raises:
+            EncryptionError: If the record or its associated data was changed
+        """
+        nonce_size = self._get_nonce_size(algorithm)
+        try:
+            with memoryview(sealed) as view, view[nonce_size:] as ciphertext:
+                return self._decrypt_payload(algorithm, key, bytes(view[:nonce_size]), ciphertext, associated_data)
+        except Exception as e:
+            raise EncryptionError(f"Corrupted record: {str(e) or type(e).__name__}")
+
+    def _read_header(self, file) -> bytes:
+        """Read only the V2 header from an open file."""
+        prefix = file.read(len(self.MAGIC_HEADER) + 2)
+        if prefix.startswith(self.MAGIC_HEADER_V1):
+            raise EncryptionError("This file has no key slots; save it encrypted again to manage its passwords")
+        if len(prefix) < len(self.MAGIC_HEADER) + 2 or not prefix.startswith(self.MAGIC_HEADER):
+            raise EncryptionError("Not an encrypted notepad file")
+        body_size, = struct.unpack_from(">H", prefix, len(self.MAGIC_HEADER))
+        return prefix + file.read(body_size)
+
+    def _wrap_key(self, key: bytes, password: str) -> bytes:
+        """Wrap a data key with a password-derived key into one key slot."""
+        salt = secrets.token_bytes(self.SALT_SIZE)
+        nonce = secrets.token_bytes(self.GCM_NONCE_SIZE)
+        wrapping_key = self.derive_key(password, salt, self.KEY_SIZE)
+        return salt + nonce + AESGCM(wrapping_key).encrypt(nonce, key, self.KEY_SLOT_ASSOCIATED_DATA)
+
+    def _unwrap_key(self, slot: bytes, password: str) -> Optional[bytes]:
+        """Unwrap the data key from a key slot, or return None if the password does not fit."""
+        salt = slot[:self.SALT_SIZE]
+        nonce = slot[self.SALT_SIZE:self.SALT_SIZE + self.GCM_NONCE_SIZE]
+        wrapped_key = slot[self.SALT_SIZE + self.GCM_NONCE_SIZE:]
+        wrapping_key = self.derive_key(password, salt, self.KEY_SIZE)
+        try:
+            return AESGCM(wrapping_key).decrypt(nonce, wrapped_key, self.KEY_SLOT_ASSOCIATED_DATA)
+        except InvalidTag:
+            return None
+
+    def _unlock_key_slots(self, value: bytes, password: str) -> Tuple[bytes, int, List[bytes]]:
+        """
+        Find the key slot the password opens.
+
+        Returns:
+            Tuple of (data key, index of the opened slot, all used slots)
+        """
+        slots = self._unpack_key_slots(value)
+        for index, slot in enumerate(slots):
+            key = self._unwrap_key(slot, password)
+            if key is not None:
+                return key, index, slots
+        raise InvalidPasswordError("Incorrect password")
+
+    def _pack_key_slots(self, slots: List[bytes], key_size: int) -> bytes:
+        """Serialize used key slots, filling the unused capacity with random bytes."""
+        if len(slots) > self.KEY_SLOT_CAPACITY:
+            raise EncryptionError("All key slots are in use")
+        slot_size = self.SALT_SIZE + self.GCM_NONCE_SIZE + key_size + self.GCM_TAG_SIZE
+        filler = secrets.token_bytes(slot_size * (self.KEY_SLOT_CAPACITY - len(slots)))
+        return bytes([self.KEY_SLOT_CAPACITY, len(slots)]) + b"".join(slots) + filler
+
+    def _unpack_key_slots(self, value: bytes) -> List[bytes]:
+        """Split a key slot field into its used slots."""
+        if len(value) < 2:
+            raise EncryptionError("Corrupted key slots")
+        capacity, count = value[0], value[1]
+        if capacity == 0 or count == 0 or count > capacity or (len(value) - 2) % capacity:
+            raise EncryptionError("Corrupted key slots")
+        slot_size = (len(value) - 2) // capacity
+        if slot_size - self.SALT_SIZE - self.GCM_NONCE_SIZE - self.GCM_TAG_SIZE not in (16, 24, 32):
+            raise EncryptionError("Corrupted key slots")
+        return [value[2 + i * slot_size:2 + (i + 1) * slot_size] for i in range(count)]
+
+    def _key_check_value(self, key: bytes) -> bytes:
+        """Compute the key-verification tag stored in the header."""
+        return hmac.new(key, b"verify", hashlib.sha256).digest()[:self.KEY_CHECK_SIZE]
+
+    def _encrypt_payload(self, algorithm: str, key: bytes, nonce: bytes, data_bytes: bytes,
+                         associated_data: Optional[bytes]) -> bytes:
+        """Encrypt raw bytes with an already derived key."""
+        if algorithm == 'XChaCha20':
+            # XChaCha20-Poly1305 (AEAD) - use 24-byte nonce
+            subkey, chacha_nonce = self._xchacha20_setup(key, nonce)
+            return ChaCha20Poly1305(subkey).encrypt(chacha_nonce, data_bytes, associated_data)
+        elif algorithm == 'ChaCha20':
+            # ChaCha20-Poly1305 (AEAD) - 12-byte nonce
+            return ChaCha20Poly1305(key).encrypt(nonce, data_bytes, associated_data)
+        elif self._is_gcm_algorithm(algorithm):
+            # AES-GCM (AEAD) - single pass, no padding, ciphertext followed by the 16-byte tag
+            return AESGCM(key).encrypt(nonce, data_bytes, associated_data)
+        else:
+            # AES-CBC with PKCS7 padding (legacy, unauthenticated)
+            padder = padding.PKCS7(algorithms.AES.block_size).padder()
+            padded_data = padder.update(data_bytes) + padder.finalize()
+
+            cipher = Cipher(algorithms.AES(key), modes.CBC(nonce), backend=self.backend)
+            encryptor = cipher.encryptor()
+            return encryptor.update(padded_data) + encryptor.finalize()
+
+    def _decrypt_payload(self, algorithm: str, key: bytes, nonce: bytes, encrypted_content,
+                         associated_data) -> Union[bytes, memoryview]:
+        """
+        Decrypt raw bytes with an already derived key.
+
+        AES modes decrypt with update_into into a single preallocated buffer
+        and return a memoryview over the plaintext in it.
+        """
+        if algorithm == 'XChaCha20':
+            # XChaCha20-Poly1305 (AEAD) - use 24-byte nonce
+            subkey, chacha_nonce = self._xchacha20_setup(key, nonce)
+            return ChaCha20Poly1305(subkey).decrypt(chacha_nonce, encrypted_content, associated_data)
+        elif algorithm == 'ChaCha20':
+            # ChaCha20-Poly1305 (AEAD) - 12-byte nonce
+            return ChaCha20Poly1305(key).decrypt(nonce[:self.CHACHA_NONCE_SIZE], encrypted_content, associated_data)
+
+        block_size = algorithms.AES.block_size // 8
+        if self._is_gcm_algorithm(algorithm):
+            # AES-GCM (AEAD) - ciphertext is followed by the tag; a wrong key fails the tag check
+            if len(encrypted_content) < self.GCM_TAG_SIZE:
+                raise InvalidTag()
+            tag = bytes(encrypted_content[-self.GCM_TAG_SIZE:])
+            cipher = Cipher(algorithms.AES(key), modes.GCM(nonce, tag), backend=self.backend)
+            decryptor = cipher.decryptor()
+            decryptor.authenticate_additional_data(associated_data)
+            with encrypted_content[:-self.GCM_TAG_SIZE] as ciphertext:
+                plaintext = bytearray(len(ciphertext) + block_size - 1)
+                size = decryptor.update_into(ciphertext, plaintext)
+            decryptor.finalize()
+            return memoryview(plaintext)[:size]
+        else:
+            # AES-CBC decryption
+            cipher = Cipher(algorithms.AES(key), modes.CBC(nonce[:self.AES_IV_SIZE]), backend=self.backend)
+            decryptor = cipher.decryptor()
+            plaintext = bytearray(len(encrypted_content) + block_size - 1)
+            size = decryptor.update_into(encrypted_content, plaintext)
+            decryptor.finalize()
+            if size < block_size:
+                raise ValueError("Invalid padding bytes.")
+
+            # Remove padding; only the last block needs to pass through the unpadder
+            unpadder = padding.PKCS7(algorithms.AES.block_size).unpadder()
+            last_block = unpadder.update(bytes(plaintext[size - block_size:size])) + unpadder.finalize()
+            return memoryview(plaintext)[:size - block_size + len(last_block)]
+
+    def choose_compression(self, data_bytes: bytes) -> Optional[str]:
+        """
+        Pick a compression codec for the payload from a quick sampled check.
+
+        A few evenly spaced samples are compressed with fast zlib; if they
+        shrink well the whole payload is compressed, with lzma for small
+        payloads (best ratio) and zlib for large ones (best throughput).
+
+        Args:
+            data_bytes: Plaintext bytes about to be encrypted
+
+        Returns:
+            Codec name, or None to store the payload uncompressed
+        """
+        size = len(data_bytes)
+        if size < self.COMPRESSION_MIN_SIZE:
+            return None
+
+        sample_size = self.COMPRESSION_SAMPLE_SIZE
+        if size <= sample_size * self.COMPRESSION_SAMPLE_COUNT:
+            sample = data_bytes
+        else:
+            step = (size - sample_size) // (self.COMPRESSION_SAMPLE_COUNT - 1)
+            sample = b"".join(
+                data_bytes[i * step:i * step + sample_size]
+                for i in range(self.COMPRESSION_SAMPLE_COUNT)
+            )
+
+        ratio = len(zlib.compress(sample, 1)) / len(sample)
+        if ratio > self.COMPRESSION_MAX_RATIO:
+            return None
+        return 'lzma' if size <= self.LZMA_MAX_SIZE else 'zlib'
+
+    def _choose_file_compression(self, source, size: int) -> Optional[str]:
+        """Run choose_compression on an open file through a memory map."""
+        if size < self.COMPRESSION_MIN_SIZE:
+            return None
+        with mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return self.choose_compression(mapped)
+
+    def _compress_chunks(self, codec: str, chunks):
+        """Compress a stream of chunks; the output matches _compress on the joined input."""
+        if codec == 'zlib':
+            compressor = zlib.compressobj(6)
+        elif codec == 'lzma':
+            compressor = lzma.LZMACompressor(preset=6)
+        else:
+            raise EncryptionError(f"Unsupported compression: {codec}")
+        for chunk in chunks:
+            compressed = compressor.compress(chunk)
+            if compressed:
+                yield compressed
+        yield compressor.flush()
+
+    def _decompress_chunks(self, codec: str, chunks):
+        """Decompress a stream of chunks produced by _compress or _compress_chunks."""
+        if codec == 'zlib':
+            decompressor = zlib.decompressobj()
+        elif codec == 'lzma':
+            decompressor = lzma.LZMADecompressor()
+        else:
+            raise EncryptionError(f"Unsupported compression: {codec}")
+        for chunk in chunks:
+            if not chunk:
+                continue  # lzma rejects input after the end of its stream, even empty input
+            decompressed = decompressor.decompress(chunk)
+            if decompressed:
+                yield decompressed
+        if not decompressor.eof:
+            raise EncryptionError("Decryption failed: compressed data is truncated")
+
+    def compress(self, codec: str, data_bytes: bytes) -> bytes:
+        """Compress plaintext bytes with the given codec."""
+        if codec == 'zlib':
+            return zlib.compress(data_bytes, 6)
+        if codec == 'lzma':
+            return lzma.compress(data_bytes, preset=6)
+        raise EncryptionError(f"Unsupported compression: {codec}")
+
+    def decompress(self, codec: str, data_bytes: bytes) -> bytes:
+        """Decompress plaintext bytes with the given codec."""
+        if codec == 'zlib':
+            return zlib.decompress(data_bytes)
+        if codec == 'lzma':
+            return lzma.decompress(data_bytes)
+        raise EncryptionError(f"Unsupported compression: {codec}")
+
+    def _build_header(self, fields: Dict[int, bytes]) -> bytes:
+        """
+        Build a V2 file header.
+
+        Layout: MAGIC + HEADER_LENGTH (u16) + fields, where every field is
+        TAG (u8) + LENGTH (u16) + VALUE. HEADER_LENGTH counts the field bytes.
+        """
+        body = b"".join(
+            struct.pack(">BH", tag, len(value)) + value
+            for tag, value in fields.items()
+        )
+        return self.MAGIC_HEADER + struct.pack(">H", len(body)) + body
+
+    def _parse_header(self, encrypted_data) -> Tuple[Dict[int, bytes], int]:
+        """
+        Parse a V2 file header from any bytes-like object without copying the payload.
+
+        Returns:
+            Tuple of (fields by tag, total header size in bytes)
+        """
+        offset = len(self.MAGIC_HEADER)
+        if len(encrypted_data) < offset + 2:
+            raise EncryptionError("Truncated file header")
+        body_size, = struct.unpack_from(">H", encrypted_data, offset)
+        offset += 2
+        header_size = offset + body_size
+        if len(encrypted_data) < header_size:
+            raise EncryptionError("Truncated file header")
+
+        fields = {}
+        while offset < header_size:
+            if offset + 3 > header_size:
+                raise EncryptionError("Corrupted file header")
+            tag, length = struct.unpack_from(">BH", encrypted_data, offset)
+            offset += 3
+            if tag not in self.HEADER_FIELDS or offset + length > header_size:
+                raise EncryptionError("Corrupted file header")
+            fields[tag] = bytes(encrypted_data[offset:offset + length])
+            offset += length
+
+        for tag in (self.FIELD_ALGORITHM, self.FIELD_NONCE):
+            if tag not in fields:
+                raise EncryptionError("Corrupted file header")
+        if self.FIELD_SALT not in fields and self.FIELD_KEY_SLOTS not in fields:
+            raise EncryptionError("Corrupted file header")
+
+        return fields, header_size
+
+    def _parse_v1(self, encrypted_data: memoryview) -> Tuple[str, bytes, bytes, memoryview]:
+        """
+        Parse a legacy V1 file: MAGIC + SALT + IV + ALGORITHM + ENCRYPTED_DATA.
+
+        Returns:
+            Tuple of (algorithm, salt, iv, encrypted_content view)
+        """
+        header_size = len(self.MAGIC_HEADER_V1)
+        salt = bytes(encrypted_data[header_size:header_size + self.SALT_SIZE])
+        iv_padded = bytes(encrypted_data[header_size + self.SALT_SIZE:header_size + self.SALT_SIZE + self.IV_SIZE])
+        algorithm_bytes = bytes(encrypted_data[header_size + self.SALT_SIZE + self.IV_SIZE:header_size + self.SALT_SIZE + self.IV_SIZE + self.ALGORITHM_SIZE])
+        encrypted_content = encrypted_data[header_size + self.SALT_SIZE + self.IV_SIZE + self.ALGORITHM_SIZE:]
+
+        # Extract algorithm
+        algorithm = algorithm_bytes.decode('utf-8').rstrip('\x00')
+
+        # Unpad IV based on algorithm
+        iv = iv_padded[:self._get_nonce_size(algorithm)]
+
+        return algorithm, salt, iv, encrypted_content
+
     def _get_key_size(self, algorithm: str) -> int:
         """Get key size for the specified algorithm."""
         sizes = {
+            'AES-256-GCM': 32,
+            'AES-192-GCM': 24,
+            'AES-128-GCM': 16,
             'AES-256': 32,
             'AES-192': 24,
             'AES-128': 16,
@@ -222,9 +1036,21 @@ class EncryptionService:
         }
         return sizes.get(algorithm, 32)
 
+    def _get_nonce_size(self, algorithm: str) -> int:
+        """Get IV/nonce size for the specified algorithm."""
+        if algorithm == 'XChaCha20':
+            return self.XCHACHA_NONCE_SIZE
+        if self._is_aead_algorithm(algorithm):
+            return self.GCM_NONCE_SIZE if self._is_gcm_algorithm(algorithm) else self.CHACHA_NONCE_SIZE
+        return self.AES_IV_SIZE
+
     def _is_aead_algorithm(self, algorithm: str) -> bool:
         """Check if algorithm uses AEAD (Authenticated Encryption with Associated Data)."""
-        return algorithm in ['ChaCha20', 'XChaCha20']
+        return algorithm in ['AES-256-GCM', 'AES-192-GCM', 'AES-128-GCM', 'ChaCha20', 'XChaCha20']
+
+    def _is_gcm_algorithm(self, algorithm: str) -> bool:
+        """Check if algorithm is an AES-GCM variant."""
+        return algorithm in ['AES-256-GCM', 'AES-192-GCM', 'AES-128-GCM']
 
     def _xchacha20_setup(self, key: bytes, nonce: bytes) -> tuple[bytes, bytes]:
         """
@@ -250,6 +1076,98 @@ class EncryptionService:
 
         return subkey, chacha_nonce
 
+    def benchmark_algorithms(self, cache_path: Optional[str] = None, refresh: bool = False) -> Dict[str, float]:
+        """
+        Measure the throughput of every algorithm on this computer.
+
+        The benchmark runs once: results are kept for the process and saved
+        to a JSON cache keyed by a fingerprint of the CPU and crypto library,
+        so it only runs again when one of them changes.
+
+        Args:
+            cache_path: Cache file (default: per-user application data directory)
+            refresh: Ignore cached results and measure again
+
+        Returns:
+            MB/s of an encrypt plus decrypt round trip, by algorithm
+        """
+        results = None if refresh else self.cached_benchmark(cache_path)
+        if results is not None:
+            return results
+
+        cache_path = cache_path or self._default_benchmark_cache_path()
+        results = {algorithm: self._measure_throughput(algorithm) for algorithm in self.ALGORITHMS}
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            with open(cache_path, 'w', encoding='utf-8') as f:
+                json.dump({'fingerprint': self._host_fingerprint(), 'results': results}, f, indent=2)
+        except OSError:
+            pass  # The results still apply to this process
+
+        EncryptionService._benchmark_results = results
+        return results
+
+    def cached_benchmark(self, cache_path: Optional[str] = None) -> Optional[Dict[str, float]]:
+        """
+        Get the benchmark results of this process or the cache, without measuring.
+
+        Returns:
+            MB/s by algorithm, or None if the benchmark has not run on this computer
+        """
+        if EncryptionService._benchmark_results is None:
+            try:
+                with open(cache_path or self._default_benchmark_cache_path(), 'r', encoding='utf-8') as f:
+                    cached = json.load(f)
+                if cached.get('fingerprint') == self._host_fingerprint() \
+                        and set(cached.get('results', {})) == set(self.ALGORITHMS):
+                    EncryptionService._benchmark_results = cached['results']
+            except (OSError, ValueError, AttributeError):
+                pass
+        return EncryptionService._benchmark_results
+
+    def recommended_algorithm(self, cache_path: Optional[str] = None, measure: bool = True) -> str:
+        """
+        Get the fastest of RECOMMENDED_ALGORITHMS on this computer.
+
+        Args:
+            cache_path: Benchmark cache file (default: per-user application data directory)
+            measure: Run the benchmark if it has no results yet; otherwise fall back to the first
+                recommended algorithm
+        """
+        results = self.benchmark_algorithms(cache_path) if measure else self.cached_benchmark(cache_path)
+        if results is None:
+            return self.RECOMMENDED_ALGORITHMS[0]
+        return max(self.RECOMMENDED_ALGORITHMS, key=lambda algorithm: results.get(algorithm, 0.0))
+
+    def _measure_throughput(self, algorithm: str) -> float:
+        """Time encrypting and decrypting BENCHMARK_SIZE bytes; returns MB/s of the best round."""
+        data = secrets.token_bytes(self.BENCHMARK_SIZE)
+        key = secrets.token_bytes(self._get_key_size(algorithm))
+        nonce = secrets.token_bytes(self._get_nonce_size(algorithm))
+        associated_data = b"benchmark"
+
+        best = None
+        for _ in range(self.BENCHMARK_ROUNDS):
+            start = time.perf_counter()
+            encrypted = self._encrypt_payload(algorithm, key, nonce, data, associated_data)
+            self._decrypt_payload(algorithm, key, nonce, memoryview(encrypted), associated_data)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+
+        return round(2 * self.BENCHMARK_SIZE / (1024 * 1024) / max(best, 1e-9), 1)
+
+    def _host_fingerprint(self) -> str:
+        """Identify the CPU and crypto library the benchmark results belong to."""
+        return "|".join([
+            platform.machine(), platform.processor(), platform.python_implementation(),
+            cryptography.__version__, str(os.cpu_count()),
+        ])
+
+    def _default_benchmark_cache_path(self) -> str:
+        """Get the per-user location of the benchmark cache."""
+        base = os.environ.get('LOCALAPPDATA') or os.path.join(os.path.expanduser('~'), '.cache')
+        return os.path.join(base, 'ModernNotepad', self.BENCHMARK_CACHE_FILE)
+
     def is_encrypted_file(self, file_path: str) -> bool:
         """
         Check if a file is an encrypted notepad file.
@@ -263,7 +1181,7 @@ class EncryptionService:
         try:
             with open(file_path, 'rb') as f:
                 header = f.read(len(self.MAGIC_HEADER))
-                return header == self.MAGIC_HEADER
+                return header in (self.MAGIC_HEADER, self.MAGIC_HEADER_V1)
         except:
             return False
 
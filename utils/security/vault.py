@@ -0,0 +1,320 @@
+"""
+Encrypted multi-note vault.
+Stores many notes in one file behind a single key derivation, with an encrypted
+index and individually sealed note records that are decrypted only when opened.
+"""
+
+import json
+import os
+import struct
+import time
+import uuid
+import zlib
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional
+
+from utils.security.encryption import EncryptionService, EncryptionError
+
+
+class NoteVault:
+    """
+    A file holding many encrypted notes.
+
+    File layout::
+
+        MAGIC + HEADER + RECORD* + INDEX
+
+    HEADER is fixed size: algorithm, offset and length of the current index,
+    and the password key slots of EncryptionService that wrap the vault's
+    random data key. Every note is sealed on its own with the data key, so
+    opening the vault costs one key derivation plus an index decrypt, and a
+    note is only decrypted when it is read. The index is sealed with the
+    header that points at it as associated data, so a changed header fails
+    to open the vault.
+
+    Writes are append-only: a changed note and the new index are appended
+    and then the header is pointed at the new index, so an interrupted write
+    leaves the previous index intact. Superseded records are reclaimed by
+    compact(), which runs automatically once they make up most of the file.
+    """
+
+    MAGIC_HEADER = b"ENCRYPTED_NOTEVAULT1"
+    HEADER_FORMAT = ">12sQQH"  # algorithm, index offset, index length, key slot field length
+    INDEX_ASSOCIATED_DATA = b"vault-index"
+    COMPACTION_MIN_BYTES = 64 * 1024  # Never compact for less dead space than this
+    COMPACTION_DEAD_RATIO = 0.5  # Compact once dead records exceed this share of the file
+
+    def __init__(self, path: str, service: EncryptionService, algorithm: str, key: bytes,
+                 key_slots: bytes, index: Dict[str, Any]):
+        self.path = path
+        self.service = service
+        self.algorithm = algorithm
+        self.key = key
+        self.key_slots = key_slots
+        self.index = index
+        self._batch_depth = 0
+        self._index_dirty = False
+
+    @classmethod
+    def create(cls, path: str, password: str, algorithm: str = 'AES-256-GCM',
+               service: Optional[EncryptionService] = None) -> 'NoteVault':
+        """
+        Create an empty vault and return it unlocked.
+
+        Args:
+            path: Vault file path (overwritten if it exists)
+            password: Vault password
+            algorithm: An AEAD algorithm from EncryptionService.ALGORITHMS
+        """
+        service = service or EncryptionService()
+        if algorithm not in service.ALGORITHMS or not service.is_authenticated_algorithm(algorithm):
+            raise EncryptionError(f"Vaults require an authenticated algorithm, not {algorithm}")
+
+        key, key_slots = service.create_key_slots(algorithm, password)
+        vault = cls(path, service, algorithm, key, key_slots, {'notes': {}, 'dead_bytes': 0})
+        with open(path, 'wb') as file:
+            file.write(vault._pack_header(0, 0))
+        vault._write_index()
+        return vault
+
+    @classmethod
+    def open(cls, path: str, password: str, service: Optional[EncryptionService] = None) -> 'NoteVault':
+        """
+        Unlock a vault: one key derivation plus one index decrypt.
+
+        Raises:
+            InvalidPasswordError: If the password opens no key slot
+            EncryptionError: If the file is not a valid vault or names an unauthenticated algorithm
+        """
+        service = service or EncryptionService()
+        with open(path, 'rb') as file:
+            algorithm, index_offset, index_length, key_slots = cls._read_header(file)
+            # The header is only authenticated along with the index, so check it before trusting it
+            if algorithm not in service.ALGORITHMS or not service.is_authenticated_algorithm(algorithm):
+                raise EncryptionError(f"Vaults require an authenticated algorithm, not {algorithm}")
+            key = service.open_key_slots(key_slots, password)
+
+            vault = cls(path, service, algorithm, key, key_slots, {})
+            file.seek(index_offset)
+            sealed_index = file.read(index_length)
+
+        try:
+            index_bytes = zlib.decompress(vault._open_record(
+                sealed_index, vault._index_associated_data(index_offset, index_length)))
+            vault.index = json.loads(index_bytes.decode('utf-8'))
+        except (zlib.error, ValueError) as e:
+            raise EncryptionError(f"Corrupted vault index: {str(e)}")
+        return vault
+
+    @classmethod
+    def is_vault_file(cls, file_path: str) -> bool:
+        """Check if a file is a note vault."""
+        try:
+            with open(file_path, 'rb') as f:
+                return f.read(len(cls.MAGIC_HEADER)) == cls.MAGIC_HEADER
+        except OSError:
+            return False
+
+    def list_notes(self) -> List[Dict[str, Any]]:
+        """
+        List the notes in the vault without decrypting any of them.
+
+        Returns:
+            One dict per note with id, title, size and modified, oldest first
+        """
+        notes = [
+            {'id': note_id, 'title': entry['title'], 'size': entry['size'], 'modified': entry['modified']}
+            for note_id, entry in self.index['notes'].items()
+        ]
+        notes.sort(key=lambda note: note['modified'])
+        return notes
+
+    def read_note(self, note_id: str) -> str:
+        """Decrypt and return a single note, reading only its record from disk."""
+        entry = self._get_entry(note_id)
+        with open(self.path, 'rb') as file:
+            file.seek(entry['offset'])
+            sealed = file.read(entry['length'])
+
+        data_bytes = self._open_record(sealed, note_id.encode('utf-8'))
+        if entry.get('compression'):
+            data_bytes = self.service.decompress(entry['compression'], data_bytes)
+        return str(data_bytes, 'utf-8')
+
+    def add_note(self, title: str, content: str) -> str:
+        """Append a new note and return its id."""
+        note_id = uuid.uuid4().hex
+        self._write_note(note_id, title, content)
+        return note_id
+
+    def update_note(self, note_id: str, content: str, title: Optional[str] = None) -> None:
+        """Replace a note's content (and optionally its title) by appending a new record."""
+        entry = self._get_entry(note_id)
+        self.index['dead_bytes'] += entry['length']
+        self._write_note(note_id, entry['title'] if title is None else title, content)
+
+    def delete_note(self, note_id: str) -> None:
+        """Remove a note from the index; its record is reclaimed by compaction."""
+        entry = self._get_entry(note_id)
+        del self.index['notes'][note_id]
+        self.index['dead_bytes'] += entry['length']
+        self._commit()
+
+    def change_password(self, old_password: str, new_password: str) -> None:
+        """Re-wrap the vault key for a new password; notes stay as they are, only the index is sealed again."""
+        self.key_slots = self.service.rewrap_key_slots(self.key_slots, old_password, new_password)
+        self._write_index()
+
+    @contextmanager
+    def batch(self):
+        """Defer index writes so many notes can be added or changed with one index update."""
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0 and self._index_dirty:
+                self._commit()
+
+    def needs_compaction(self) -> bool:
+        """Check if superseded records take up enough of the file to be worth reclaiming."""
+        dead_bytes = self.index['dead_bytes']
+        if dead_bytes < self.COMPACTION_MIN_BYTES:
+            return False
+        return dead_bytes > os.path.getsize(self.path) * self.COMPACTION_DEAD_RATIO
+
+    def compact(self) -> None:
+        """
+        Rewrite the vault with only the live records.
+
+        Records are copied still sealed, so compaction never decrypts notes.
+        The new file replaces the old one atomically; if anything fails, the
+        old file and index are left as they were.
+        """
+        temp_path = self.path + '.compact'
+        notes = {note_id: dict(entry) for note_id, entry in self.index['notes'].items()}
+        compacted = {'notes': notes, 'dead_bytes': 0}
+        try:
+            with open(self.path, 'rb') as source, open(temp_path, 'wb') as target:
+                target.write(self._pack_header(0, 0))
+                for entry in notes.values():
+                    source.seek(entry['offset'])
+                    sealed = source.read(entry['length'])
+                    entry['offset'] = target.tell()
+                    target.write(sealed)
+
+                index_offset, index_length = self._append_index(target, compacted)
+                target.seek(0)
+                target.write(self._pack_header(index_offset, index_length))
+                target.flush()
+                os.fsync(target.fileno())
+            os.replace(temp_path, self.path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+        self.index = compacted
+
+    def _write_note(self, note_id: str, title: str, content: str) -> None:
+        """Seal a note, append it and record it in the index."""
+        data_bytes = content.encode('utf-8')
+        codec = self.service.choose_compression(data_bytes)
+        if codec is not None:
+            data_bytes = self.service.compress(codec, data_bytes)
+
+        sealed = self._seal_record(data_bytes, note_id.encode('utf-8'))
+        with open(self.path, 'r+b') as file:
+            file.seek(0, os.SEEK_END)
+            offset = file.tell()
+            file.write(sealed)
+
+        self.index['notes'][note_id] = {
+            'title': title,
+            'size': len(content),
+            'offset': offset,
+            'length': len(sealed),
+            'compression': codec,
+            'modified': time.time(),
+        }
+        self._commit()
+
+    def _commit(self) -> None:
+        """Write the index now, or at the end of the current batch."""
+        if self._batch_depth:
+            self._index_dirty = True
+            return
+        self._write_index()
+        self._index_dirty = False
+        if self.needs_compaction():
+            self.compact()
+
+    def _write_index(self) -> None:
+        """Append a fresh index and point the header at it."""
+        with open(self.path, 'r+b') as file:
+            _, old_offset, old_length, _ = self._read_header(file)
+            self.index['dead_bytes'] += old_length
+            index_offset, index_length = self._append_index(file, self.index)
+
+            # Make the new index durable before the header points at it
+            file.flush()
+            os.fsync(file.fileno())
+            file.seek(0)
+            file.write(self._pack_header(index_offset, index_length))
+
+    def _append_index(self, file, index: Dict[str, Any]) -> tuple:
+        """Seal an index and append it to an open file; returns (offset, length)."""
+        index_bytes = zlib.compress(json.dumps(index, separators=(',', ':')).encode('utf-8'))
+        file.seek(0, os.SEEK_END)
+        offset = file.tell()
+        length = self.service.sealed_size(self.algorithm, len(index_bytes))
+        sealed = self._seal_record(index_bytes, self._index_associated_data(offset, length))
+        file.write(sealed)
+        return offset, length
+
+    def _index_associated_data(self, index_offset: int, index_length: int) -> bytes:
+        """Bind an index to the header that points at it, key slots included."""
+        return self.INDEX_ASSOCIATED_DATA + self._pack_header(index_offset, index_length)
+
+    def _seal_record(self, data_bytes: bytes, associated_data: bytes) -> bytes:
+        """Encrypt one record as NONCE + CIPHERTEXT with the vault key."""
+        return self.service.seal(self.algorithm, self.key, data_bytes, associated_data)
+
+    def _open_record(self, sealed: bytes, associated_data: bytes):
+        """Decrypt one NONCE + CIPHERTEXT record with the vault key."""
+        try:
+            return self.service.unseal(self.algorithm, self.key, sealed, associated_data)
+        except EncryptionError as e:
+            raise EncryptionError(f"Corrupted vault record: {e}")
+
+    def _get_entry(self, note_id: str) -> Dict[str, Any]:
+        """Look up a note's index entry."""
+        try:
+            return self.index['notes'][note_id]
+        except KeyError:
+            raise KeyError(f"No note with id {note_id}")
+
+    def _pack_header(self, index_offset: int, index_length: int) -> bytes:
+        """Serialize the fixed-size vault header."""
+        return (
+            self.MAGIC_HEADER +
+            struct.pack(self.HEADER_FORMAT, self.algorithm.encode('utf-8'), index_offset, index_length,
+                        len(self.key_slots)) +
+            self.key_slots
+        )
+
+    @classmethod
+    def _read_header(cls, file) -> tuple:
+        """Read the vault header; returns (algorithm, index offset, index length, key slots)."""
+        file.seek(0)
+        fixed_size = len(cls.MAGIC_HEADER) + struct.calcsize(cls.HEADER_FORMAT)
+        fixed = file.read(fixed_size)
+        if len(fixed) < fixed_size or not fixed.startswith(cls.MAGIC_HEADER):
+            raise EncryptionError("Not a note vault file")
+
+        algorithm_bytes, index_offset, index_length, slots_length = struct.unpack_from(
+            cls.HEADER_FORMAT, fixed, len(cls.MAGIC_HEADER)
+        )
+        key_slots = file.read(slots_length)
+        if len(key_slots) < slots_length:
+            raise EncryptionError("Truncated vault header")
+        return algorithm_bytes.rstrip(b'\x00').decode('utf-8'), index_offset, index_length, key_slots
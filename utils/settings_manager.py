@@ -1,6 +1,8 @@
 from PyQt5.QtCore import QSettings
 from PyQt5.QtGui import QFont
 
+from core.lexer import TokenCache, get_token_cache
+
 
 class SettingsManager:
     """
@@ -35,6 +37,10 @@ class SettingsManager:
         else:
             text_editor.setLineWrapMode(text_editor.NoWrap)
 
+        # Memory for the syntax highlighting line cache, shared by all tabs
+        default_kb = TokenCache.DEFAULT_MAX_BYTES // 1024
+        get_token_cache().set_budget(self.settings.value("token_cache_kb", default_kb, type=int) * 1024)
+
     def save_editor_settings(self, text_editor):
         """Save text editor settings."""
         font = text_editor.font()